@@ -0,0 +1,92 @@
+"""
+Load test of the dashboard served by each FLASK_SERVER mode. The frontend is started with
+kubee2etests/scripts/flask_runner.py in a separate process, then client threads post batches of status
+updates and fetch the status page as fast as they can for a fixed time. Prints the requests per second
+and p50/p99 latency of POSTs and GETs for each server.
+
+Usage: PYTHONPATH=. python benchmarks/bench_frontend_server.py [seconds] [client threads] [servers...]
+"""
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from kubee2etests.helpers_and_globals import StatusEvent
+
+TESTS = 50
+BATCH = 5
+# one GET of the status page for every GETS_EVERY requests
+GETS_EVERY = 4
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start(server, port):
+    env = dict(os.environ, FLASK_SERVER=server, FLASK_PORT=str(port), FLASK_ADDR="127.0.0.1")
+    process = subprocess.Popen([sys.executable, "kubee2etests/scripts/flask_runner.py"], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            requests.get("http://127.0.0.1:%i/" % port, timeout=1)
+            return process
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("%s server didn't start" % server)
+
+
+def client(port, until, latencies):
+    session = requests.Session()
+    i = 0
+    while time.monotonic() < until:
+        start = time.perf_counter()
+        if i % GETS_EVERY == 0:
+            session.get("http://127.0.0.1:%i/" % port).raise_for_status()
+            kind = "GET"
+        else:
+            events = [StatusEvent("test %i" % ((i + n) % TESTS), n % 2 == 0, "bench").event_data
+                      for n in range(BATCH)]
+            session.post("http://127.0.0.1:%i/update/batch" % port, json=events).raise_for_status()
+            kind = "POST"
+        latencies[kind].append(time.perf_counter() - start)
+        i += 1
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    servers = sys.argv[3:] or ["dev", "threaded", "waitress"]
+    for server in servers:
+        port = free_port()
+        process = start(server, port)
+        try:
+            results = [{"GET": [], "POST": []} for _ in range(clients)]
+            until = time.monotonic() + seconds
+            threads = [threading.Thread(target=client, args=(port, until, result)) for result in results]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            process.terminate()
+            process.wait()
+        for kind in ("POST", "GET"):
+            latencies = sorted(latency for result in results for latency in result[kind])
+            print("%-8s %-4s %7.1f req/s  p50 %7.2f ms  p99 %7.2f ms" %
+                  (server, kind, len(latencies) / seconds, percentile(latencies, 0.5), percentile(latencies, 0.99)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares the cost of turning a pod list response into (name, phase) pairs by deserializing it into
+OpenAPI models, as the kubernetes client does by default, against parsing it as plain JSON as
+ApiMixin.read does with RAW_JSON_READS enabled.
+
+Usage: PYTHONPATH=. python benchmarks/bench_raw_json.py [pods] [repeats]
+"""
+import json
+import sys
+import timeit
+
+from kubernetes import client
+
+from kubee2etests.apimixin import ApiMixin
+
+
+def pod(i):
+    return {
+        "metadata": {"name": "e2etestapp-%i" % i, "namespace": "kubee2etests", "uid": "uid-%i" % i,
+                     "resourceVersion": str(1000 + i), "creationTimestamp": "2018-01-01T00:00:00Z",
+                     "labels": {"app": "hellominikube", "pod-template-hash": "1234"},
+                     "ownerReferences": [{"apiVersion": "extensions/v1beta1", "kind": "ReplicaSet",
+                                          "name": "e2etestapp-1234", "uid": "rs-uid", "controller": True}]},
+        "spec": {"nodeName": "node-%i" % i,
+                 "volumes": [{"name": "data", "configMap": {"name": "hello-world"}}],
+                 "containers": [{"name": "testapp", "image": "nginx:alpine",
+                                 "ports": [{"containerPort": 80, "protocol": "TCP"}],
+                                 "resources": {"requests": {"cpu": "1m", "memory": "1Mi"}},
+                                 "volumeMounts": [{"name": "data", "mountPath": "/usr/share/nginx/html"}]}]},
+        "status": {"phase": "Running", "podIP": "10.0.0.%i" % (i % 255), "hostIP": "10.1.0.1",
+                   "startTime": "2018-01-01T00:00:01Z",
+                   "conditions": [{"type": t, "status": "True", "lastTransitionTime": "2018-01-01T00:00:02Z"}
+                                  for t in ("PodScheduled", "Initialized", "ContainersReady", "Ready")],
+                   "containerStatuses": [{"name": "testapp", "ready": True, "restartCount": 0,
+                                          "image": "nginx:alpine", "imageID": "docker://sha",
+                                          "state": {"running": {"startedAt": "2018-01-01T00:00:02Z"}}}]},
+    }
+
+
+def main():
+    pods = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    body = json.dumps({"kind": "PodList", "apiVersion": "v1", "metadata": {"resourceVersion": "1"},
+                       "items": [pod(i) for i in range(pods)]})
+    api_client = client.ApiClient()
+
+    def models():
+        # what ApiClient.deserialize does with a response body
+        pod_list = api_client._ApiClient__deserialize(json.loads(body), "V1PodList")
+        return [(p.metadata.name, p.status.phase) for p in pod_list.items]
+
+    def raw_json():
+        pod_list = json.loads(body)
+        return [(ApiMixin.field(p, "metadata", "name"), ApiMixin.field(p, "status", "phase"))
+                for p in ApiMixin.field(pod_list, "items")]
+
+    assert models() == raw_json()
+    for name, func in (("models", models), ("raw json", raw_json)):
+        seconds = min(timeit.repeat(func, number=repeats, repeat=3)) / repeats
+        print("%-10s %i pods: %.3f ms per list" % (name, pods, seconds * 1000))
+
+
+if __name__ == '__main__':
+    main()
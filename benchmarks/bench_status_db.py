@@ -0,0 +1,50 @@
+"""
+Measures the SQLite status log kept by the frontend with STATUS_DB_PATH: how fast posted events are
+written, and how long a restarted frontend takes to load the latest status of each test and its recent
+history from a database holding 100k events.
+
+Usage: PYTHONPATH=. python benchmarks/bench_status_db.py [events] [tests]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from kubee2etests.frontend.history import StatusHistory
+from kubee2etests.frontend.persistence import StatusLog
+from kubee2etests.frontend.status_store import StatusStore
+from kubee2etests.helpers_and_globals import HISTORY_SIZE, HISTORY_MAX_TESTS, StatusEvent
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    tests = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    statuses = [StatusEvent("test %i" % i, i % 7 != 0, "ns-%i" % (i % 5), [] if i % 7 else [["error", 1]])
+                for i in range(tests)]
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "status.db")
+
+    log = StatusLog(path, events)
+    start = time.perf_counter()
+    for i in range(events):
+        status = statuses[i % tests]
+        log.append(status.namespace + status.name, status)
+    queued = time.perf_counter() - start
+    log.flush()
+    written = time.perf_counter() - start
+    print("append %i events: %.1f us each to queue, %.0f events/s written" %
+          (events, queued / events * 1e6, events / written))
+
+    start = time.perf_counter()
+    history = StatusHistory(HISTORY_SIZE, HISTORY_MAX_TESTS)
+    loaded = StatusLog(path, events).load(StatusStore(), history)
+    seconds = time.perf_counter() - start
+    results = sum(len(test["times"]) for test in history.query().values())
+    print("boot from %i events: latest of %i tests and %i recent results in %.1f ms" %
+          (events, loaded, results, seconds * 1000))
+    print("database size: %.1f MB" % (sum(os.path.getsize(os.path.join(directory, f))
+                                           for f in os.listdir(directory)) / 1e6))
+
+
+if __name__ == '__main__':
+    main()
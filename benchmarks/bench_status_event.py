@@ -0,0 +1,38 @@
+"""
+Compares decoding and encoding status events with the '%Y-%m-%d %H:%M:%S' time strings the frontend used
+to receive, which cost a strptime per POST and a strftime per event_data, against epoch times.
+
+Usage: PYTHONPATH=. python benchmarks/bench_status_event.py [events]
+"""
+import datetime
+import json
+import sys
+import timeit
+
+from kubee2etests.helpers_and_globals import StatusEvent
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    epoch = [json.dumps(StatusEvent("test %i" % i, i % 2 == 0, "ns", [["error", 1]]).event_data)
+             for i in range(events)]
+    strings = [json.dumps(dict(json.loads(body), time=datetime.datetime.now().strftime(StatusEvent.TIME_FORMAT)))
+               for body in epoch]
+
+    def old():
+        for body in strings:
+            event = StatusEvent.from_dict(json.loads(body))
+            data = dict(event.event_data, time=event.time.strftime(StatusEvent.TIME_FORMAT))
+            json.dumps(data)
+
+    def new():
+        for body in epoch:
+            json.dumps(StatusEvent.from_dict(json.loads(body)).event_data)
+
+    for name, func in (("strings", old), ("epoch", new)):
+        seconds = min(timeit.repeat(func, number=1, repeat=5))
+        print("%-8s %.2f us per event decoded and encoded" % (name, seconds / events * 1e6))
+
+
+if __name__ == '__main__':
+    main()
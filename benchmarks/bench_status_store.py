@@ -0,0 +1,89 @@
+"""
+Compares building the dashboard's status listing from the queue.Queue the frontend used to keep, which
+was drained, deduplicated, sorted and refilled on every page view, against reading a snapshot of
+StatusStore, while other threads post updates at the same time.
+
+Usage: PYTHONPATH=. python benchmarks/bench_status_store.py [tests] [gets] [posting threads]
+
+Each posting thread sends an update every POST_INTERVAL seconds, as a runner pod would, only much faster.
+"""
+import queue
+import sys
+import threading
+import time
+
+from collections import OrderedDict
+
+from kubee2etests.frontend.status_store import StatusStore
+from kubee2etests.helpers_and_globals import StatusEvent
+
+POST_INTERVAL = 0.0005
+
+
+class QueueStatus(object):
+    """
+    The frontend's previous status handling
+    """
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def put(self, event):
+        self.queue.put(event)
+
+    def snapshot(self):
+        status = {}
+        while True:
+            try:
+                result = self.queue.get(block=False)
+                status[result.namespace + result.name] = result
+            except queue.Empty:
+                break
+        ordered = OrderedDict(sorted(status.items(), key=lambda x: x[1].time, reverse=True))
+        for value in status.values():
+            self.queue.put(value)
+        return ordered
+
+
+def run(store, events, gets, posters):
+    for event in events:
+        store.put(event)
+    stop = threading.Event()
+    posts = [0] * posters
+
+    def post(n):
+        while not stop.is_set():
+            store.put(events[posts[n] % len(events)])
+            posts[n] += 1
+            time.sleep(POST_INTERVAL)
+
+    threads = [threading.Thread(target=post, args=(n,)) for n in range(posters)]
+    for thread in threads:
+        thread.start()
+    latencies = []
+    sizes = set()
+    for _ in range(gets):
+        start = time.perf_counter()
+        sizes.add(len(store.snapshot()))
+        latencies.append(time.perf_counter() - start)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return latencies, sum(posts), sizes
+
+
+def main():
+    tests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    gets = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    posters = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    events = [StatusEvent("test %i" % i, i % 3 != 0, "ns-%i" % (i % 5)) for i in range(tests)]
+    for name, store in (("queue", QueueStatus()), ("store", StatusStore())):
+        latencies, posts, sizes = run(store, events, gets, posters)
+        # a page missing tests means a post interleaved with the drain
+        print("%-6s %i tests, %i posts: GET p50 %.3f ms, p99 %.3f ms, page sizes seen %s" %
+              (name, tests, posts, latencies[len(latencies) // 2] * 1000,
+               latencies[int(len(latencies) * 0.99)] * 1000, sorted(sizes)))
+
+
+if __name__ == '__main__':
+    main()
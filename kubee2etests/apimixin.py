@@ -3,12 +3,18 @@ import json
 import requests
 import os
 import logging
+import re
 import time
 from http import HTTPStatus
-from urllib3.exceptions import ReadTimeoutError
+from kubernetes.client.rest import ApiException
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
 from kubee2etests.statussender import StatusSender
+from kubee2etests import informer
+from kubee2etests import httpprobe
+from kubee2etests.sketch import SketchTimer
 from kubee2etests import helpers_and_globals as e2e_globals
-from kubee2etests.helpers_and_globals import STATSD_CLIENT, ERROR_METRIC_NAME, HTTP_COUNT_METRIC_NAME
+from kubee2etests.helpers_and_globals import ACTION_METRIC_NAME, ERROR_METRIC_NAME, HTTP_COUNT_METRIC_NAME, \
+    WATCH_EVENT_METRIC_NAME
 
 LOGGER = logging.getLogger(__name__)
 
@@ -17,15 +23,72 @@ class ApiMixin(StatusSender):
     Class which loosely wraps around a kubernetes client object to standardise some useful methods/avoid recurringly
     needing to update metrics and the frontend status page in multiple places.
     """
+    # informer kind (see informer.INFORMER_KINDS) holding this resource, None if it can't be cached
+    informer_kind = None
+
     def __init__(self, namespace):
-        super().__init__()
+        super().__init__(namespace)
         self.namespace = namespace
-        self.api = client.CoreV1Api()
+        self.api = e2e_globals.get_api(client.CoreV1Api)
         # this will be filled with tuples containing (<error-msg>, <number-of-occurrences>
         self.on_api = False
         self.metric_data = {"resource": self.__class__.__name__,
                             "namespace": self.namespace
                             }
+        # (template, resource, labels) -> metric name, so names are only formatted once per object
+        self.metric_names = {}
+
+    def metric_name(self, template, resource=None, **labels):
+        """
+        Helper method to get the name of a metric about this object, formatting it the first time it is asked for.
+
+        Args:
+            template: metric name template, e.g. ACTION_METRIC_NAME
+            resource: resource name, defaults to the class name
+            labels: values of the template's other fields
+
+        Returns: (str) the metric name
+
+        """
+        key = (template, resource) + tuple(labels.items())
+        name = self.metric_names.get(key)
+        if name is None:
+            data = dict(self.metric_data, **labels)
+            if resource is not None:
+                data["resource"] = resource
+            name = self.metric_names[key] = template % data
+        return name
+
+    def timer(self, action, resource=None):
+        """
+        Helper method to time an action on this object. The time is also recorded in the action's latency sketch.
+
+        Args:
+            action: action you are timing
+            resource: resource name, defaults to the class name
+
+        Returns: statsd timer, to be used as a context manager
+
+        """
+        return SketchTimer(e2e_globals.stats_client(), self.metric_name(ACTION_METRIC_NAME, resource, action=action),
+                           e2e_globals.LATENCY_SKETCHES,
+                           (self.namespace, resource or self.metric_data["resource"], action))
+
+    def record_time(self, action, seconds, resource=None):
+        """
+        Helper method to record how long an action took when it wasn't timed by this process, e.g. from
+        timestamps on an object. Recorded like the timer's times.
+
+        Args:
+            action: action which was timed
+            seconds: (float) seconds taken
+            resource: resource name, defaults to the class name
+
+        Returns: None
+
+        """
+        e2e_globals.stats_client().timing(self.metric_name(ACTION_METRIC_NAME, resource, action=action), seconds * 1000)
+        e2e_globals.LATENCY_SKETCHES.record((self.namespace, resource or self.metric_data["resource"], action), seconds)
 
     def incr_error_metric(self, error, area="api", resource=None):
         """
@@ -45,11 +108,7 @@ class ApiMixin(StatusSender):
 
         Returns: None, increments the statsd error metric
         """
-        error_data = {"area": area, "error": error}
-        error_data.update(self.metric_data)
-        if resource is not None:
-            error_data["resource"] = resource
-        STATSD_CLIENT.incr(ERROR_METRIC_NAME % error_data)
+        e2e_globals.stats_client().incr(self.metric_name(ERROR_METRIC_NAME, resource, area=area, error=error))
 
     def incr_http_count_metric(self, result, resource=None):
         """
@@ -62,11 +121,24 @@ class ApiMixin(StatusSender):
         Returns: None, increments the statsd http count metric
 
         """
-        result_data = {"result": result}
-        result_data.update(self.metric_data)
-        if resource is not None:
-            result_data["resource"] = resource
-        STATSD_CLIENT.incr(HTTP_COUNT_METRIC_NAME % result_data)
+        e2e_globals.stats_client().incr(self.metric_name(HTTP_COUNT_METRIC_NAME, resource, result=result))
+
+    def incr_watch_metrics(self, received, matched, resource=None):
+        """
+        Helper method which counts the watch events received while waiting, and how many of them were
+        for the object(s) being waited on. The difference is the cost of watching more than needed.
+
+        Args:
+            received: (int) number of events received from the watch
+            matched: (int) number of those events which were for the object(s) waited on
+            resource: resource name, defaults to the class name
+
+        Returns: None, increments the statsd watch event count metrics
+
+        """
+        stats = e2e_globals.stats_client()
+        for result, count in (("received", received), ("matched", matched)):
+            stats.incr(self.metric_name(WATCH_EVENT_METRIC_NAME, resource, result=result), count)
 
     def action_data(self, action, resource=None):
         """
@@ -87,6 +159,41 @@ class ApiMixin(StatusSender):
             action_data["resource"] = resource
         return action_data
 
+    def http_get(self, url):
+        """
+        Send GET requests to url in the mode(s) set by PROBE_MODE, timing each request and counting its result.
+        Cold requests open a new connection and are timed as the http_get action, warm requests reuse a
+        keep-alive connection and are timed as http_get_warm, so connection setup (e.g. through kube-proxy)
+        can be told apart from steady state latency.
+
+        Args:
+            url: (str) address to request
+
+        Returns: (Response) response to the last request sent, None if it failed
+
+        """
+        resource = self.__class__.__name__
+        response = None
+        for warm in httpprobe.probe_modes():
+            response = None
+            with self.timer("http_get_warm" if warm else "http_get"):
+                try:
+                    response = httpprobe.get(url, warm)
+                    LOGGER.debug("%s %s at address: %s GET request response code: %s",
+                                 resource, self.name, url, response.status_code)
+                    self.incr_http_count_metric(str(response.status_code))
+
+                except requests.Timeout as e:
+                    LOGGER.error("%s %s at address: %s GET request timed out: %s", resource, self.name, url, e)
+                    self.incr_http_count_metric("timeout")
+                    self.add_error("%s %s at address: %s timed out" % (resource, self.name, url))
+
+                except requests.ConnectionError as e:
+                    LOGGER.error("%s %s at address: %s GET request failed: %s", resource, self.name, url, e)
+                    self.incr_http_count_metric("connection_error")
+                    self.add_error("%s %s at address: %s gave connection error" % (resource, self.name, url))
+        return response
+
     def parse_error(self, error_body):
         try:
             json_error = json.loads(error_body)
@@ -98,6 +205,50 @@ class ApiMixin(StatusSender):
                          "%s", error_body, str(e))
             return HTTPStatus(500), {"message": error_body}
 
+    def read(self, method, *args, **kwargs):
+        """
+        Call a kubernetes client read or list method. If RAW_JSON_READS is enabled the response is parsed as
+        plain JSON rather than deserialized into OpenAPI model objects, which is much cheaper when only a name,
+        phase or item count is needed. Use `field` to get values from the result so either form works.
+
+        Args:
+            method: (method) kubernetes client read or list method
+            *args: positional arguments to method
+            **kwargs: keyword arguments to method
+
+        Returns: (object or dict) the OpenAPI model, or the JSON dictionary if RAW_JSON_READS is enabled
+
+        """
+        if not e2e_globals.RAW_JSON_READS:
+            return method(*args, **kwargs)
+        response = method(*args, _preload_content=False, **kwargs)
+        try:
+            return json.loads(response.data.decode("utf8"))
+        finally:
+            response.release_conn()
+
+    @staticmethod
+    def field(obj, *path):
+        """
+        Get a field from an object returned by `read`, whether it is an OpenAPI model or its JSON form. Field
+        names are given as model attribute names and converted to camelCase for the JSON form.
+
+        Args:
+            obj: (object or dict) result of `read`
+            *path: (str) field names to follow, e.g. "spec", "node_name"
+
+        Returns: value of the field, None if any part of the path is missing
+
+        """
+        for key in path:
+            if obj is None:
+                return None
+            if isinstance(obj, dict):
+                obj = obj.get(re.sub("_([a-z])", lambda match: match.group(1).upper(), key))
+            else:
+                obj = getattr(obj, key)
+        return obj
+
     def exists(self, report=True):
         self._read_from_k8s()
         if report:
@@ -122,57 +273,208 @@ class ApiMixin(StatusSender):
         if report:
             self.send_update("Delete %s" % self.__class__.__name__)
 
-    def wait_on_deleted(self, report=False):
+    def wait_on_deleted(self, report=False, read_method=None, list_method=None):
         """
-        method which returns when deleted is true. Used for
-        deletions which happen too quick for us to track events
+        method which returns when the object has been deleted. If the client methods to read and list this
+        resource are given, reads the object once and waits for its DELETED event watching from that
+        resourceVersion, so the deletion is seen when it happens rather than at the next poll. If the watch
+        fails, reads the object with exponential backoff until it is not found. Without the client methods,
+        polls `deleted` instead, which records an error each time the object is still there.
 
         Args:
-            report: boolean, whether to report status to flask endpoint
+            report: boolean, whether to report status to flask endpoint once the object is deleted
+            read_method: (method) kubernetes client method to read this object, taking name and namespace
+            list_method: (method) kubernetes client method to list/watch this resource, taking namespace
 
         Returns: None
 
         """
-        while not self.deleted(report=report):
-            time.sleep(1)
+        delay = e2e_globals.DELETE_POLL_INITIAL_SECONDS
+        if read_method is None or list_method is None:
+            while not self.deleted(report=False):
+                time.sleep(delay)
+                delay = min(delay * 2, e2e_globals.DELETE_POLL_MAX_SECONDS)
+
+        elif not self._watch_deleted(read_method, list_method):
+            while self._still_exists(read_method):
+                time.sleep(delay)
+                delay = min(delay * 2, e2e_globals.DELETE_POLL_MAX_SECONDS)
+
+        if report:
+            self.send_update("Check %s deleted" % self.__class__.__name__)
+
+    def _still_exists(self, read_method):
+        """
+        Read this object without recording errors or metrics, for polling until it is deleted.
+
+        Args:
+            read_method: (method) kubernetes client method to read this object, taking name and namespace
+
+        Returns: (bool) False once the object is not found, True otherwise, including when it couldn't be read
+
+        """
+        try:
+            self.read(read_method, self.name, self.namespace, _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
+        except ApiException as e:
+            if e.status == HTTPStatus.NOT_FOUND:
+                self.on_api = False
+                return False
+            LOGGER.info("%s %s deletion check failed: %s", self.__class__.__name__, self.name, e)
+        except MaxRetryError as e:
+            LOGGER.info("%s %s deletion check failed: %s", self.__class__.__name__, self.name, e)
+        return True
+
+    def _watch_deleted(self, read_method, list_method):
+        """
+        Wait for the DELETED event for this object.
+
+        Args:
+            read_method: (method) kubernetes client method to read this object, taking name and namespace
+            list_method: (method) kubernetes client method to list/watch this resource, taking namespace
+
+        Returns: (bool) True if the object is deleted, False if it couldn't be watched and should be polled instead
+
+        """
+        resource = self.__class__.__name__
+        try:
+            obj = read_method(self.name, self.namespace, _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
+        except ApiException as e:
+            if e.status == HTTPStatus.NOT_FOUND:
+                self.on_api = False
+                return True
+            return False
+        except MaxRetryError:
+            return False
+
+        kwargs = {"resource_version": obj.metadata.resource_version,
+                  "_request_timeout": e2e_globals.TEST_EVENT_TIMEOUTS}
+        if e2e_globals.SCOPED_WATCHES:
+            kwargs["field_selector"] = "metadata.name=%s" % self.name
+        watcher = watch.Watch()
+        received = 0
+        deleted = False
+        try:
+            for event in watcher.stream(list_method, self.namespace, **kwargs):
+                if event['type'] == 'ERROR':
+                    LOGGER.info("%s %s deletion watch error, polling instead: %s", resource, self.name,
+                                event['raw_object'].get('message'))
+                    break
+                received += 1
+                if event['type'] == 'DELETED' and event['object'].metadata.name == self.name:
+                    LOGGER.info("%s %s DELETED", resource, self.name)
+                    deleted = True
+                    self.on_api = False
+                    watcher.stop()
+
+        except (ApiException, MaxRetryError, ReadTimeoutError) as e:
+            LOGGER.info("%s %s deletion watch failed, polling instead: %s", resource, self.name, e)
+
+        self.incr_watch_metrics(received, int(deleted))
+        return deleted
 
     def create_if_not_exists(self, report=False):
         exists = self.exists(report)
         if not exists:
             self.create(report)
 
-    def wait_on_event(self, method, event_type_enum, count=1, args=()):
+    def watcher(self, kind=None):
+        """
+        Get an object to stream kubernetes events from. If INFORMER_CACHE is enabled this is a subscription
+        to the namespace's shared informer, otherwise a new kubernetes watch. Both are used the same way.
+
+        Args:
+            kind: (str) informer kind of the resources to watch, defaults to this class's informer_kind
+
+        Returns: (watch.Watch or informer.Subscription) object with stream and stop methods
+
+        """
+        kind = kind or self.informer_kind
+        if e2e_globals.INFORMER_CACHE and kind is not None:
+            return informer.get_informer(kind, self.namespace).subscription()
+        return watch.Watch()
+
+    def wait_on_event(self, method, event_type_enum, count=1, args=(), written=None):
         """
         Wrapper around the watcher object which does exception handling and tracks errors waiting on object events to change
 
+        If the object returned by the API call which caused the event is given, it counts as the ADDED event it caused.
+        A create waiting on one ADDED event therefore returns straight away without watching, as the API server's
+        response already confirms the object was added, and the create's timer only covers the create call. Waits on
+        further events, e.g. MODIFIED, or on more than one event, watch from the written object's resourceVersion rather
+        than listing every object in the namespace, so events between the write and the start of the watch can't be
+        missed. If the resourceVersion has expired (410 Gone) the watch falls back to listing from scratch.
+
+        If SCOPED_WATCHES is enabled the watch is limited to this object with a field selector, so the API server
+        only sends events for it rather than for every object in the namespace.
+
         Args:
             method: (method) kubernetes client method to wait on
             event_type_enum: (EventType) enum from `helpers_and_globals` representing what object change to wait for
             count: (int) number of events to wait on
             args: (tuple) arguments which are needed by `method`
+            written: (object) kubernetes object returned by the create/update call being waited on, default None
 
         Returns: (list) list of objects which were modified, added or removed in the stream.
 
         """
         event_type = event_type_enum.value
         resource = self.__class__.__name__
-        watcher = watch.Watch()
         total = 0
+        received = 0
+        # events for the object waited on, unlike total this doesn't count the written object
+        matched = 0
         objects = []
-        try:
-            for event in watcher.stream(method, *args, _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS):
-                LOGGER.debug("Event: %s %s" % (event['type'], event['object'].metadata.name))
-                if event['object'].metadata.name == self.name and event['type'] == event_type:
-                    LOGGER.info("%s %s %s", resource, event['object'].metadata.name, event_type)
-                    total += 1
-                    objects.append(event['object'])
-                    if total >= count:
-                        watcher.stop()
-
-        except ReadTimeoutError as e:
-            LOGGER.error("%s event list read timed out, could not track events", resource)
-            self.incr_error_metric("events", area="timeout")
-            self.add_error("%s event list stream timed out" % resource)
-            LOGGER.debug(e)
-            LOGGER.debug(objects)
+        resource_version = None
+        if written is not None:
+            resource_version = written.metadata.resource_version
+            if event_type == e2e_globals.EventType.ADDED.value:
+                LOGGER.info("%s %s %s", resource, written.metadata.name, event_type)
+                total += 1
+                objects.append(written)
+
+        while total < count:
+            watcher = self.watcher()
+            kwargs = {"_request_timeout": e2e_globals.TEST_EVENT_TIMEOUTS}
+            if e2e_globals.SCOPED_WATCHES:
+                kwargs["field_selector"] = "metadata.name=%s" % self.name
+            if resource_version is not None:
+                kwargs["resource_version"] = resource_version
+            try:
+                for event in watcher.stream(method, *args, **kwargs):
+                    if event['type'] == 'ERROR':
+                        if event['raw_object'].get('code') == HTTPStatus.GONE:
+                            raise ApiException(status=HTTPStatus.GONE, reason=event['raw_object'].get('message'))
+                        LOGGER.error("%s watch error: %s", resource, event['raw_object'])
+                        continue
+
+                    received += 1
+                    obj = event['object']
+                    LOGGER.debug("Event: %s %s" % (event['type'], obj.metadata.name))
+                    if written is not None and obj.metadata.resource_version == resource_version:
+                        # the informer replays what it holds, which may be the write we already counted
+                        continue
+                    if obj.metadata.name == self.name and event['type'] == event_type:
+                        LOGGER.info("%s %s %s", resource, obj.metadata.name, event_type)
+                        total += 1
+                        matched += 1
+                        objects.append(obj)
+                        if total >= count:
+                            watcher.stop()
+                break
+
+            except ApiException as e:
+                if e.status != HTTPStatus.GONE or resource_version is None:
+                    raise
+                LOGGER.info("%s resource version %s expired, watching from a fresh list", resource, resource_version)
+                resource_version = None
+                written = None
+
+            except ReadTimeoutError as e:
+                LOGGER.error("%s event list read timed out, could not track events", resource)
+                self.incr_error_metric("events", area="timeout")
+                self.add_error("%s event list stream timed out" % resource)
+                LOGGER.debug(e)
+                LOGGER.debug(objects)
+                break
+        self.incr_watch_metrics(received, matched)
         return objects
@@ -8,7 +8,6 @@ from kubernetes.client.rest import ApiException
 from http import HTTPStatus
 from urllib3.exceptions import MaxRetryError
 from kubee2etests import helpers_and_globals as e2e_globals
-from kubee2etests.helpers_and_globals import STATSD_CLIENT, ACTION_METRIC_NAME
 from kubee2etests.apimixin import ApiMixin
 
 
@@ -16,6 +15,8 @@ LOGGER = logging.getLogger(__name__)
 
 
 class ConfigMap(ApiMixin):
+    informer_kind = "configmaps"
+
     def __init__(self, name=e2e_globals.TEST_INDEX_NAME,
                  index=e2e_globals.TEST_DEPLOYMENT_INDEX,
                  namespace=e2e_globals.TEST_NAMESPACE,
@@ -32,9 +33,9 @@ class ConfigMap(ApiMixin):
         )
 
     def create(self, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("create")):
+        with self.timer("create"):
             try:
-                self.api.create_namespaced_config_map(self.namespace, self.k8s_object)
+                created = self.api.create_namespaced_config_map(self.namespace, self.k8s_object)
                 self.on_api = True
 
             except ApiException as e:
@@ -60,13 +61,40 @@ class ConfigMap(ApiMixin):
 
             else:
                 self.wait_on_event(self.api.list_namespaced_config_map, e2e_globals.EventType.ADDED,
-                                   args=(self.namespace,))
+                                   args=(self.namespace,), written=created)
 
         super().create(report)
 
+    def annotate(self, annotations):
+        """
+        Set annotations on the config map, leaving its other annotations and data alone.
+
+        Args:
+            annotations: (dict) annotation name -> value
+
+        Returns: the patched kubernetes object, None if the patch failed
+
+        """
+        with self.timer("patch"):
+            try:
+                return self.api.patch_namespaced_config_map(self.name, self.namespace,
+                                                            {"metadata": {"annotations": annotations}})
+
+            except ApiException as e:
+                error_code, error_dict = self.parse_error(e.body)
+                LOGGER.error("Error annotating config map %s: %s", error_code, error_dict['message'])
+                self.add_error(error_dict['message'])
+                self.incr_error_metric(error_code.name.lower())
+
+            except MaxRetryError:
+                msg = "Error annotating config map %s, max retries exceeded"
+                LOGGER.error(msg, self.name)
+                self.incr_error_metric("max_retries_exceeded")
+                self.add_error(msg % self.name)
+
     def _read_from_k8s(self, should_exist=True):
         try:
-            self.api.read_namespaced_config_map(self.name, self.namespace)
+            self.read(self.api.read_namespaced_config_map, self.name, self.namespace)
             self.on_api = True
 
         except ApiException as e:
@@ -97,7 +125,7 @@ class ConfigMap(ApiMixin):
                 self.incr_error_metric("still_exists", area="k8s")
 
     def delete(self, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("delete")):
+        with self.timer("delete"):
             try:
                 self.api.delete_namespaced_config_map(self.name, self.namespace, client.V1DeleteOptions())
                 self.on_api = False
@@ -111,6 +139,7 @@ class ConfigMap(ApiMixin):
                 self.incr_error_metric(error_code.name.lower())
 
             else:
-                self.wait_on_deleted(report=False)
+                self.wait_on_deleted(report=False, read_method=self.api.read_namespaced_config_map,
+                                     list_method=self.api.list_namespaced_config_map)
 
         super().delete(report)
@@ -1,19 +1,21 @@
 import collections
-from kubernetes import client, watch
+from kubernetes import client
 from kubernetes.client.rest import ApiException
 from urllib3.exceptions import MaxRetryError, ReadTimeoutError
 from http import HTTPStatus
 from kubee2etests import helpers_and_globals as e2e_globals
-from kubee2etests.helpers_and_globals import STATSD_CLIENT, ACTION_METRIC_NAME
 from kubee2etests.apimixin import ApiMixin
 import logging
 from kubee2etests import Pod
+from kubee2etests.pod import startup_phases
 
 
 LOGGER = logging.getLogger(__name__)
 
 
 class Deployment(ApiMixin):
+    informer_kind = "deployments"
+
     def __init__(self, name, namespace, replicas=e2e_globals.TEST_REPLICAS,
                  cfgmap_name=e2e_globals.TEST_INDEX_NAME,
                  labels=e2e_globals.TEST_LABELS,
@@ -27,10 +29,12 @@ class Deployment(ApiMixin):
         self.template_labels = template_labels
         self.vol_claim_name = vol_claim
         # Api used for deployment methods. Core api used for any pod methods
-        self.extensions_api = client.ExtensionsV1beta1Api()
+        self.extensions_api = e2e_globals.get_api(client.ExtensionsV1beta1Api)
         self.pods = collections.defaultdict(list)
         self.old_pods = {}
         self.pod_requests = 0
+        # pod uid -> startup phases already recorded for that pod
+        self.pod_phases = {}
 
     @property
     def label_selector(self):
@@ -99,9 +103,9 @@ class Deployment(ApiMixin):
 
 
     def create(self, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("create")):
+        with self.timer("create"):
             try:
-                self.extensions_api.create_namespaced_deployment(self.namespace, self.k8s_object)
+                created = self.extensions_api.create_namespaced_deployment(self.namespace, self.k8s_object)
                 self.on_api = True
 
             except ApiException as e:
@@ -123,14 +127,14 @@ class Deployment(ApiMixin):
 
             else:
                 self.wait_on_event(self.extensions_api.list_namespaced_deployment, e2e_globals.EventType.ADDED,
-                                   args=(self.namespace,))
+                                   args=(self.namespace,), written=created)
 
         super().create(report)
 
     def _read_from_k8s(self, should_exist=True):
         created_deployment = None
         try:
-            self.extensions_api.read_namespaced_deployment(self.name, self.namespace)
+            self.read(self.extensions_api.read_namespaced_deployment, self.name, self.namespace)
             self.on_api = True
         except ApiException as e:
             error_code, error_dict = self.parse_error(e.body)
@@ -162,14 +166,14 @@ class Deployment(ApiMixin):
                 self.incr_error_metric("not_deleted", area="k8s")
 
     def change_cfg_map(self, new_cfgmap_name, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("update")):
+        with self.timer("update"):
             self.cfgmap_name = new_cfgmap_name
             self._update_k8s()
         if report:
             self.send_update("Update deployment")
 
     def scale(self, replicas, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("scale")):
+        with self.timer("scale"):
             self.replicas = replicas
             self._update_k8s()
         if report:
@@ -197,7 +201,7 @@ class Deployment(ApiMixin):
             self.incr_error_metric("max_retries_exceeded")
 
     def delete(self, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("delete")):
+        with self.timer("delete"):
             body = client.V1DeleteOptions(propagation_policy="Background")
             try:
                 self.extensions_api.delete_namespaced_deployment(self.name, self.namespace, body)
@@ -218,7 +222,8 @@ class Deployment(ApiMixin):
                 self.incr_error_metric("max_retries_exceeded")
 
             else:
-                self.wait_on_deleted()
+                self.wait_on_deleted(read_method=self.extensions_api.read_namespaced_deployment,
+                                     list_method=self.extensions_api.list_namespaced_deployment)
 
         super().delete(report)
 
@@ -232,12 +237,16 @@ class Deployment(ApiMixin):
 
         """
         try:
-            pods = self.api.list_namespaced_pod(self.namespace,
-                                                label_selector=self.label_selector)
+            pods = self.read(self.api.list_namespaced_pod, self.namespace,
+                             label_selector=self.label_selector)
             self.pods = collections.defaultdict(list)
-            for pod in pods.items:
-                p = Pod(pod.metadata.name, self.namespace)
-                self.pods[pod.status.phase].append(p)
+            for pod in self.field(pods, "items") or []:
+                p = Pod(self.field(pod, "metadata", "name"), self.namespace,
+                        node_name=self.field(pod, "spec", "node_name"))
+                self.pods[self.field(pod, "status", "phase")].append(p)
+            # the listing has every pod, so forget the startup phases of any which have gone
+            uids = set(self.field(pod, "metadata", "uid") for pod in self.field(pods, "items") or [])
+            self.pod_phases = {uid: phases for uid, phases in self.pod_phases.items() if uid in uids}
 
         except ApiException as e:
             error_code, error_dict = self.parse_error(e.body)
@@ -261,6 +270,7 @@ class Deployment(ApiMixin):
         stop watching when the count reaches self.replicas as this is how many pods we should have in
         the right phase. Non-terminating pods will be added to self.pods
         If a pod is terminating, it won't count that pod. Pod will be put on self.old_pods.
+        Each phase of each pod's startup is recorded once, as soon as an event shows it has ended.
         Args:
             phase: string, default any means it will count pods in any phase excluding terminating.
             event_type_enum: Event type - default all means it will count pods going through any event.
@@ -269,18 +279,23 @@ class Deployment(ApiMixin):
 
         """
         event_type = event_type_enum.value
-        watcher = watch.Watch()
+        watcher = self.watcher("pods")
         total = 0
+        received = 0
         self.pods = collections.defaultdict(list)
         try:
             for event in watcher.stream(self.api.list_namespaced_pod, self.namespace, label_selector=self.label_selector,
                                         _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS):
                 LOGGER.debug("Event: %s %s", event['type'], event['object'].metadata.name)
+                received += 1
                 pod_name = event['object'].metadata.name
 
                 pod_phase = event['object'].status.phase
-                pod_obj = Pod(pod_name, self.namespace)
+                pod_obj = Pod(pod_name, self.namespace, node_name=event['object'].spec.node_name)
                 self.pods[pod_phase].append(pod_obj)
+                self._record_pod_phases(event['object'])
+                if event['type'] == 'DELETED':
+                    self.pod_phases.pop(event['object'].metadata.uid, None)
                 if event_type in (event['type'], 'ALL'):
                     if pod_name not in self.old_pods and phase in (pod_phase, 'any'):
                         LOGGER.info("Pod %s scheduled, phase %s", pod_name, pod_phase)
@@ -296,33 +311,52 @@ class Deployment(ApiMixin):
             LOGGER.debug(e)
             self.add_error("Pod event list timed out")
 
+        self.incr_watch_metrics(received, total, resource="Pod")
+
+    def _record_pod_phases(self, k8s_pod):
+        """
+        Record the startup phases of a pod which have ended since it was last seen. Pods are forgotten when a
+        watch sees them deleted or a listing doesn't include them, as a watch may stop before seeing every pod.
+
+        Args:
+            k8s_pod: kubernetes pod object from a watch event
+
+        Returns: None
+
+        """
+        recorded = self.pod_phases.setdefault(k8s_pod.metadata.uid, set())
+        for action, seconds in startup_phases(k8s_pod).items():
+            if action not in recorded:
+                recorded.add(action)
+                self.record_time(action, seconds, resource="Pod")
+
     def wait_on_pods_ready(self, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("run", resource="Pod")):
+        with self.timer("run", resource="Pod"):
             self._wait_on_pods(phase="Running")
         if report:
             self.send_update("Wait on pods ready")
 
     def wait_on_pods_scheduled(self, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("schedule", resource="Pod")):
+        with self.timer("schedule", resource="Pod"):
             self._wait_on_pods(phase="Pending")
         if report:
             self.send_update("Wait on pod scheduling")
 
     def check_pods_deleted(self, phase="any", report=True):
-        deleted = True
         if phase == "any":
             to_delete_pods = []
             [to_delete_pods.extend(pods) for pods in self.pods.values()]
         else:
             to_delete_pods = self.pods[phase]
+        # each check is a blocking read, so check the pods concurrently
+        e2e_globals.run_concurrently(lambda pod: pod.deleted(), to_delete_pods)
         for pod in to_delete_pods:
-            deleted = deleted and pod.deleted()
             self.add_errors(pod.results[1])
         if report:
             self.send_update("Check pods are deleted")
 
     def watch_pod_scaling(self, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("scale", resource="Pod")):
+        with self.timer("scale", resource="Pod"):
             self._wait_on_pods(event_type_enum=e2e_globals.EventType.DELETED)
         if report:
             self.send_update("Watch pod deletion")
@@ -366,7 +400,7 @@ class Deployment(ApiMixin):
 
     def http_request_all_pods(self, cfgmap_text, report=True):
         """
-        Method to send a get request to each pod ip/port pair.
+        Method to send a get request to each pod ip/port pair, up to MAX_PARALLEL_REQUESTS at a time.
         Assumes pods have already been loaded - do read_pods or wait_on_pods_x
         to load them before calling this method.
 
@@ -376,8 +410,9 @@ class Deployment(ApiMixin):
         Returns: None, updates pod_requests and errors. May also increment a statsd metric
 
         """
-        for pod in self.pods["Running"]:
-            response = pod.make_http_request()
+        pods = self.pods["Running"]
+        responses = e2e_globals.run_concurrently(lambda pod: pod.make_http_request(), pods)
+        for pod, response in zip(pods, responses):
             self.add_errors(pod.results[1])
             if response is not None:
                 if response.text != cfgmap_text:
@@ -0,0 +1,78 @@
+import json
+import queue
+import threading
+
+
+class Listener(object):
+    """
+    One client of a Broadcaster, with its own bounded queue of messages still to be sent to it
+    """
+    def __init__(self, queue_size):
+        self.messages = queue.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def get(self, timeout):
+        """
+        Args:
+            timeout: (float) seconds to wait for a message
+
+        Returns: (str) next message, None if nothing was published within the timeout
+
+        """
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Broadcaster(object):
+    """
+    Fans status changes out to every connected dashboard, so viewers share one stream of updates
+    rather than each re-rendering the whole page. A listener too slow to keep up with its queue is
+    closed, and its dashboard reloads the page when it reconnects. At most max_listeners can listen at once.
+    """
+    def __init__(self, queue_size, max_listeners=None):
+        self.queue_size = queue_size
+        self.max_listeners = max_listeners
+        self.listeners = set()
+        self.lock = threading.Lock()
+
+    def listen(self):
+        """
+        Returns: (Listener) a new listener, None if max_listeners are already listening
+        """
+        listener = Listener(self.queue_size)
+        with self.lock:
+            if self.max_listeners is not None and len(self.listeners) >= self.max_listeners:
+                return None
+            self.listeners.add(listener)
+        return listener
+
+    def remove(self, listener):
+        listener.closed = True
+        with self.lock:
+            self.listeners.discard(listener)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.listeners)
+
+    def publish(self, key, event):
+        """
+        Send a status event to every listener, without blocking on any of them.
+
+        Args:
+            key: (str) key of the test in the status store, used by the dashboard to find the test's row
+            event: (StatusEvent) event to send
+
+        Returns: None
+
+        """
+        message = json.dumps(dict(event.event_data, key=key))
+        with self.lock:
+            listeners = list(self.listeners)
+        for listener in listeners:
+            try:
+                listener.messages.put_nowait(message)
+            except queue.Full:
+                self.remove(listener)
@@ -1,15 +1,37 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, Response, current_app, render_template, request, jsonify
+from kubee2etests import helpers_and_globals as e2e_globals
 from kubee2etests.helpers_and_globals import TIME_TO_REPORT_PARAMETER, StatusEvent
-import queue
-from collections import OrderedDict
+from kubee2etests.frontend.broadcaster import Broadcaster
+from kubee2etests.frontend.history import StatusHistory
+from kubee2etests.frontend.latency_reports import LatencyReports
+from kubee2etests.sketch import QuantileSketch
+from kubee2etests.frontend.status_store import StatusStore
 from datetime import datetime
+import json
 import logging
 import os
+import threading
+import uuid
+import zlib
 from http import HTTPStatus
 
-# queue for passing test status from post request to get request
-TEST_STATUS = queue.Queue()
+# latest status of each test, written by post requests and read by get requests
+TEST_STATUS = StatusStore()
+# stream of status changes to dashboards viewing the page
+STATUS_CHANGES = Broadcaster(e2e_globals.SSE_CLIENT_QUEUE_SIZE, e2e_globals.SSE_MAX_CLIENTS)
+# recent results of each test
+STATUS_HISTORY = StatusHistory(e2e_globals.HISTORY_SIZE, e2e_globals.HISTORY_MAX_TESTS)
+# latency sketches reported by each test runner, forgotten if a runner misses 10 reports
+LATENCY = LatencyReports(e2e_globals.LATENCY_REPORT_SECONDS * 10)
+# database events are written to, if the frontend keeps them across restarts
+STATUS_LOG = None
 LOGGER = logging.getLogger(__name__)
+REQUIRED_FIELDS = ["name", "passing", "info", "namespace", "time"]
+# page kind -> (cache key, body, etag) of the last rendered page. Etags include a token unique to this process,
+# as store versions start again from 0 when the frontend restarts
+RENDERED = {}
+RENDERED_LOCK = threading.Lock()
+ETAG_PREFIX = uuid.uuid4().hex[:8]
 healthcheck = Blueprint("healthcheck", __name__, template_folder="templates", static_folder="static")
 
 
@@ -17,42 +39,165 @@ def days_hours_minutes(td):
     return td.days, td.seconds//3600, (td.seconds//60)%60
 
 
-@healthcheck.route("/")
-def status():
+def staleness_errors(latest):
     """
-    This is a fairly messy method and it probably needs refactoring. Essentially what it should do,
-    as confirmed by tests in ../tests/test_flask_page.py, is:
-    1. Get the messages from the test status queue
-    3. Put it into a dictionary. Overwrites naturally occur for later events.
-    3. Put the statuses we selected onto the test status queue for the next GET, which should now be empty.
-    4. Return the template with the dictionary of statuses, ordered by time.
+    Check whether tests have stopped reporting.
 
-    Returns: a http response with the list of tests in a nicely formatted Jinja2 template.
+    Args:
+        latest: (StatusEvent) the most recent status event, None if there are none
+
+    Returns: (list) an error if the latest event is older than TIME_TO_REPORT minutes, otherwise empty
 
     """
     time_to_report = float(os.environ.setdefault(TIME_TO_REPORT_PARAMETER, "20"))
-    status = {}
-    while True:
-        try:
-            result = TEST_STATUS.get(block=False)
-            status[result.namespace + result.name] = result
-        except queue.Empty:
-            break
     errors = []
-    ordered = OrderedDict(sorted(status.items(), key=lambda x: x[1].time, reverse=True))
-    if len(ordered) > 0:
-        latest = list(ordered.items())[0][1].time
+    if latest is not None:
         now = datetime.now()
-        delta = now - latest
+        delta = now - latest.time
         days, hours, minutes = days_hours_minutes(delta)
         minutes_since_test = delta.seconds / 60
         if minutes_since_test >= time_to_report:
             errors.append("ERROR! No test data for %i days %i hours and %i minutes" % (days, hours, minutes))
-            LOGGER.error(errors[-1])
-    for elem, value in status.items():
-        TEST_STATUS.put(value)
+    return errors
+
+
+def streams_events():
+    """
+    Event streams stay open for as long as a dashboard is, so they are only served by servers which handle
+    requests concurrently. Apps served one request at a time set STREAM_EVENTS to False in their config.
+
+    Returns: (bool) True if /events is served and dashboards should use it
+
+    """
+    return current_app.config.get("STREAM_EVENTS", True)
+
+
+def cached_response(kind, render, mimetype):
+    """
+    Serve a page rendered from the status store, rendering it again only if the store, the latency reports
+    or the staleness errors have changed since it was last rendered. Answers with 304 Not Modified if the client's
+    If-None-Match matches the page's etag.
+
+    Args:
+        kind: (str) name of the page in the cache
+        render: (function) taking the latest statuses and staleness errors, returning the page body
+        mimetype: (str) mimetype of the page
+
+    Returns: a http response
+
+    """
+    errors = staleness_errors(TEST_STATUS.latest())
+    for error in errors:
+        LOGGER.error(error)
+    # runners which have gone change the latency version, so they don't stay on the cached page
+    LATENCY.expire()
+    with RENDERED_LOCK:
+        cached = RENDERED.get(kind)
+    if cached is None or cached[0] != (TEST_STATUS.version, LATENCY.version, tuple(errors)):
+        latency_version = LATENCY.version
+        version, ordered = TEST_STATUS.view()
+        errors = staleness_errors(next(iter(ordered.values()), None))
+        key = (version, latency_version, tuple(errors))
+        etag = "%s-%i-%i-%08x" % (ETAG_PREFIX, version, latency_version, zlib.crc32("\n".join(errors).encode()))
+        cached = (key, render(ordered, errors), etag)
+        with RENDERED_LOCK:
+            RENDERED[kind] = cached
+    _, body, etag = cached
+    if request.if_none_match.contains(etag):
+        response = Response(status=HTTPStatus.NOT_MODIFIED)
+    else:
+        response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    return response
+
+
+@healthcheck.route("/")
+def status():
+    """
+    Renders the latest status of every test, newest first, as confirmed by tests in ../tests/test_flask_page.py.
+    If the newest test result is older than TIME_TO_REPORT minutes an error is shown above the table.
+    Latency percentiles of each action follow the table. The page is only rendered again when something shown changes.
+    The page streams changes from /events unless the server can't serve event streams.
+
+    Returns: a http response with the list of tests in a nicely formatted Jinja2 template.
+
+    """
+    stream_events = streams_events()
+    return cached_response("html" if stream_events else "html-no-events",
+                           lambda ordered, errors: render_template('index.html', results=ordered, errors=errors,
+                                                                   latencies=LATENCY.summaries(),
+                                                                   stream_events=stream_events),
+                           "text/html")
+
+
+@healthcheck.route("/status.json")
+def status_json():
+    """
+    The latest status of every test as json, newest first, with the same errors and caching as the status page.
+
+    Returns: a http response with a dictionary of errors and the list of statuses
+
+    """
+    def render(ordered, errors):
+        statuses = [dict(event.event_data, key=key) for key, event in ordered.items()]
+        return json.dumps({"errors": errors, "statuses": statuses})
+    return cached_response("json", render, "application/json")
+
+
+def parse_event(data):
+    """
+    Build a StatusEvent from the json sent by a test container.
+
+    Args:
+        data: deserialized json of one event
+
+    Returns: (tuple) the event, or None and a description of why the json isn't a valid event
+
+    """
+    if not isinstance(data, dict):
+        return None, "Event object invalid: not an object"
+    try:
+        return StatusEvent.from_dict(data), None
+    except KeyError:
+        missing = [field for field in REQUIRED_FIELDS if field not in data]
+        return None, "Event object invalid: keys missing - {}".format(", ".join(missing))
+    except (TypeError, ValueError) as e:
+        return None, "Event object invalid: bad time - {}".format(e)
+
+
+def restore(status_log):
+    """
+    Load the statuses kept in a status log, and keep every status posted from now on in it.
+
+    Args:
+        status_log: (StatusLog) log to restore from and write to
+
+    Returns: None
+
+    """
+    global STATUS_LOG
+    status_log.load(TEST_STATUS, STATUS_HISTORY)
+    STATUS_LOG = status_log
+
+
+def store_events(events):
+    """
+    Store status events, record them in the history and status log and send them to dashboards streaming changes.
+
+    Args:
+        events: (list) StatusEvents to store, all or none of which will be shown
+
+    Returns: None
+
+    """
+    TEST_STATUS.put_many(events)
+    for event in events:
+        key = TEST_STATUS.key(event)
+        STATUS_HISTORY.record(key, event)
+        STATUS_CHANGES.publish(key, event)
+        if STATUS_LOG is not None:
+            STATUS_LOG.append(key, event)
 
-    return render_template('index.html', results=ordered, errors=errors)
 
 @healthcheck.route("/update", methods=['POST'])
 def update():
@@ -62,17 +207,132 @@ def update():
     Returns: dictionary describing what happened followed by HTTP status code
 
     """
-    data = request.get_json()
-    required_fields = ["name", "passing", "info", "namespace", "time"]
-    missing = [field for field in required_fields if field not in data]
+    event, error = parse_event(request.get_json())
     result = {"result": "event put onto queue"}
     http_status = HTTPStatus.OK
 
-    if len(missing) == 0:
-        event = StatusEvent(data['name'], data['passing'], data['namespace'], data['info'], data['time'])
-        TEST_STATUS.put(event)
+    if error is None:
+        store_events([event])
 
     else:
-        result["result"] = "Event object invalid: keys missing - {}".format(", ".join(missing))
+        result["result"] = error
         http_status = HTTPStatus.UNPROCESSABLE_ENTITY
     return jsonify(result), http_status
+
+
+@healthcheck.route("/update/batch", methods=['POST'])
+def update_batch():
+    """
+    Post endpoint for several updates at once, from a test container sending updates in batches or from something
+    forwarding the updates of many test containers. The body is either a json array of events or, with the content
+    type application/x-ndjson, one json event per line. Either every event is stored, or none are if any is invalid.
+
+    Returns: dictionary describing what happened, with the index and error of each invalid event, followed by HTTP
+        status code
+
+    """
+    if request.mimetype == "application/x-ndjson":
+        try:
+            data = [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        except ValueError as e:
+            return jsonify({"result": "Batch invalid: bad json line - {}".format(e)}), HTTPStatus.BAD_REQUEST
+    else:
+        data = request.get_json()
+        if not isinstance(data, list):
+            return jsonify({"result": "Batch invalid: expected a list of events"}), HTTPStatus.UNPROCESSABLE_ENTITY
+
+    events = []
+    errors = []
+    for index, item in enumerate(data):
+        event, error = parse_event(item)
+        if error is None:
+            events.append(event)
+        else:
+            errors.append({"index": index, "error": error})
+
+    if len(errors) > 0:
+        return jsonify({"result": "Batch invalid: %i of %i events invalid, none stored" % (len(errors), len(data)),
+                        "errors": errors}), HTTPStatus.UNPROCESSABLE_ENTITY
+    store_events(events)
+    return jsonify({"result": "%i events put onto queue" % len(events)}), HTTPStatus.OK
+
+
+@healthcheck.route("/history")
+def history():
+    """
+    Recent results of each test as json, to find tests flapping between passing and failing. The since and until
+    query parameters limit results to a range of epoch times, and key to one test.
+
+    Returns: dictionary of test key -> namespace, name, result times, passing flags and number of changes
+        between passing and failing, followed by HTTP status code
+
+    """
+    try:
+        since, until = [float(request.args[arg]) if arg in request.args else None for arg in ("since", "until")]
+    except ValueError:
+        return jsonify({"result": "since and until must be epoch times"}), HTTPStatus.BAD_REQUEST
+    return jsonify(STATUS_HISTORY.query(since, until, request.args.get("key"))), HTTPStatus.OK
+
+
+@healthcheck.route("/latency", methods=['POST'])
+def update_latency():
+    """
+    Post endpoint for test runners to send their latency sketches into. Each report replaces the last
+    one from the same source.
+
+    Returns: dictionary describing what happened followed by HTTP status code
+
+    """
+    data = request.get_json()
+    try:
+        sketches = {(item["namespace"], item["resource"], item["action"]): QuantileSketch.from_dict(item["sketch"])
+                    for item in data["sketches"]}
+        source = str(data["source"])
+    except (KeyError, TypeError, ValueError, IndexError, AttributeError) as e:
+        return jsonify({"result": "Latency report invalid: {}".format(e)}), HTTPStatus.UNPROCESSABLE_ENTITY
+    LATENCY.put(source, sketches)
+    return jsonify({"result": "%i sketches stored" % len(sketches)}), HTTPStatus.OK
+
+
+@healthcheck.route("/latency")
+def latency():
+    """
+    Latency of each action, from the sketches of every test runner merged together.
+
+    Returns: list of dictionaries of namespace, resource, action, count and p50, p95 and p99 latency in seconds
+
+    """
+    return jsonify(LATENCY.summaries()), HTTPStatus.OK
+
+
+@healthcheck.route("/events")
+def events():
+    """
+    Server sent events stream of status changes, used by the dashboard to update its rows as tests report rather
+    than reloading the page. Each message is the json of a status event with the key of the test's row. A comment
+    is sent every SSE_HEARTBEAT_SECONDS so proxies don't close an idle stream.
+
+    Returns: a streaming http response, 404 if the server doesn't serve event streams or 503 if SSE_MAX_CLIENTS
+        streams are already open
+
+    """
+    if not streams_events():
+        return jsonify({"result": "Event streams are not served by this server"}), HTTPStatus.NOT_FOUND
+    listener = STATUS_CHANGES.listen()
+    if listener is None:
+        return jsonify({"result": "Too many event streams open"}), HTTPStatus.SERVICE_UNAVAILABLE
+
+    def stream():
+        try:
+            yield ": connected\n\n"
+            while not listener.closed:
+                message = listener.get(e2e_globals.SSE_HEARTBEAT_SECONDS)
+                if message is None:
+                    yield ": heartbeat\n\n"
+                else:
+                    yield "data: %s\n\n" % message
+        finally:
+            STATUS_CHANGES.remove(listener)
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,116 @@
+import threading
+
+from array import array
+from collections import OrderedDict
+
+
+class RingBuffer(object):
+    """
+    Fixed size buffer of the most recent results of one test, as epoch times and passing flags
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.passing = array('b', bytes(capacity))
+        self.start = 0
+        self.count = 0
+
+    def append(self, timestamp, passing):
+        end = (self.start + self.count) % self.capacity
+        self.times[end] = timestamp
+        self.passing[end] = 1 if passing else 0
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def __len__(self):
+        return self.count
+
+    def items(self):
+        """
+        Returns: (tuple) lists of times and passing flags, oldest first
+        """
+        indexes = [(self.start + i) % self.capacity for i in range(self.count)]
+        return [self.times[i] for i in indexes], [self.passing[i] for i in indexes]
+
+
+class StatusHistory(object):
+    """
+    Recent results of every test, to show tests which flap between passing and failing. Memory use is bounded:
+    each test keeps its last `size` results, and once `max_tests` tests are known the one updated least recently
+    is forgotten to make room for a new one.
+    """
+    def __init__(self, size, max_tests):
+        self.size = size
+        self.max_tests = max_tests
+        self.lock = threading.Lock()
+        # key -> (namespace, name, RingBuffer), least recently updated first
+        self.tests = OrderedDict()
+
+    def record(self, key, event):
+        """
+        Add a status event to the history of its test.
+
+        Args:
+            key: (str) key of the test in the status store
+            event: (StatusEvent) event to record
+
+        Returns: None
+
+        """
+        self.append(key, event.namespace, event.name, event.timestamp, event.passing)
+
+    def append(self, key, namespace, name, timestamp, passing):
+        """
+        Add a result to the history of a test.
+
+        Args:
+            key: (str) key of the test in the status store
+            namespace: (str) namespace of the test
+            name: (str) name of the test
+            timestamp: (float) epoch time of the result
+            passing: (bool) whether the test passed
+
+        Returns: None
+
+        """
+        with self.lock:
+            test = self.tests.get(key)
+            if test is None:
+                if len(self.tests) >= self.max_tests:
+                    self.tests.popitem(last=False)
+                test = (namespace, name, RingBuffer(self.size))
+                self.tests[key] = test
+            else:
+                self.tests.move_to_end(key)
+            test[2].append(timestamp, passing)
+
+    def query(self, since=None, until=None, key=None):
+        """
+        Get the results of tests between two times.
+
+        Args:
+            since: (float) epoch time of the earliest result to return, None for no limit
+            until: (float) epoch time of the latest result to return, None for no limit
+            key: (str) only return this test's results, None for every test
+
+        Returns: (dict) key -> dictionary of the test's namespace, name, result times, passing flags
+            and the number of times it changed between passing and failing
+
+        """
+        with self.lock:
+            keys = [key] if key is not None else list(self.tests)
+            tests = {k: (self.tests[k][0], self.tests[k][1]) + self.tests[k][2].items()
+                     for k in keys if k in self.tests}
+        history = {}
+        for k, (namespace, name, times, passing) in tests.items():
+            # filtered rather than bisected, as events posted late aren't in time order
+            results = [(t, p) for t, p in zip(times, passing)
+                       if (since is None or t >= since) and (until is None or t <= until)]
+            if not results:
+                continue
+            history[k] = {"namespace": namespace, "name": name, "times": [t for t, _ in results],
+                          "passing": [bool(p) for _, p in results],
+                          "changes": sum(1 for a, b in zip(results, results[1:]) if a[1] != b[1])}
+        return history
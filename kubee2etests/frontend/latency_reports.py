@@ -0,0 +1,72 @@
+import threading
+import time
+
+from kubee2etests.sketch import QuantileSketch
+
+
+class LatencyReports(object):
+    """
+    Latest latency sketches reported by each test runner, merged across runners when read. Each runner's report
+    replaces its last one, and reports older than ttl seconds are forgotten, as their runner has gone.
+    """
+    QUANTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # source -> (time received, {(namespace, resource, action): sketch})
+        self.sources = {}
+        self.version = 0
+
+    def put(self, source, sketches):
+        # empty sketches have no quantiles to show
+        sketches = {key: sketch for key, sketch in sketches.items() if sketch.count}
+        with self.lock:
+            self._expire()
+            self.sources[source] = (time.time(), sketches)
+            self.version += 1
+
+    def expire(self):
+        """
+        Forget reports older than ttl, changing the version if there were any so pages showing them are
+        rendered again.
+
+        Returns: None
+
+        """
+        with self.lock:
+            self._expire()
+
+    def _expire(self):
+        # must be called holding self.lock
+        oldest = time.time() - self.ttl
+        expired = [source for source, (received, _) in self.sources.items() if received < oldest]
+        for source in expired:
+            del self.sources[source]
+        if expired:
+            self.version += 1
+
+    def summaries(self):
+        """
+        Returns: (list) of dictionaries of namespace, resource, action, count and latency quantiles in seconds,
+            sorted by namespace, resource and action
+        """
+        with self.lock:
+            self._expire()
+            reports = [sketches for _, sketches in self.sources.values()]
+        merged = {}
+        for sketches in reports:
+            for key, sketch in sketches.items():
+                merged.setdefault(key, QuantileSketch()).merge(sketch)
+        summaries = []
+        for (namespace, resource, action), sketch in sorted(merged.items()):
+            summary = {"namespace": namespace, "resource": resource, "action": action, "count": sketch.count}
+            for name, q in self.QUANTILES:
+                summary[name] = sketch.quantile(q)
+            summaries.append(summary)
+        return summaries
+
+    def clear(self):
+        with self.lock:
+            self.sources = {}
+            self.version += 1
@@ -0,0 +1,149 @@
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+
+from kubee2etests.helpers_and_globals import StatusEvent, STATUS_FLUSH_TIMEOUT
+
+
+LOGGER = logging.getLogger(__name__)
+# most events written in one transaction
+WRITE_BATCH = 500
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY, key TEXT, namespace TEXT, name TEXT,
+                                   passing INTEGER, info TEXT, time REAL);
+CREATE INDEX IF NOT EXISTS events_key ON events (key, id);
+CREATE TABLE IF NOT EXISTS latest (key TEXT PRIMARY KEY, namespace TEXT, name TEXT,
+                                   passing INTEGER, info TEXT, time REAL);
+"""
+
+
+def _row(key, event):
+    return key, event.namespace, event.name, 1 if event.passing else 0, json.dumps(event.info), event.timestamp
+
+
+def _event(row):
+    namespace, name, passing, info, timestamp = row
+    return StatusEvent(name, bool(passing), namespace, json.loads(info), timestamp)
+
+
+class StatusLog(object):
+    """
+    Keeps status events in a SQLite database in WAL mode, so the dashboard can be restored when the
+    frontend restarts. Every event is appended to an events table, which keeps the last max_events for
+    the history, and the latest event of each test is kept in its own table so it can be loaded quickly.
+    Events are written in batches from a background thread, so posts never wait on the disk.
+    """
+    def __init__(self, path, max_events):
+        self.path = path
+        self.max_events = max_events
+        self.pending = queue.Queue()
+        self.thread = None
+        self.thread_lock = threading.Lock()
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def load(self, store, history):
+        """
+        Restore the latest status of each test into a store, and the most recent results of each test into a history.
+
+        Args:
+            store: (StatusStore) store to put the latest status of each test in
+            history: (StatusHistory) history to record recent results in
+
+        Returns: (int) number of tests loaded
+
+        """
+        connection = self._connect()
+        try:
+            latest = connection.execute("SELECT key, namespace, name, passing, info, time FROM latest "
+                                        "ORDER BY time").fetchall()
+            store.put_many([_event(row[1:]) for row in latest])
+            # only the results the history will keep, without the info of each which it doesn't need
+            recent = []
+            for row in latest[-history.max_tests:]:
+                recent.extend(connection.execute("SELECT id, key, namespace, name, time, passing FROM events "
+                                                 "WHERE key = ? ORDER BY id DESC LIMIT ?",
+                                                 (row[0], history.size)))
+            recent.sort()
+            for row in recent:
+                history.append(*row[1:])
+        finally:
+            connection.close()
+        LOGGER.info("Loaded %i tests and %i recent results from %s", len(latest), len(recent), self.path)
+        return len(latest)
+
+    def append(self, key, event):
+        """
+        Queue an event to be written. Never blocks.
+
+        Args:
+            key: (str) key of the test in the status store
+            event: (StatusEvent) event to write
+
+        Returns: None
+
+        """
+        with self.thread_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="status-log", daemon=True)
+                self.thread.start()
+        self.pending.put(_row(key, event))
+
+    def _run(self):
+        connection = None
+        while True:
+            rows = [self.pending.get()]
+            while len(rows) < WRITE_BATCH:
+                try:
+                    rows.append(self.pending.get(block=False))
+                except queue.Empty:
+                    break
+            try:
+                if connection is None:
+                    connection = self._connect()
+                self._write(connection, rows)
+            except Exception:
+                # the thread must keep draining the queue, or flush would never return
+                LOGGER.exception("Failed to write %i status events to %s", len(rows), self.path)
+            finally:
+                for _ in rows:
+                    self.pending.task_done()
+
+    def _write(self, connection, rows):
+        with connection:
+            connection.executemany("INSERT INTO events (key, namespace, name, passing, info, time) "
+                                   "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            connection.executemany("INSERT OR REPLACE INTO latest (key, namespace, name, passing, info, time) "
+                                   "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            connection.execute("DELETE FROM events WHERE id <= (SELECT MAX(id) FROM events) - ?",
+                               (self.max_events,))
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued event has been written.
+
+        Args:
+            timeout: (float) most seconds to wait, None to wait forever
+
+        Returns: (bool) False if events were still waiting when the timeout ran out
+
+        """
+        if self.thread is None:
+            return True
+        with self.pending.all_tasks_done:
+            return self.pending.all_tasks_done.wait_for(lambda: not self.pending.unfinished_tasks, timeout)
+
+
+def open_status_log(path, max_events):
+    log = StatusLog(path, max_events)
+    atexit.register(log.flush, STATUS_FLUSH_TIMEOUT)
+    return log
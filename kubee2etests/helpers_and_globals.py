@@ -3,14 +3,21 @@ import datetime
 import kubernetes
 import logging
 import os
+import socket
 import sys
+import threading
 
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from enum import Enum
 from statsd import StatsClient
 from kubernetes.config import ConfigException
+from urllib3.connection import HTTPConnection
 
 from kubee2etests import __version__
+from kubee2etests.prometheus_metrics import PrometheusClient
+from kubee2etests.sketch import SketchSet
 
 
 LOGGER = logging.getLogger(__name__)
@@ -18,7 +25,26 @@ LOGGER = logging.getLogger(__name__)
 ANTI_AFFINITY_KEY = "failure-domain.beta.kubernetes.io/zone"
 PROMETHEUS_PREFIX = 'e2etest'
 STATSD_PORT = int(os.environ.get("STATSD_PORT", "8125"))
-STATSD_CLIENT = StatsClient(port=STATSD_PORT, prefix=PROMETHEUS_PREFIX)
+# largest statsd datagram sent when metrics are batched in a pipeline, kept under the MTU of overlay networks
+STATSD_MAXUDPSIZE = int(os.environ.get("STATSD_MAXUDPSIZE", "1400"))
+# statsd sends metrics to a statsd server, prometheus writes them to files in PROMETHEUS_MULTIPROC_DIR shared
+# by every test container, served on PROMETHEUS_PORT by the container with PROMETHEUS_EXPOSE set
+METRICS_BACKEND = os.environ.get("METRICS_BACKEND", "statsd").lower()
+PROMETHEUS_EXPOSE = os.environ.get("PROMETHEUS_EXPOSE", "false").lower() in ("true", "1", "yes")
+if METRICS_BACKEND == "prometheus":
+    # must be set before prometheus_client is imported, older versions read the lower case name
+    _multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/e2etest-metrics")
+    os.environ.setdefault("prometheus_multiproc_dir", _multiproc_dir)
+    os.makedirs(_multiproc_dir, exist_ok=True)
+    STATSD_CLIENT = PrometheusClient(prefix=PROMETHEUS_PREFIX)
+else:
+    STATSD_CLIENT = StatsClient(port=STATSD_PORT, prefix=PROMETHEUS_PREFIX, maxudpsize=STATSD_MAXUDPSIZE)
+# every action timed is also recorded in a latency sketch, sent to the frontend every LATENCY_REPORT_SECONDS.
+# Sketches cover the last one to two LATENCY_WINDOW_SECONDS
+LATENCY_REPORT_SECONDS = float(os.environ.get("LATENCY_REPORT_SECONDS", "30"))
+LATENCY_WINDOW_SECONDS = float(os.environ.get("LATENCY_WINDOW_SECONDS", "600"))
+LATENCY_MAX_KEYS = int(os.environ.get("LATENCY_MAX_KEYS", "500"))
+LATENCY_SKETCHES = SketchSet(LATENCY_MAX_KEYS)
 TIME_TO_REPORT_PARAMETER = 'TIME_TO_REPORT_PROBLEM'
 SECONDS_BETWEEN_RUNS = '0.0'
 
@@ -26,12 +52,20 @@ ACTION_METRIC_NAME = "action.%(namespace)s.%(resource)s.%(action)s"
 ERROR_METRIC_NAME = "error.%(namespace)s.%(resource)s.%(area)s.%(error)s"
 HTTP_COUNT_METRIC_NAME = "http.%(namespace)s.%(resource)s.%(result)s"
 DNS_COUNT_METRIC_NAME = "dns.%(result)s"
+WATCH_EVENT_METRIC_NAME = "watch.%(namespace)s.%(resource)s.%(result)s"
+STATUS_UPDATE_METRIC_NAME = "status.%(result)s"
 
 TEST_USER_AGENT = "e2etestapp-bot/" + __version__
 TEST_REQUEST_HEADERS = {'User-Agent': TEST_USER_AGENT}
+# HTTP probes to pods and services: cold opens a new connection per request, warm reuses keep-alive connections
+PROBE_MODE = os.environ.get("PROBE_MODE", "cold").lower()
+PROBE_CONNECT_TIMEOUT = float(os.environ.get("PROBE_CONNECT_TIMEOUT", "5"))
+PROBE_READ_TIMEOUT = float(os.environ.get("PROBE_READ_TIMEOUT", "10"))
 
 # resource names
 TEST_NAMESPACE = "kubee2etests"
+# prefix for per-suite namespaces when several suites run in one process
+TEST_NAMESPACE_PREFIX = "kube-e2etests"
 TEST_SERVICE = "kubee2etests"
 TEST_DEPLOYMENT = "e2etestapp"
 TEST_DNS_QUERY_NAME = "kubernetes.default.svc.cluster.local"
@@ -58,6 +92,8 @@ TEST_INDEX_NAME_CHANGED = 'hello-kubernetes'
 TEST_VOLUME_CLAIM_NAME = 'test-claim'
 
 TEST_REPLICAS = 3
+# number of requests sent to the test service each run of the http suites
+TEST_SERVICE_REQUESTS = int(os.environ.get("TEST_SERVICE_REQUESTS", TEST_REPLICAS * 2))
 CUSTOM_LABELS = ast.literal_eval(os.environ.get("CUSTOM_TEST_DEPLOYMENT_LABELS", '{}'))
 CUSTOM_TEMPLATE_LABELS = ast.literal_eval(os.environ.get("CUSTOM_TEST_DEPLOYMENT_TEMPLATE_LABELS", '{}'))
 TEST_LABELS = {'app': 'hellominikube'}
@@ -68,9 +104,55 @@ TEST_CONTAINER_PORT = 80
 
 # time to wait for events before timing out, used in wait_on_event
 TEST_EVENT_TIMEOUTS = 60
+# backoff between checks when polling for a deletion which couldn't be watched
+DELETE_POLL_INITIAL_SECONDS = 0.1
+DELETE_POLL_MAX_SECONDS = 1.0
+# number of threads used to check or send requests to many objects at once
+MAX_PARALLEL_REQUESTS = int(os.environ.get("MAX_PARALLEL_REQUESTS", "10"))
+# seconds before the node name -> zone index is listed again
+NODE_CACHE_TTL = float(os.environ.get("NODE_CACHE_TTL", "300"))
+# serve waits from one shared list+watch per resource kind and namespace rather than a new watch per wait
+INFORMER_CACHE = os.environ.get("INFORMER_CACHE", "false").lower() in ("true", "1", "yes")
+# scope watches on a single object to that object's name on the server side with a field selector
+SCOPED_WATCHES = os.environ.get("SCOPED_WATCHES", "true").lower() in ("true", "1", "yes")
+# watch latency suite: a config map is annotated with the time it's written WATCH_PROBE_RATE times a second for
+# WATCH_PROBE_SECONDS, and WATCH_PROBE_WATCHERS separate watches measure how long each write takes to reach them
+WATCH_PROBE_CONFIGMAP = "watch-probe"
+WATCH_PROBE_ANNOTATION = "e2etest/written-at"
+WATCH_PROBE_RATE = float(os.environ.get("WATCH_PROBE_RATE", "2"))
+WATCH_PROBE_SECONDS = float(os.environ.get("WATCH_PROBE_SECONDS", "30"))
+WATCH_PROBE_WATCHERS = int(os.environ.get("WATCH_PROBE_WATCHERS", "4"))
+# parse responses of existence checks and pod/namespace listings as plain JSON rather than OpenAPI model objects
+RAW_JSON_READS = os.environ.get("RAW_JSON_READS", "false").lower() in ("true", "1", "yes")
 
-PROMETHEUS_PORT = 8080
+# connection pool of the kubernetes ApiClient shared by every resource. K8S_POOL_MAXSIZE is the number of connections
+# kept open to the API server; with K8S_POOL_BLOCK it is also a hard limit rather than opening extra throwaway ones
+K8S_POOL_MAXSIZE = int(os.environ.get("K8S_POOL_MAXSIZE", "16"))
+K8S_POOL_BLOCK = os.environ.get("K8S_POOL_BLOCK", "false").lower() in ("true", "1", "yes")
+K8S_TCP_KEEPALIVE = os.environ.get("K8S_TCP_KEEPALIVE", "true").lower() in ("true", "1", "yes")
+
+# send status updates to the frontend from a background thread. STATUS_QUEUE_SIZE is the most tests with an update
+# waiting to be sent, updates to other tests are dropped when it is full
+STATUS_ASYNC = os.environ.get("STATUS_ASYNC", "true").lower() in ("true", "1", "yes")
+STATUS_QUEUE_SIZE = int(os.environ.get("STATUS_QUEUE_SIZE", "1000"))
+# seconds to wait for queued status updates to be sent when the process exits
+STATUS_FLUSH_TIMEOUT = 5
+# seconds to wait for the frontend to answer each status or latency post
+STATUS_POST_TIMEOUT = float(os.environ.get("STATUS_POST_TIMEOUT", "5"))
+
+PROMETHEUS_PORT = int(os.environ.get("PROMETHEUS_PORT", "8080"))
 FLASK_PORT = '8081'
+# server sent events streams of status changes to the dashboard. Each stream holds a frontend thread, so
+# SSE_MAX_CLIENTS should be below FLASK_THREADS
+SSE_MAX_CLIENTS = int(os.environ.get("SSE_MAX_CLIENTS", "4"))
+SSE_CLIENT_QUEUE_SIZE = int(os.environ.get("SSE_CLIENT_QUEUE_SIZE", "100"))
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "15"))
+# results kept for each test by the frontend's history, and the most tests kept
+HISTORY_SIZE = int(os.environ.get("HISTORY_SIZE", "256"))
+HISTORY_MAX_TESTS = int(os.environ.get("HISTORY_MAX_TESTS", "1000"))
+# sqlite database the frontend keeps statuses in, to restore them after a restart. Not kept if empty
+STATUS_DB_PATH = os.environ.get("STATUS_DB_PATH", "")
+STATUS_DB_MAX_EVENTS = int(os.environ.get("STATUS_DB_MAX_EVENTS", "100000"))
 STATSD_PORT = '8082'
 STATSD_HOST = ''
 
@@ -82,15 +164,49 @@ class EventType(Enum):
 
 
 class StatusEvent(object):
+    """
+    Result of a test step as shown on the dashboard. The time is kept as epoch seconds to the millisecond,
+    so events within the same second are still ordered, and is sent as a number. Times in the older
+    '%Y-%m-%d %H:%M:%S' string format are still accepted.
+    """
+    __slots__ = ("name", "passing", "namespace", "info", "timestamp")
+    TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
     def __init__(self, name, passing, namespace=TEST_NAMESPACE, info=None, time=None):
         self.name = name
         self.passing = passing
         self.info = info
         self.namespace = namespace
         if not time:
-            self.time = datetime.datetime.now()
+            self.timestamp = round(datetime.datetime.now().timestamp(), 3)
+        elif isinstance(time, str):
+            self.timestamp = datetime.datetime.strptime(time, self.TIME_FORMAT).timestamp()
+        elif isinstance(time, (int, float)) and not isinstance(time, bool):
+            self.timestamp = round(float(time), 3)
         else:
-            self.time = datetime.datetime.strptime(time, '%Y-%m-%d %H:%M:%S')
+            raise TypeError("time must be epoch seconds or a string, not %s" % type(time).__name__)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build an event from its json, as sent by event_data.
+
+        Args:
+            data: (dict) deserialized json of the event
+
+        Returns: (StatusEvent) the event, raises KeyError if a field is missing and TypeError or ValueError if
+            the time is invalid
+
+        """
+        return cls(data['name'], data['passing'], data['namespace'], data['info'], data['time'])
+
+    @property
+    def time(self):
+        return datetime.datetime.fromtimestamp(self.timestamp)
+
+    @time.setter
+    def time(self, value):
+        self.timestamp = round(value.timestamp(), 3)
 
     @property
     def event_data(self):
@@ -98,11 +214,21 @@ class StatusEvent(object):
                 "passing": self.passing,
                 "namespace": self.namespace,
                 "info": self.info,
-                "time": self.time.strftime('%Y-%m-%d %H:%M:%S')}
+                "time": self.timestamp}
         return data
 
 
+# kubernetes configuration is process wide, so it is only loaded once and every resource shares one ApiClient
+_INCLUSTER = None
+_API_CLIENT = None
+_APIS = {}
+_API_CLIENT_LOCK = threading.RLock()
+
+
 def load_kubernetes():
+    global _INCLUSTER
+    if _INCLUSTER is not None:
+        return _INCLUSTER
     incluster = False
     try:
         kubernetes.config.load_kube_config()
@@ -114,4 +240,124 @@ def load_kubernetes():
         except (FileNotFoundError, ConfigException) as err:
             logging.error("Not able to use in-cluster config: %s", err)
             sys.exit(1)
+    _INCLUSTER = incluster
     return incluster
+
+
+def get_api_client():
+    """
+    Get the kubernetes ApiClient shared by every resource in this process, creating it on first use.
+    Sharing it means every suite running in the process uses the same connection pool, configured by
+    K8S_POOL_MAXSIZE, K8S_POOL_BLOCK and K8S_TCP_KEEPALIVE, so connections to the API server are reused
+    rather than paying for a TLS handshake inside timed actions.
+
+    Returns: (kubernetes.client.ApiClient) the shared api client
+
+    """
+    global _API_CLIENT
+    with _API_CLIENT_LOCK:
+        if _API_CLIENT is None:
+            _API_CLIENT = kubernetes.client.ApiClient()
+            # settings used for each per-host connection pool the pool manager creates
+            pool_kw = _API_CLIENT.rest_client.pool_manager.connection_pool_kw
+            pool_kw["maxsize"] = K8S_POOL_MAXSIZE
+            pool_kw["block"] = K8S_POOL_BLOCK
+            if K8S_TCP_KEEPALIVE:
+                pool_kw["socket_options"] = HTTPConnection.default_socket_options + [
+                    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        return _API_CLIENT
+
+
+def get_api(api_class):
+    """
+    Get the instance of a kubernetes API class (e.g. kubernetes.client.CoreV1Api) shared by every resource
+    in this process, all of which use the shared ApiClient.
+
+    Args:
+        api_class: (class) kubernetes API class
+
+    Returns: instance of api_class
+
+    """
+    with _API_CLIENT_LOCK:
+        if api_class not in _APIS:
+            _APIS[api_class] = api_class(get_api_client())
+        return _APIS[api_class]
+
+
+def run_concurrently(func, items, max_workers=None):
+    """
+    Call func with each item, using a bounded pool of threads so the time taken doesn't grow
+    linearly with the number of items.
+
+    Args:
+        func: (function) taking one item
+        items: (iterable) items to call func with
+        max_workers: (int) maximum number of threads, defaults to MAX_PARALLEL_REQUESTS
+
+    Returns: (list) results of func, in the same order as items
+
+    """
+    items = list(items)
+    max_workers = min(max_workers or MAX_PARALLEL_REQUESTS, len(items))
+    if max_workers <= 1:
+        return [func(item) for item in items]
+    pipeline = getattr(_STATS_LOCAL, "pipeline", None)
+
+    def call(item):
+        # metrics from the pool's threads go into the caller's pipeline
+        _STATS_LOCAL.pipeline = pipeline
+        try:
+            return func(item)
+        finally:
+            _STATS_LOCAL.pipeline = None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(call, items))
+
+
+_STATS_LOCAL = threading.local()
+
+
+def stats_client():
+    """
+    Get the statsd client to send metrics with. Inside metrics_pipeline this is the current thread's pipeline,
+    so metrics are batched into as few datagrams as possible, otherwise it is STATSD_CLIENT.
+
+    Returns: (StatsClient or Pipeline) client to send metrics with
+
+    """
+    return getattr(_STATS_LOCAL, "pipeline", None) or STATSD_CLIENT
+
+
+@contextmanager
+def metrics_pipeline():
+    """
+    Context manager batching the metrics sent by the current thread, and threads it starts with run_concurrently,
+    into a statsd pipeline which is sent when the context exits or flush_metrics is called. Nested uses share the
+    outermost pipeline.
+
+    Returns: None
+
+    """
+    if getattr(_STATS_LOCAL, "pipeline", None) is not None:
+        yield
+        return
+    _STATS_LOCAL.pipeline = STATSD_CLIENT.pipeline()
+    try:
+        yield
+    finally:
+        pipeline, _STATS_LOCAL.pipeline = _STATS_LOCAL.pipeline, None
+        pipeline.send()
+
+
+def flush_metrics():
+    """
+    Send the metrics batched in the current thread's pipeline so far, if there is one.
+
+    Returns: None
+
+    """
+    pipeline = getattr(_STATS_LOCAL, "pipeline", None)
+    if pipeline is not None:
+        pipeline.send()
@@ -0,0 +1,57 @@
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from kubee2etests import helpers_and_globals as e2e_globals
+
+
+# keep-alive session shared by the threads sending warm probes, with a connection per thread
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_maxsize=e2e_globals.MAX_PARALLEL_REQUESTS))
+# PROBE_MODE -> kinds of probe sent for each request, True for a warm probe and False for a cold one
+PROBE_MODES = {"cold": [False], "warm": [True], "both": [False, True]}
+
+
+def check_probe_mode(mode):
+    """
+    Args:
+        mode: (str) value of PROBE_MODE
+
+    Returns: None, raises ValueError if mode isn't one of PROBE_MODES
+
+    """
+    if mode not in PROBE_MODES:
+        raise ValueError("Unknown PROBE_MODE %s, expected cold, warm or both" % mode)
+
+
+# checked once when the process starts rather than failing every probe
+check_probe_mode(e2e_globals.PROBE_MODE)
+
+
+def probe_modes():
+    """
+    Which kinds of probe to send for each request, from PROBE_MODE.
+
+    Returns: (list) of booleans, True for a warm (keep-alive) probe and False for a cold one
+
+    """
+    return PROBE_MODES[e2e_globals.PROBE_MODE]
+
+
+def get(url, warm):
+    """
+    Send a GET request with the test user agent and per-probe connect and read timeouts.
+
+    Args:
+        url: (str) address to request
+        warm: (bool) if True reuse a pooled keep-alive connection, otherwise open a new connection
+            and close it after the response, so the request includes connection setup
+
+    Returns: (Response) requests response, raises requests exceptions on failure
+
+    """
+    timeout = (e2e_globals.PROBE_CONNECT_TIMEOUT, e2e_globals.PROBE_READ_TIMEOUT)
+    if warm:
+        return SESSION.get(url, headers=e2e_globals.TEST_REQUEST_HEADERS, timeout=timeout)
+    headers = dict(e2e_globals.TEST_REQUEST_HEADERS, Connection="close")
+    return requests.get(url, headers=headers, timeout=timeout)
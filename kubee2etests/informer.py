@@ -0,0 +1,310 @@
+import collections
+import logging
+import queue
+import threading
+import time
+
+from http import HTTPStatus
+from kubernetes import client, watch
+from kubernetes.client.rest import ApiException
+from urllib3.exceptions import ReadTimeoutError
+
+from kubee2etests import helpers_and_globals as e2e_globals
+
+
+LOGGER = logging.getLogger(__name__)
+
+# kind -> (api class, list method) used to list and watch that kind of resource in a namespace
+INFORMER_KINDS = {
+    "pods": ("CoreV1Api", "list_namespaced_pod"),
+    "services": ("CoreV1Api", "list_namespaced_service"),
+    "endpoints": ("CoreV1Api", "list_namespaced_endpoints"),
+    "configmaps": ("CoreV1Api", "list_namespaced_config_map"),
+    "persistentvolumeclaims": ("CoreV1Api", "list_namespaced_persistent_volume_claim"),
+    "deployments": ("ExtensionsV1beta1Api", "list_namespaced_deployment"),
+    # cluster scoped, informers for these use a namespace of None
+    "nodes": ("CoreV1Api", "list_node"),
+}
+# server side timeout of each watch request, after which the informer re-watches from the last resource version
+WATCH_TIMEOUT_SECONDS = 300
+MAX_BACKOFF_SECONDS = 30
+# recent events kept by each informer, so subscribers can start from a resource version they already hold
+HISTORY_SIZE = 1000
+
+_INFORMERS = {}
+_INFORMERS_LOCK = threading.Lock()
+
+
+def get_informer(kind, namespace):
+    """
+    Get the informer for a kind of resource in a namespace, starting it if this is the first time it has been asked for.
+    Informers are shared by every resource object in the process.
+
+    Args:
+        kind: (str) one of the keys of INFORMER_KINDS
+        namespace: (str) namespace to watch, None for cluster scoped kinds
+
+    Returns: (Informer) the running informer
+
+    """
+    with _INFORMERS_LOCK:
+        informer = _INFORMERS.get((kind, namespace))
+        if informer is None:
+            informer = Informer(kind, namespace)
+            informer.start()
+            _INFORMERS[(kind, namespace)] = informer
+        return informer
+
+
+def selector_predicate(label_selector=None, field_selector=None):
+    """
+    Build a predicate matching objects against kubernetes selectors, so subscribers can filter the
+    informer's events the same way the API server would filter a watch. Only equality based label
+    selectors and metadata.name field selectors are supported.
+
+    Args:
+        label_selector: (str) selector in the form "key=value,key2=value2"
+        field_selector: (str) selector in the form "metadata.name=value"
+
+    Returns: (function) taking a kubernetes object, returning True if it matches
+
+    """
+    labels = {}
+    if label_selector:
+        labels = dict(term.split("=", 1) for term in label_selector.split(","))
+    name = None
+    if field_selector:
+        field, _, name = field_selector.partition("=")
+        if field != "metadata.name":
+            raise ValueError("Unsupported field selector %s" % field_selector)
+
+    def predicate(obj):
+        if name is not None and obj.metadata.name != name:
+            return False
+        obj_labels = obj.metadata.labels or {}
+        return all(obj_labels.get(key) == value for key, value in labels.items())
+
+    return predicate
+
+
+class Informer(object):
+    """
+    Keeps an in-memory copy of every object of one kind in a namespace, using one list followed by a watch
+    from the list's resource version. The watch is resumed from the last resource version seen and the
+    namespace is only listed again when the API server says that version has expired (410 Gone).
+    Waiters subscribe to the informer rather than each starting their own watch.
+    """
+    def __init__(self, kind, namespace):
+        self.kind = kind
+        self.namespace = namespace
+        api_class, method = INFORMER_KINDS[kind]
+        self.list_method = getattr(e2e_globals.get_api(getattr(client, api_class)), method)
+        self.list_args = (namespace,) if namespace is not None else ()
+        self.store = {}
+        self.resource_version = None
+        # (resource version, event type, object) of the events since history_since, oldest first
+        self.history = collections.deque()
+        self.history_since = None
+        self.subscribers = {}
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="informer-%s-%s" % (namespace, kind), daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def subscription(self):
+        return Subscription(self)
+
+    def subscribe(self, subscription, predicate, resource_version=None):
+        """
+        Start delivering events matching predicate to subscription. Without a resource version everything
+        currently in the store is delivered first as ADDED events, like the initial list of a new watch. With
+        one, the events after that version are delivered, like a watch from that version. If the informer no
+        longer has every event since then, ApiException 410 Gone is raised as the API server would, so the
+        caller lists again.
+
+        Args:
+            subscription: (Subscription) subscriber to deliver events to
+            predicate: (function) taking a kubernetes object, returning True if the subscriber wants it
+            resource_version: (str) resource version to deliver events after, default None
+
+        Returns: None
+
+        """
+        with self.lock:
+            if resource_version is None:
+                for obj in self.store.values():
+                    if predicate(obj):
+                        subscription.events.put({"type": "ADDED", "object": obj})
+            else:
+                try:
+                    after = int(resource_version)
+                except ValueError:
+                    after = None
+                if after is None or self.history_since is None or after < self.history_since:
+                    raise ApiException(status=HTTPStatus.GONE,
+                                       reason="Resource version %s is older than the informer's history"
+                                              % resource_version)
+                for version, event_type, obj in self.history:
+                    if version > after and predicate(obj):
+                        subscription.events.put({"type": event_type, "object": obj})
+                # later events are newer than everything replayed
+                subscription.after = max(after, self.history[-1][0]) if self.history else after
+            self.subscribers[subscription] = predicate
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.pop(subscription, None)
+
+    def get(self, name):
+        with self.lock:
+            return self.store.get(name)
+
+    def _notify(self, event_type, obj):
+        # must be called holding self.lock
+        for subscription, predicate in self.subscribers.items():
+            if predicate(obj) and subscription.wants(obj):
+                subscription.events.put({"type": event_type, "object": obj})
+
+    def _record(self, event_type, obj):
+        # must be called holding self.lock
+        try:
+            version = int(obj.metadata.resource_version)
+        except (TypeError, ValueError):
+            # events can't be put in order, so no resource version can be resumed from
+            self.history.clear()
+            self.history_since = None
+            return
+        self.history.append((version, event_type, obj))
+        if len(self.history) > HISTORY_SIZE:
+            self.history_since = self.history.popleft()[0]
+
+    def _relist(self):
+        listing = self.list_method(*self.list_args, _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
+        items = {item.metadata.name: item for item in listing.items}
+        with self.lock:
+            old = self.store
+            self.store = items
+            self.resource_version = listing.metadata.resource_version
+            # what changed before the list isn't known, so the history starts from it
+            self.history.clear()
+            try:
+                self.history_since = int(self.resource_version)
+            except (TypeError, ValueError):
+                self.history_since = None
+            for name, obj in items.items():
+                if name not in old:
+                    self._notify("ADDED", obj)
+                elif old[name].metadata.resource_version != obj.metadata.resource_version:
+                    self._notify("MODIFIED", obj)
+            for name, obj in old.items():
+                if name not in items:
+                    self._notify("DELETED", obj)
+        LOGGER.debug("Listed %i %s in namespace %s", len(items), self.kind, self.namespace)
+
+    def _watch(self):
+        watcher = watch.Watch()
+        for event in watcher.stream(self.list_method, *self.list_args,
+                                    resource_version=self.resource_version,
+                                    timeout_seconds=WATCH_TIMEOUT_SECONDS,
+                                    _request_timeout=WATCH_TIMEOUT_SECONDS + e2e_globals.TEST_EVENT_TIMEOUTS):
+            if event['type'] == 'ERROR':
+                status = event['raw_object']
+                if status.get('code') == HTTPStatus.GONE:
+                    LOGGER.info("Resource version for %s in %s expired, listing again", self.kind, self.namespace)
+                    self.resource_version = None
+                    watcher.stop()
+                    return
+                raise ApiException(status=status.get('code'), reason=status.get('message'))
+
+            obj = event['object']
+            with self.lock:
+                if event['type'] == 'DELETED':
+                    self.store.pop(obj.metadata.name, None)
+                else:
+                    self.store[obj.metadata.name] = obj
+                self.resource_version = obj.metadata.resource_version
+                if self.history_since is not None:
+                    self._record(event['type'], obj)
+                self._notify(event['type'], obj)
+
+    def _run(self):
+        backoff = 1
+        while True:
+            try:
+                if self.resource_version is None:
+                    self._relist()
+                self._watch()
+                backoff = 1
+
+            except ApiException as e:
+                if e.status == HTTPStatus.GONE:
+                    self.resource_version = None
+                    continue
+                LOGGER.error("Informer for %s in namespace %s got API error %s, retrying in %i seconds",
+                             self.kind, self.namespace, e.status, backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+
+            except Exception as e:
+                LOGGER.error("Informer for %s in namespace %s failed: %s, retrying in %i seconds",
+                             self.kind, self.namespace, e, backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+
+
+class Subscription(object):
+    """
+    Stream of events from an informer which can be used in place of a kubernetes watch.Watch, so
+    code iterating over watch events doesn't need to know where they come from.
+    """
+    def __init__(self, informer):
+        self.informer = informer
+        self.events = queue.Queue()
+        self._stop = False
+        # resource version events must be newer than, None to deliver every event
+        self.after = None
+
+    def wants(self, obj):
+        if self.after is None:
+            return True
+        try:
+            return int(obj.metadata.resource_version) > self.after
+        except (TypeError, ValueError):
+            return True
+
+    def stream(self, func=None, *args, label_selector=None, field_selector=None, resource_version=None,
+               _request_timeout=None, **kwargs):
+        """
+        Generator of events for objects matching the selectors. Without a resource version it starts with
+        an ADDED event for each matching object already in the informer's store, otherwise with the events
+        after that version.
+
+        Args:
+            func: ignored, accepted so calls to watch.Watch.stream work unchanged
+            label_selector: (str) only deliver objects with these labels
+            field_selector: (str) only deliver the object with this name
+            resource_version: (str) only deliver events after this version, raises ApiException 410 Gone
+                if the informer no longer has them all
+            _request_timeout: (int) seconds to wait for an event before raising ReadTimeoutError
+
+        Returns: generator of dictionaries with 'type' and 'object' keys
+
+        """
+        self.informer.subscribe(self, selector_predicate(label_selector, field_selector), resource_version)
+        return self._events(_request_timeout)
+
+    def _events(self, _request_timeout):
+        try:
+            while not self._stop:
+                try:
+                    event = self.events.get(timeout=_request_timeout)
+                except queue.Empty:
+                    raise ReadTimeoutError(None, None, "No %s events in namespace %s for %s seconds" %
+                                           (self.informer.kind, self.informer.namespace, _request_timeout))
+                yield event
+        finally:
+            self.informer.unsubscribe(self)
+
+    def stop(self):
+        self._stop = True
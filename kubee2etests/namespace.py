@@ -3,7 +3,6 @@ from kubernetes import client
 from kubernetes.client.rest import ApiException
 from urllib3.exceptions import MaxRetryError
 from kubee2etests import helpers_and_globals as e2e_globals
-from kubee2etests.helpers_and_globals import STATSD_CLIENT, ACTION_METRIC_NAME
 import logging
 from http import HTTPStatus
 
@@ -20,7 +19,7 @@ class Namespace(ApiMixin):
         return client.V1Namespace(metadata=client.V1ObjectMeta(name=self.name))
 
     def create(self, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("create")):
+        with self.timer("create"):
             try:
                 self.api.create_namespace(self.k8s_object)
                 self.on_api = True
@@ -42,20 +41,21 @@ class Namespace(ApiMixin):
         super().create(report)
 
     def empty(self, report=True):
-        extended_api = client.ExtensionsV1beta1Api()
+        extended_api = e2e_globals.get_api(client.ExtensionsV1beta1Api)
         resources = dict()
         resource_name = "deployments"
         try:
-            resources[resource_name] = extended_api.list_namespaced_deployment(self.name,
-                                                                               _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
+            resources[resource_name] = self.read(extended_api.list_namespaced_deployment, self.name,
+                                                 _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
             resource_name = 'services'
-            resources[resource_name] = self.api.list_namespaced_service(self.name,
-                                                                   _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
+            resources[resource_name] = self.read(self.api.list_namespaced_service, self.name,
+                                                 _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
             resource_name = 'pods'
-            resources[resource_name] = self.api.list_namespaced_pod(self.name, _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
+            resources[resource_name] = self.read(self.api.list_namespaced_pod, self.name,
+                                                 _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
             resource_name = 'endpoints'
-            resources[resource_name] = self.api.list_namespaced_endpoints(self.name,
-                                                                     _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
+            resources[resource_name] = self.read(self.api.list_namespaced_endpoints, self.name,
+                                                 _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
 
         except MaxRetryError:
             msg = "Maximum number of retries exceeded when reading %s"
@@ -67,10 +67,11 @@ class Namespace(ApiMixin):
         result_msg = ""
         empty = True
         for key in resources:
-            LOGGER.debug(log_msg, self.name, len(resources[key].items), key)
-            if len(resources[key].items) > 0:
+            count = len(self.field(resources[key], "items") or [])
+            LOGGER.debug(log_msg, self.name, count, key)
+            if count > 0:
                 empty = False
-                result_msg += log_msg % (self.name, len(resources[key].items), key)
+                result_msg += log_msg % (self.name, count, key)
 
         if not empty:
             LOGGER.error("Namespace %s is not empty", self.name)
@@ -86,7 +87,7 @@ class Namespace(ApiMixin):
         return empty
 
     def delete(self, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("delete")):
+        with self.timer("delete"):
             body = client.V1DeleteOptions()
             try:
                 self.api.delete_namespace(self.name, body, _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
@@ -112,7 +113,7 @@ class Namespace(ApiMixin):
 
     def _read_from_k8s(self, should_exist=True):
         try:
-            namespace = self.api.read_namespace(self.name, _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
+            namespace = self.read(self.api.read_namespace, self.name, _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
             LOGGER.info("Namespace %s exists", self.name)
             LOGGER.debug(namespace)
             self.on_api = True
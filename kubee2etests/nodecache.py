@@ -0,0 +1,71 @@
+import logging
+import threading
+import time
+
+from kubernetes import client
+
+from kubee2etests import helpers_and_globals as e2e_globals
+from kubee2etests import informer
+
+
+LOGGER = logging.getLogger(__name__)
+
+_NODE_CACHE = None
+_NODE_CACHE_LOCK = threading.Lock()
+
+
+def node_cache():
+    """
+    Get the node cache shared by every deployment in the process, creating it on first use.
+
+    Returns: (NodeCache) the shared node cache
+
+    """
+    global _NODE_CACHE
+    with _NODE_CACHE_LOCK:
+        if _NODE_CACHE is None:
+            _NODE_CACHE = NodeCache(e2e_globals.NODE_CACHE_TTL)
+        return _NODE_CACHE
+
+
+class NodeCache(object):
+    """
+    Index from node name to the node's zone label (ANTI_AFFINITY_KEY), so checking which data centre pods
+    are in doesn't cost an API call per pod. With INFORMER_CACHE enabled the nodes informer keeps it up to
+    date. Otherwise nodes are listed when the index is older than ttl seconds, or when asked about a node
+    it has never seen.
+    """
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.zones = {}
+        self.listed_at = None
+        self.lock = threading.Lock()
+
+    def _list_nodes(self):
+        nodes = e2e_globals.get_api(client.CoreV1Api).list_node(_request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
+        self.zones = {node.metadata.name: (node.metadata.labels or {}).get(e2e_globals.ANTI_AFFINITY_KEY)
+                      for node in nodes.items}
+        self.listed_at = time.monotonic()
+        LOGGER.debug("Listed %i nodes", len(self.zones))
+
+    def zone(self, node_name):
+        """
+        Get the zone of a node.
+
+        Args:
+            node_name: (str) name of the node
+
+        Returns: (str) the node's zone label, None if it has no zone label. Raises KeyError if
+            the node doesn't exist, ApiException or MaxRetryError if the nodes can't be listed.
+
+        """
+        if e2e_globals.INFORMER_CACHE:
+            node = informer.get_informer("nodes", None).get(node_name)
+            if node is not None:
+                return (node.metadata.labels or {}).get(e2e_globals.ANTI_AFFINITY_KEY)
+
+        with self.lock:
+            expired = self.listed_at is None or time.monotonic() - self.listed_at > self.ttl
+            if expired or node_name not in self.zones:
+                self._list_nodes()
+            return self.zones[node_name]
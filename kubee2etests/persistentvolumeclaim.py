@@ -6,7 +6,6 @@ from kubernetes.client.rest import ApiException
 from urllib3.exceptions import MaxRetryError
 
 from kubee2etests import helpers_and_globals as e2e_globals
-from kubee2etests.helpers_and_globals import STATSD_CLIENT
 from kubee2etests.apimixin import ApiMixin
 
 
@@ -15,6 +14,8 @@ LOGGER = logging.getLogger(__name__)
 
 
 class PersistentVolumeClaim(ApiMixin):
+    informer_kind = "persistentvolumeclaims"
+
     def __init__(self, name=e2e_globals.TEST_VOLUME_CLAIM_NAME,
                  namespace=e2e_globals.TEST_NAMESPACE,
                  storage="1Gi"):
@@ -38,9 +39,9 @@ class PersistentVolumeClaim(ApiMixin):
                                          namespace=self.namespace))
 
     def create(self, report=True):
-        with STATSD_CLIENT.timer(e2e_globals.ACTION_METRIC_NAME % self.action_data("create")):
+        with self.timer("create"):
             try:
-                self.api.create_namespaced_persistent_volume_claim(self.namespace, self.k8s_object)
+                created = self.api.create_namespaced_persistent_volume_claim(self.namespace, self.k8s_object)
 
             except ApiException as e:
                 msg = "Error creating volume claim %s, API exception: %s msg: %s"
@@ -51,13 +52,13 @@ class PersistentVolumeClaim(ApiMixin):
 
             else:
                 self.wait_on_event(self.api.list_namespaced_persistent_volume_claim, e2e_globals.EventType.ADDED,
-                                   args=(self.namespace,))
+                                   args=(self.namespace,), written=created)
                 self.on_api = True
 
         super().create(report)
 
     def delete(self, report=True):
-        with STATSD_CLIENT.timer(e2e_globals.ACTION_METRIC_NAME % self.action_data("delete")):
+        with self.timer("delete"):
             try:
                 self.api.delete_namespaced_persistent_volume_claim(self.name, self.namespace, client.V1DeleteOptions())
 
@@ -69,13 +70,14 @@ class PersistentVolumeClaim(ApiMixin):
                 self.incr_error_metric(error_code.name.lower())
 
             else:
-                self.wait_on_deleted(report)
+                self.wait_on_deleted(report, read_method=self.api.read_namespaced_persistent_volume_claim,
+                                     list_method=self.api.list_namespaced_persistent_volume_claim)
 
         super().delete(report)
 
     def _read_from_k8s(self, should_exist=True):
         try:
-            self.api.read_namespaced_persistent_volume_claim(self.name, self.namespace)
+            self.read(self.api.read_namespaced_persistent_volume_claim, self.name, self.namespace)
             self.on_api = True
 
         except ApiException as e:
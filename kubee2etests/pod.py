@@ -1,23 +1,69 @@
 import logging
-import requests
 
 from http import HTTPStatus
 from urllib3.exceptions import MaxRetryError
 
 from kubee2etests.apimixin import ApiMixin
-from kubee2etests import helpers_and_globals as e2e_globals
-from kubee2etests.helpers_and_globals import STATSD_CLIENT, ACTION_METRIC_NAME
+from kubee2etests.nodecache import node_cache
 from kubernetes.client.rest import ApiException
 
 
 LOGGER = logging.getLogger(__name__)
 
+# pod startup phases timed from the pod's own timestamps: action -> (timestamp the phase starts at, ends at).
+# Timestamps are named after pod conditions, plus "created" for the pod's creation and "started" for
+# when its last container started running.
+STARTUP_PHASES = {"phase_scheduled": ("created", "PodScheduled"),
+                  "phase_initialized": ("PodScheduled", "Initialized"),
+                  "phase_started": ("PodScheduled", "started"),
+                  "phase_containers_ready": ("started", "ContainersReady"),
+                  "phase_ready": ("started", "Ready")}
+
+
+def startup_phases(k8s_pod):
+    """
+    Work out how long each phase of a pod's startup took from the timestamps the API server and kubelet
+    put on the pod, so the scheduler, image pulls and the kubelet can be told apart without the delay of
+    the watch that saw the pod. Timestamps are only to the second. Phases which haven't ended yet are
+    left out, as are the started and ready phases of pods whose containers have restarted, since their
+    start times are of the last restart.
+
+    Args:
+        k8s_pod: kubernetes pod object, e.g. from a watch event
+
+    Returns: (dict) action in STARTUP_PHASES -> seconds taken
+
+    """
+    times = {"created": k8s_pod.metadata.creation_timestamp}
+    status = k8s_pod.status
+    for condition in status.conditions or []:
+        if condition.status == "True":
+            times[condition.type] = condition.last_transition_time
+    containers = status.container_statuses or []
+    started = [container.state.running.started_at for container in containers
+               if container.state and container.state.running and container.state.running.started_at]
+    if any(container.restart_count for container in containers):
+        for condition in ("ContainersReady", "Ready"):
+            times.pop(condition, None)
+    elif started and len(started) == len(containers):
+        times["started"] = max(started)
+
+    phases = {}
+    for action, (start, end) in STARTUP_PHASES.items():
+        if times.get(start) is not None and times.get(end) is not None:
+            phases[action] = max((times[end] - times[start]).total_seconds(), 0.0)
+    return phases
+
 
 class Pod(ApiMixin):
-    def __init__(self, name, namespace):
+    informer_kind = "pods"
+
+    def __init__(self, name, namespace, node_name=None):
         super().__init__(namespace)
         self.name = name
         self._k8s_object = None
+        # set when the pod was built from a listing or event which already said where it's scheduled
+        self._node_name = node_name
 
     @property
     def log(self):
@@ -36,10 +82,12 @@ class Pod(ApiMixin):
 
     @property
     def node(self):
-        if self._k8s_object is None:
-            self._read_from_k8s()
-        if len(self.errors) == 0:
-            return self._k8s_object.spec.node_name
+        if self._node_name is None:
+            if self._k8s_object is None:
+                self._read_from_k8s()
+            if len(self.errors) == 0:
+                self._node_name = self._k8s_object.spec.node_name
+        return self._node_name
 
     @property
     def phase(self):
@@ -85,8 +133,7 @@ class Pod(ApiMixin):
             self.add_error("Pod %s has no node" % self.name)
             return None
         try:
-            node = self.api.read_node(self.node)
-            data_centre = node.metadata.labels.get(e2e_globals.ANTI_AFFINITY_KEY)
+            data_centre = node_cache().zone(self.node)
             if data_centre is None:
                 msg = "Node: %s containing pod: %s has no data centre label."
                 parameters = self.node, self.name
@@ -94,6 +141,13 @@ class Pod(ApiMixin):
                 self.incr_error_metric("no_zone_label_on_node", area="k8s")
                 self.add_error(msg % parameters)
 
+        except KeyError:
+            msg = "Node %s containing pod %s not found"
+            parameters = self.node, self.name
+            LOGGER.error(msg, *parameters)
+            self.incr_error_metric("node_not_found", area="k8s")
+            self.add_error(msg % parameters)
+
         except ApiException as e:
             error_code, error_dict = self.parse_error(e.body)
             msg = "Error reading node %s, code: %s"
@@ -111,25 +165,12 @@ class Pod(ApiMixin):
         return data_centre
 
     def make_http_request(self):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("http_get")):
-            response = None
-            if self._k8s_object is None:
-                self._read_from_k8s()
-            else:
-                url = "http://{}:{}".format(self._k8s_object.status.pod_ip,
-                                        self._k8s_object.spec.containers[0].ports[0].container_port)
-                try:
-                    response = requests.get(url, headers=e2e_globals.TEST_REQUEST_HEADERS)
-                    self.incr_http_count_metric(str(response.status_code))
-
-                except requests.HTTPError as e:
-                    LOGGER.error("Pod %s at address: %s GET request failed: %s", self.name, url, e)
-                    self.incr_http_count_metric(str(response.status_code))
-                    self.add_error("HTTP error code %i" % response.status_code)
-
-                except requests.ConnectionError as e:
-                    LOGGER.error("Pod %s at address: %s GET request failed: %s", self.name, url, e)
-                    self.incr_http_count_metric("connection_error")
-                    self.add_error("Pod %s at address: %s gave connection error" % (self.name, url))
-
-            return response
+        response = None
+        if self._k8s_object is None:
+            self._read_from_k8s()
+        else:
+            url = "http://{}:{}".format(self._k8s_object.status.pod_ip,
+                                    self._k8s_object.spec.containers[0].ports[0].container_port)
+            response = self.http_get(url)
+
+        return response
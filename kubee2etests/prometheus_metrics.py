@@ -0,0 +1,135 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+
+from statsd.client.timer import Timer
+
+
+LOGGER = logging.getLogger(__name__)
+# seconds, from quick API calls and HTTP requests up to slow deployments and deletions
+ACTION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# first part of a statsd metric name -> (prometheus metric name, labels of the rest of the name), the same
+# as the statsd exporter mapping in contrib/monitoring-config.yaml. Action metrics are histograms, the rest counters.
+# Counters are named with their _total suffix, as older prometheus_client versions don't add it
+METRICS = {
+    "action": ("action_seconds", ("test", "resource", "action")),
+    "error": ("errors_total", ("test", "resource", "type", "error")),
+    "http": ("http_requests_total", ("test", "resource", "result")),
+    "dns": ("dns_requests_total", ("result",)),
+    "watch": ("watch_events_total", ("test", "resource", "result")),
+    "status": ("status_updates_total", ("result",)),
+}
+
+
+def process_identifier():
+    """
+    prometheus_client names each process's files in the multiprocess directory after its process ID, but every
+    container has its own PID namespace, so containers sharing the directory would all write to the files of
+    PID 1. The pod's hostname, the container's name and the PID together are unique. CONTAINER_NAME is random
+    if not set, which is still unique but leaves new files behind each time the container restarts.
+
+    Returns: (str) identifier of this process, safe to use in a file name
+    """
+    return "%s-%s-%i" % (socket.gethostname(), _CONTAINER_NAME, os.getpid())
+
+
+_CONTAINER_NAME = os.environ.get("CONTAINER_NAME") or uuid.uuid4().hex[:12]
+
+
+def _use_process_identifier():
+    # the value class has to be replaced before any metric is created
+    try:
+        from prometheus_client import values
+        values.ValueClass = values.MultiProcessValue(process_identifier=process_identifier)
+    except ImportError:
+        from prometheus_client import core
+        core._ValueClass = core._MultiProcessValue(_pidFunc=process_identifier)
+
+
+class PrometheusClient(object):
+    """
+    Stands in for the statsd client, recording the same metrics as prometheus histograms and counters instead.
+    Used with prometheus_client's multiprocess mode, each process writes its metrics to memory mapped files
+    in PROMETHEUS_MULTIPROC_DIR, and serve_metrics adds up the files of every process sharing that directory.
+    prometheus_client must not be imported before PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _metric(self, stat):
+        kind, _, rest = stat.partition(".")
+        if kind not in METRICS:
+            LOGGER.debug("No prometheus metric for %s", stat)
+            return None
+        name, labels = METRICS[kind]
+        # the last label, e.g. an error, may itself contain dots
+        values = rest.split(".", len(labels) - 1)
+        if len(values) != len(labels):
+            LOGGER.debug("Wrong number of labels in %s", stat)
+            return None
+        with self.lock:
+            metric = self.metrics.get(kind)
+            if metric is None:
+                from prometheus_client import Counter, Histogram
+                if not self.metrics:
+                    _use_process_identifier()
+                full_name = "%s_%s" % (self.prefix, name)
+                if kind == "action":
+                    metric = Histogram(full_name, "Seconds taken by each action", labels, buckets=ACTION_BUCKETS)
+                else:
+                    metric = Counter(full_name, "Count of %s metrics" % kind, labels)
+                self.metrics[kind] = metric
+        return metric.labels(*values)
+
+    def incr(self, stat, count=1, rate=1):
+        metric = self._metric(stat)
+        if metric is not None:
+            metric.inc(count)
+
+    def decr(self, stat, count=1, rate=1):
+        self.incr(stat, -count, rate)
+
+    def timing(self, stat, delta, rate=1):
+        """
+        Args:
+            stat: statsd metric name
+            delta: (float or timedelta) milliseconds taken
+
+        """
+        if hasattr(delta, "total_seconds"):
+            delta = delta.total_seconds() * 1000
+        metric = self._metric(stat)
+        if metric is not None:
+            metric.observe(delta / 1000.0)
+
+    def timer(self, stat, rate=1):
+        return Timer(self, stat, rate)
+
+    def pipeline(self):
+        # metrics are written to local files as they are recorded, so there is nothing to batch
+        return self
+
+    def send(self):
+        pass
+
+
+def serve_metrics(port):
+    """
+    Serve the metrics of every process writing to PROMETHEUS_MULTIPROC_DIR in the prometheus text format,
+    from a background thread.
+
+    Args:
+        port: (int) port to serve /metrics on
+
+    Returns: None
+
+    """
+    from prometheus_client import CollectorRegistry, start_http_server, multiprocess
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(port, registry=registry)
+    LOGGER.info("Serving prometheus metrics on port %i", port)
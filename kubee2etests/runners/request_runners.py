@@ -4,8 +4,8 @@ from kubee2etests.runners.service_runners import ServiceWithDeploymentRunner
 from kubee2etests.statussender import StatusSender
 from kubee2etests import ConfigMap
 from kubee2etests import helpers_and_globals as e2e_globals
-from kubee2etests.helpers_and_globals import STATSD_CLIENT, TEST_DEPLOYMENT_INDEX, TEST_DEPLOYMENT_INDEX_CHANGED, \
-    TEST_REPLICAS, TEST_INDEX_NAME_CHANGED, TEST_DNS_QUERY_NAME, DNS_COUNT_METRIC_NAME
+from kubee2etests.helpers_and_globals import TEST_DEPLOYMENT_INDEX, TEST_DEPLOYMENT_INDEX_CHANGED, \
+    TEST_SERVICE_REQUESTS, TEST_INDEX_NAME_CHANGED, TEST_DNS_QUERY_NAME, DNS_COUNT_METRIC_NAME
 
 LOGGER = logging.getLogger(__name__)
 
@@ -13,7 +13,7 @@ class HttpRequestRunner(ServiceWithDeploymentRunner):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.exp_text = TEST_DEPLOYMENT_INDEX
-        self.service_requests = kwargs.get("service_requests", TEST_REPLICAS * 2)
+        self.service_requests = kwargs.get("service_requests", TEST_SERVICE_REQUESTS)
 
     def run(self):
         self.service.request_n_times(self.service_requests, self.exp_text)
@@ -27,7 +27,7 @@ class PostUpdateHttpRequestRunner(ServiceWithDeploymentRunner):
         kwargs["index"] = kwargs.get("exp_text", TEST_DEPLOYMENT_INDEX_CHANGED)
         kwargs["name"] = kwargs.get("new_cfgmap_name", TEST_INDEX_NAME_CHANGED)
         self.new_cfgmap = ConfigMap(**kwargs)
-        self.service_requests = kwargs.get("service_requests", TEST_REPLICAS * 2)
+        self.service_requests = kwargs.get("service_requests", TEST_SERVICE_REQUESTS)
 
     def start(self):
         super().start()
@@ -45,7 +45,7 @@ class PostUpdateHttpRequestRunner(ServiceWithDeploymentRunner):
 
 class DNSRequestRunner(StatusSender):
     def __init__(self,namespace,service,deployment):
-        super().__init__()
+        super().__init__(namespace)
         self.qname = TEST_DNS_QUERY_NAME
 
     def incr_dns_count_metric(self,result):
@@ -56,7 +56,7 @@ class DNSRequestRunner(StatusSender):
         Returns: None, increments the statsd dns count metric
         """
         result_data = {"result": result}
-        STATSD_CLIENT.incr(DNS_COUNT_METRIC_NAME % result_data)
+        e2e_globals.stats_client().incr(DNS_COUNT_METRIC_NAME % result_data)
 
     def run(self,report=True):
         try:
@@ -73,6 +73,10 @@ class DNSRequestRunner(StatusSender):
         if report:
             self.send_update(msg)
 
+    def finish(self):
+        pass
+
     def exec(self):
-        self.run(report=True)
+        with e2e_globals.metrics_pipeline():
+            self.run(report=True)
         
\ No newline at end of file
@@ -7,7 +7,7 @@ from kubee2etests import helpers_and_globals as e2e_globals
 
 class RunnerBase(StatusSender):
     def __init__(self, namespace, **kwargs):
-        super().__init__()
+        super().__init__(namespace)
         load_kubernetes()
         self.namespace = Namespace(namespace)
 
@@ -24,9 +24,10 @@ class RunnerBase(StatusSender):
         pass
 
     def exec(self):
-        self.start()
-        self.run()
-        self.finish()
+        # metrics are batched for each step and sent at the end of it, or when a test step reports its status
+        for step in (self.start, self.run, self.finish):
+            with e2e_globals.metrics_pipeline():
+                step()
 
 
 class RunnerBaseWithDeployment(RunnerBase):
@@ -42,7 +43,7 @@ class RunnerBaseWithDeployment(RunnerBase):
         self.deployment = Deployment(deployment, namespace, replicas, cfgmap, labels, template_labels)
         self.cfgmap = ConfigMap(name=cfgmap,
                                 index=TEST_DEPLOYMENT_INDEX,
-                                namespace=self.namespace)
+                                namespace=namespace)
 
     def start(self):
         super().start()
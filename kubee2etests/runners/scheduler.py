@@ -0,0 +1,76 @@
+import logging
+import threading
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SuiteScheduler(object):
+    """
+    Runs several test suites concurrently in a single process. Each suite gets its own thread which
+    calls the runner's exec method, then waits for that suite's interval before running it again.
+    All the suites share the process's kubernetes ApiClient and status sender session.
+    """
+    def __init__(self):
+        self.suites = {}
+        self.threads = []
+        self.stopping = threading.Event()
+
+    def add(self, name, runner, interval):
+        """
+        Register a suite with the scheduler. Must be called before start.
+
+        Args:
+            name: (str) name of the suite, used for logging and the thread name
+            runner: runner object with exec and finish methods
+            interval: (float) seconds to wait between runs of this suite
+
+        Returns: None
+
+        """
+        self.suites[name] = (runner, interval)
+
+    def _loop(self, name, runner, interval):
+        while not self.stopping.is_set():
+            try:
+                runner.exec()
+            except Exception:
+                LOGGER.exception("Suite %s failed, running it again in %s seconds", name, interval)
+            self.stopping.wait(interval)
+
+    def start(self):
+        for name, (runner, interval) in self.suites.items():
+            thread = threading.Thread(target=self._loop, args=(name, runner, interval), name=name, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+            LOGGER.info("Started suite %s, running every %s seconds", name, interval)
+
+    def wait(self):
+        """
+        Block until every suite thread has stopped. Joins with a timeout so a KeyboardInterrupt
+        is still delivered to the main thread.
+
+        Returns: None
+
+        """
+        while any(thread.is_alive() for thread in self.threads):
+            for thread in self.threads:
+                thread.join(1)
+
+    def stop(self):
+        """
+        Stop scheduling new runs, wait for the runs in progress to end and clean up after each suite.
+        A suite failing to clean up doesn't stop the others being cleaned up.
+
+        Returns: None
+
+        """
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join()
+        for name, (runner, interval) in self.suites.items():
+            LOGGER.info("Cleaning up suite %s", name)
+            try:
+                runner.finish()
+            except Exception:
+                LOGGER.exception("Cleaning up suite %s failed", name)
@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+
+from kubee2etests.runners.runnerbase import RunnerBase
+from kubee2etests import ConfigMap
+from kubee2etests.sketch import QuantileSketch
+from kubee2etests import helpers_and_globals as e2e_globals
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class WatchLatencyRunner(RunnerBase):
+    """
+    Measures how long the API server takes to deliver writes to watches. A config map is annotated with a
+    sequence number and the time of each write, and several separate watches of it record how long each write
+    took to arrive as a MODIFIED event. The same process writes and watches using its monotonic clock, so clock
+    skew with the API server doesn't matter. Delays are recorded as the ConfigMap's watch_delivery action.
+    """
+    def __init__(self, namespace=e2e_globals.TEST_NAMESPACE, rate=e2e_globals.WATCH_PROBE_RATE,
+                 seconds=e2e_globals.WATCH_PROBE_SECONDS, watchers=e2e_globals.WATCH_PROBE_WATCHERS, **kwargs):
+        for name, value in (("WATCH_PROBE_RATE", rate), ("WATCH_PROBE_SECONDS", seconds),
+                            ("WATCH_PROBE_WATCHERS", watchers)):
+            if value <= 0:
+                raise ValueError("%s must be positive, got %s" % (name, value))
+        super().__init__(namespace=namespace)
+        self.cfgmap = ConfigMap(name=e2e_globals.WATCH_PROBE_CONFIGMAP, index="", namespace=namespace)
+        self.rate = rate
+        self.writes = max(int(rate * seconds), 1)
+        self.watchers = watchers
+
+    def start(self):
+        super().start()
+        self.cfgmap.create_if_not_exists()
+
+    def _write(self, sequence):
+        annotation = "%i %r" % (sequence, time.monotonic())
+        return self.cfgmap.annotate({e2e_globals.WATCH_PROBE_ANNOTATION: annotation})
+
+    def _watch(self, watcher, resource_version, ready, delivered, sketch, finished):
+        """
+        Stream events of the config map from resource_version, recording the delay of every write after the
+        first. The first write is only waited for, so the delays don't include starting the watch. Nothing is
+        recorded once the run has stopped waiting for the watches.
+
+        Args:
+            watcher: (watch.Watch) watch to stream events from
+            resource_version: (str) resource version of the config map before the first write
+            ready: (threading.Event) set when the first write arrives
+            delivered: (set) sequence numbers of the writes which arrived, updated holding self.progress
+            sketch: (QuantileSketch) delays of this watch, updated
+            finished: (threading.Event) set when the watch ends
+
+        Returns: None
+
+        """
+        try:
+            for event in watcher.stream(self.cfgmap.api.list_namespaced_config_map, self.cfgmap.namespace,
+                                        field_selector="metadata.name=%s" % self.cfgmap.name,
+                                        resource_version=resource_version,
+                                        _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS):
+                arrived = time.monotonic()
+                if event['type'] == 'ERROR':
+                    raise ApiException(status=event['raw_object'].get('code'),
+                                       reason=event['raw_object'].get('message'))
+                annotations = event['object'].metadata.annotations or {}
+                if event['type'] != 'MODIFIED' or e2e_globals.WATCH_PROBE_ANNOTATION not in annotations:
+                    continue
+                sequence, written = annotations[e2e_globals.WATCH_PROBE_ANNOTATION].split()
+                sequence = int(sequence)
+                if sequence == 0:
+                    ready.set()
+                    continue
+                with self.progress:
+                    if self.closed:
+                        break
+                    if sequence not in delivered:
+                        delivered.add(sequence)
+                        sketch.record(arrived - float(written))
+                        self.cfgmap.record_time("watch_delivery", arrived - float(written))
+                        self.progress.notify_all()
+                if sequence >= self.writes:
+                    watcher.stop()
+
+        except ReadTimeoutError:
+            LOGGER.error("Watch of config map %s timed out", self.cfgmap.name)
+            self.cfgmap.incr_error_metric("watch_delivery", area="timeout")
+
+        except (ApiException, MaxRetryError) as e:
+            LOGGER.error("Watch of config map %s failed: %s", self.cfgmap.name, e)
+            self.cfgmap.add_error("Watch failed: %s" % e)
+            self.cfgmap.incr_error_metric("watch_failed")
+
+        finally:
+            finished.set()
+            with self.progress:
+                self.progress.notify_all()
+
+    def run(self):
+        self.cfgmap.flush_errors()
+        try:
+            resource_version = self.cfgmap.api.read_namespaced_config_map(
+                self.cfgmap.name, self.cfgmap.namespace).metadata.resource_version
+        except (ApiException, MaxRetryError) as e:
+            LOGGER.error("Reading config map %s failed: %s", self.cfgmap.name, e)
+            self.cfgmap.add_error("Reading config map failed: %s" % e)
+            self.cfgmap.send_update("Watch delivery latency")
+            return
+
+        # notified whenever a watch receives a write or ends
+        self.progress = threading.Condition()
+        self.closed = False
+        watches = []
+        for index in range(self.watchers):
+            watch_state = (watch.Watch(), resource_version, threading.Event(), set(), QuantileSketch(),
+                           threading.Event())
+            thread = threading.Thread(target=self._watch, args=watch_state, daemon=True,
+                                      name="watch-latency-%i" % index)
+            thread.start()
+            watches.append((thread,) + watch_state)
+
+        written = set()
+        if self._write(0) is not None:
+            # one deadline for every watch, so watches which never start don't each hold the run up
+            deadline = time.monotonic() + e2e_globals.TEST_EVENT_TIMEOUTS
+            for thread, watcher, _, ready, delivered, sketch, finished in watches:
+                if not ready.wait(max(deadline - time.monotonic(), 0)):
+                    self.cfgmap.add_error("Watch did not start")
+            begin = time.monotonic()
+            for sequence in range(1, self.writes + 1):
+                time.sleep(max(begin + (sequence - 1) / self.rate - time.monotonic(), 0))
+                if self._write(sequence) is not None:
+                    written.add(sequence)
+
+        # wait until every watch has received every successful write, or has ended, with one deadline for all
+        # of them. Watches are stopped rather than waiting for a failed write to arrive or their reads to time out
+        with self.progress:
+            self.progress.wait_for(lambda: all(finished.is_set() or written <= delivered
+                                               for _, _, _, _, delivered, _, finished in watches),
+                                   e2e_globals.TEST_EVENT_TIMEOUTS)
+            self.closed = True
+        total = QuantileSketch()
+        for thread, watcher, _, ready, delivered, sketch, finished in watches:
+            watcher.stop()
+            missed = len(written - delivered)
+            if missed:
+                self.cfgmap.add_error("%i of %i writes not delivered to a watch" % (missed, len(written)))
+                self.cfgmap.incr_error_metric("watch_event_missed", area="k8s")
+            total.merge(sketch)
+        if total.count:
+            LOGGER.info("Watch delivery of %i writes to %i watches: p50 %.1fms, p99 %.1fms, max %.1fms",
+                        len(written), self.watchers, total.quantile(0.5) * 1000, total.quantile(0.99) * 1000,
+                        total.max * 1000)
+        self.cfgmap.send_update("Watch delivery latency")
@@ -1,17 +1,74 @@
 import os
+import logging
 
 from flask import Flask
+from kubee2etests.frontend import flask_app
 from kubee2etests.frontend.flask_app import healthcheck
-from kubee2etests.helpers_and_globals import FLASK_PORT
+from kubee2etests import helpers_and_globals as e2e_globals
+from kubee2etests.frontend.persistence import open_status_log
+from kubee2etests.prometheus_metrics import serve_metrics
+from kubee2etests.helpers_and_globals import FLASK_PORT, STATUS_DB_PATH, STATUS_DB_MAX_EVENTS
 
+try:
+    import waitress
+except ImportError:
+    waitress = None
 
-def main():
-    port = int(os.environ.get('FLASK_PORT', FLASK_PORT))
-    addr = os.environ.get('FLASK_ADDR', '')
+
+LOGGER = logging.getLogger(__name__)
+# FLASK_SERVER can be waitress (a pool of FLASK_THREADS threads), threaded (the werkzeug server with a thread per
+# request) or dev (the single threaded werkzeug development server). All of them share one status store in the process.
+DEFAULT_SERVER = "waitress" if waitress is not None else "threaded"
+DEFAULT_THREADS = "8"
+
+
+def create_app():
     flask_root = os.path.join(os.getcwd(), "kubee2etests", "frontend")
     app = Flask(__name__, root_path=flask_root)
     app.register_blueprint(healthcheck)
-    app.run(port=port, host=addr)
+    if STATUS_DB_PATH:
+        flask_app.restore(open_status_log(STATUS_DB_PATH, STATUS_DB_MAX_EVENTS))
+    return app
+
+
+def serve(app, server, host, port, threads):
+    """
+    Serve the frontend until the process is stopped.
+
+    Args:
+        app: (Flask) application to serve
+        server: (str) one of waitress, threaded or dev
+        host: (str) address to listen on, empty for every address
+        port: (int) port to listen on
+        threads: (int) size of the waitress thread pool
+
+    Returns: None
+
+    """
+    if server == "waitress":
+        if waitress is None:
+            raise RuntimeError("FLASK_SERVER is waitress but waitress is not installed")
+        LOGGER.info("Serving on port %i with waitress, %i threads", port, threads)
+        waitress.serve(app, host=host or "0.0.0.0", port=port, threads=threads)
+    elif server == "threaded":
+        app.run(port=port, host=host, threaded=True)
+    elif server == "dev":
+        # an open event stream would hold the only thread, blocking every other request
+        app.config["STREAM_EVENTS"] = False
+        app.run(port=port, host=host, threaded=False)
+    else:
+        raise ValueError("Unknown FLASK_SERVER %s, expected waitress, threaded or dev" % server)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    port = int(os.environ.get('FLASK_PORT', FLASK_PORT))
+    addr = os.environ.get('FLASK_ADDR', '')
+    server = os.environ.get('FLASK_SERVER', DEFAULT_SERVER).lower()
+    threads = int(os.environ.get('FLASK_THREADS', DEFAULT_THREADS))
+    if e2e_globals.METRICS_BACKEND == "prometheus" and e2e_globals.PROMETHEUS_EXPOSE:
+        serve_metrics(e2e_globals.PROMETHEUS_PORT)
+    serve(create_app(), server, addr, port, threads)
 
 
 if __name__ == '__main__':
@@ -1,15 +1,32 @@
 import os
 import logging
+import socket
 import time
 
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 
-from kubee2etests.runners import deployment_runners, namespace_runner, request_runners, service_runners
+from kubee2etests.runners import deployment_runners, namespace_runner, request_runners, service_runners, watch_runners
+from kubee2etests.runners.scheduler import SuiteScheduler
 from kubee2etests import helpers_and_globals as e2e_globals
+from kubee2etests.prometheus_metrics import serve_metrics
+from kubee2etests.statussender import LatencyReporter
 
 
 LOGGER = logging.getLogger(__name__)
 
+SUITES = {"deployment": deployment_runners.DeploymentRunner,
+          "deployment_pvc": deployment_runners.DeploymentVolumeClaimRunner,
+          "namespace": namespace_runner.NamespaceRunner,
+          "deployment_update": deployment_runners.DeploymentWithUpdateRunner,
+          "deployment_scale": deployment_runners.DeploymentWithScalingRunner,
+          "service": service_runners.ServiceRunner,
+          "deployment_service": service_runners.ServiceWithDeploymentRunner,
+          "deployment_scale_service": service_runners.ServiceWithScaledDeploymentRunner,
+          "dns": request_runners.DNSRequestRunner,
+          "http": request_runners.HttpRequestRunner,
+          "http_update": request_runners.PostUpdateHttpRequestRunner,
+          "watch_latency": watch_runners.WatchLatencyRunner}
+
 
 def _determine_log_level():
     level_name = os.environ.get("LOG_LEVEL", "INFO")
@@ -20,36 +37,93 @@ def _determine_log_level():
         return logging.INFO
 
 
+def _parse_interval(value):
+    """
+    Parse a suite interval given on the command line as <suite>=<seconds>
+
+    Args:
+        value: (str) command line value
+
+    Returns: (tuple) suite name and interval in seconds
+
+    """
+    suite, _, seconds = value.partition("=")
+    if suite not in SUITES:
+        raise ArgumentTypeError("unknown suite %s" % suite)
+    try:
+        return suite, float(seconds)
+    except ValueError:
+        raise ArgumentTypeError("interval for suite %s is not a number: %s" % (suite, seconds))
+
+
+def _suite_namespace(suite):
+    """
+    When several suites run in one process each needs its own namespace. This is read from
+    TEST_NAMESPACE_<SUITE> if set, otherwise built from TEST_NAMESPACE_PREFIX and the suite name,
+    matching the namespaces in manifests/e2etests.yaml.
+
+    Args:
+        suite: (str) name of the suite
+
+    Returns: (str) namespace to run the suite in
+
+    """
+    prefix = os.environ.get("TEST_NAMESPACE_PREFIX", e2e_globals.TEST_NAMESPACE_PREFIX)
+    default = "%s-%s" % (prefix, suite.replace("_", "-"))
+    return os.environ.get("TEST_NAMESPACE_%s" % suite.upper(), default)
+
+
+def run_single(suite, namespace, deployment, service, seconds_to_wait):
+    test_class = SUITES[suite](namespace=namespace, deployment=deployment, service=service)
+    while True:
+        try:
+            test_class.exec()
+        except KeyboardInterrupt:
+            LOGGER.error("Got keyboard interrupt, cleaning up and exiting")
+            test_class.finish()
+            raise RuntimeError
+        time.sleep(seconds_to_wait)
+
+
+def run_scheduled(suites, intervals, deployment, service, seconds_to_wait):
+    scheduler = SuiteScheduler()
+    for suite in suites:
+        test_class = SUITES[suite](namespace=_suite_namespace(suite), deployment=deployment, service=service)
+        scheduler.add(suite, test_class, intervals.get(suite, seconds_to_wait))
+    scheduler.start()
+    try:
+        scheduler.wait()
+    except KeyboardInterrupt:
+        LOGGER.error("Got keyboard interrupt, cleaning up and exiting")
+        scheduler.stop()
+        raise RuntimeError
+
+
 def main():
     logging.basicConfig(level=_determine_log_level())
-    suites = {"deployment": deployment_runners.DeploymentRunner,
-              "deployment_pvc": deployment_runners.DeploymentVolumeClaimRunner,
-              "namespace": namespace_runner.NamespaceRunner,
-              "deployment_update": deployment_runners.DeploymentWithUpdateRunner,
-              "deployment_scale": deployment_runners.DeploymentWithScalingRunner,
-              "service": service_runners.ServiceRunner,
-              "deployment_service": service_runners.ServiceWithDeploymentRunner,
-              "deployment_scale_service": service_runners.ServiceWithScaledDeploymentRunner,
-              "dns": request_runners.DNSRequestRunner,
-              "http": request_runners.HttpRequestRunner,
-              "http_update": request_runners.PostUpdateHttpRequestRunner}
     namespace = os.environ.get("TEST_NAMESPACE", e2e_globals.TEST_NAMESPACE)
     deployment = os.environ.get("TEST_DEPLOYMENT", e2e_globals.TEST_DEPLOYMENT)
     service = os.environ.get("TEST_SERVICE", e2e_globals.TEST_SERVICE)
     seconds_to_wait = float(os.environ.get("SECONDS_BETWEEN_RUNS", e2e_globals.SECONDS_BETWEEN_RUNS))
     parser = ArgumentParser("Kubernetes end to end test runner.")
-    parser.add_argument("suite", type=str, help="The suite to run", choices=set(list(suites.keys())))
+    parser.add_argument("suite", type=str, nargs="+", help="The suite(s) to run. More than one suite runs them "
+                        "all concurrently in this process", choices=set(list(SUITES.keys())))
+    parser.add_argument("--interval", type=_parse_interval, action="append", default=[],
+                        help="Seconds between runs of one suite, as <suite>=<seconds>. "
+                             "Defaults to SECONDS_BETWEEN_RUNS")
     args = parser.parse_args()
+    if e2e_globals.METRICS_BACKEND == "prometheus" and e2e_globals.PROMETHEUS_EXPOSE:
+        serve_metrics(e2e_globals.PROMETHEUS_PORT)
     e2e_globals.load_kubernetes()
-    test_class = suites[args.suite](namespace=namespace, deployment=deployment, service=service)
-    while True:
-        try:
-            test_class.exec()
-        except KeyboardInterrupt:
-            LOGGER.error("Got keyboard interrupt, cleaning up and exiting")
-            test_class.finish()
-            raise RuntimeError
-        time.sleep(seconds_to_wait)
+    LatencyReporter("%s/%s" % (socket.gethostname(), "+".join(sorted(set(args.suite)))),
+                    e2e_globals.LATENCY_SKETCHES, e2e_globals.LATENCY_REPORT_SECONDS,
+                    e2e_globals.LATENCY_WINDOW_SECONDS).start()
+    intervals = dict(args.interval)
+    if len(args.suite) == 1:
+        suite = args.suite[0]
+        run_single(suite, namespace, deployment, service, intervals.get(suite, seconds_to_wait))
+    else:
+        run_scheduled(sorted(set(args.suite)), intervals, deployment, service, seconds_to_wait)
 
 if __name__ == '__main__':
     main()
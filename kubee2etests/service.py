@@ -1,20 +1,21 @@
 import logging
-import requests
 
 from http import HTTPStatus
-from kubernetes import client, watch
+from kubernetes import client
 from kubernetes.client.rest import ApiException
 from urllib3.exceptions import MaxRetryError, ReadTimeoutError
 
 from kubee2etests.apimixin import ApiMixin
+from kubee2etests import informer
 from kubee2etests import helpers_and_globals as e2e_globals
-from kubee2etests.helpers_and_globals import STATSD_CLIENT, ACTION_METRIC_NAME
 
 
 LOGGER = logging.getLogger(__name__)
 
 
 class Service(ApiMixin):
+    informer_kind = "services"
+
     def __init__(self, service, subsets, addresses, namespace, **kwargs):
         super().__init__(namespace)
         self.name = service
@@ -34,7 +35,8 @@ class Service(ApiMixin):
 
     def _read_from_k8s(self, should_exist=True):
         try:
-            self.api.read_namespaced_service(self.name, self.namespace, _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
+            self.read(self.api.read_namespaced_service, self.name, self.namespace,
+                      _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
             LOGGER.info("Service %s exists in namespace %s", self.name, self.namespace)
             self.on_api = True
 
@@ -64,12 +66,13 @@ class Service(ApiMixin):
                 self.incr_error_metric("not_deleted", area="k8s")
 
     def create(self, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("create")):
+        with self.timer("create"):
             try:
                 returned_service = self.api.create_namespaced_service(self.namespace, self.k8s_object)
                 LOGGER.debug(returned_service)
                 LOGGER.info("Service being created")
-                self.wait_on_event(self.api.list_namespaced_service, e2e_globals.EventType.ADDED, args=(self.namespace,))
+                self.wait_on_event(self.api.list_namespaced_service, e2e_globals.EventType.ADDED, args=(self.namespace,),
+                                   written=returned_service)
 
             except ApiException as e:
                 error_code, error_dict = self.parse_error(e.body)
@@ -90,7 +93,7 @@ class Service(ApiMixin):
         super().create(report)
 
     def delete(self, report=True):
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("delete")):
+        with self.timer("delete"):
             try:
                 LOGGER.info("Deleting Service %s from Namespace %s", self.name, self.namespace)
                 self.api.delete_namespaced_service(self.name, self.namespace, _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
@@ -111,7 +114,8 @@ class Service(ApiMixin):
                 self.add_error("max retries exceeded")
 
             else:
-                self.wait_on_deleted()
+                self.wait_on_deleted(read_method=self.api.read_namespaced_service,
+                                     list_method=self.api.list_namespaced_service)
 
         super().delete(report)
 
@@ -131,16 +135,22 @@ class Service(ApiMixin):
         Returns: None
 
         """
-        watcher = watch.Watch()
+        watcher = self.watcher("endpoints")
         subsets = 0
         addresses = 0
+        received = 0
+        matched = 0
+        kwargs = {"_request_timeout": e2e_globals.TEST_EVENT_TIMEOUTS}
+        if e2e_globals.SCOPED_WATCHES:
+            kwargs["field_selector"] = "metadata.name=%s" % self.name
         try:
-            for event in watcher.stream(self.api.list_namespaced_endpoints, self.namespace,
-                                        _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS):
+            for event in watcher.stream(self.api.list_namespaced_endpoints, self.namespace, **kwargs):
                 body = event['object']
                 name = body.metadata.name
                 LOGGER.debug("Event: %s %s", event['type'], name)
+                received += 1
                 if name == self.name:
+                    matched += 1
                     subsets = len(body.subsets)
                     if subsets > 0:
                         for subset in body.subsets:
@@ -157,6 +167,7 @@ class Service(ApiMixin):
             self.incr_error_metric("waiting_on_endpoints", area="timeout")
             self.add_error("Event list timed out")
 
+        self.incr_watch_metrics(received, matched, resource="Endpoints")
         LOGGER.info("Endpoint for service: %s containing %s subsets containing %s addresses found",
                     self.name, subsets, addresses)
         if subsets == self.subsets:
@@ -199,47 +210,76 @@ class Service(ApiMixin):
         if report:
             self.send_update("Read service endpoints")
 
-    def make_http_request(self, hostname=False):
-        response = None
-        with STATSD_CLIENT.timer(ACTION_METRIC_NAME % self.action_data("http_get")):
-            try:
-                svc = self.api.read_namespaced_service(self.name, self.namespace, _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
-                if hostname:
-                    ip = "{}.{}.svc.cluster.local".format(self.name, self.namespace)
-                else:
-                    ip = svc.spec.cluster_ip
-                port = svc.spec.ports[0].port
-                address = "http://{}:{}".format(ip, port)
-                try:
-                    response = requests.get(address, headers=e2e_globals.TEST_REQUEST_HEADERS)
-                    LOGGER.info("Service %s at address: %s GET request response code: %s",
-                                self.name, address, response.status_code)
-                    LOGGER.debug(response)
-                    self.incr_http_count_metric(str(response.status_code))
-
-
-                except requests.HTTPError as e:
-                    LOGGER.error("Service %s at address: %s GET request failed: %s", self.name, address, e)
-                    self.incr_http_count_metric(str(response.status_code))
-                    self.add_error("HTTP error code %i" % response.status_code)
-
-                except requests.ConnectionError as e:
-                    LOGGER.error("Service %s at address: %s GET request failed: %s", self.name, address, e)
-                    self.incr_http_count_metric("connection_error")
-                    self.add_error("Service %s at address: %s gave connection error" % (self.name, address))
+    def _read_service(self):
+        """
+        Read the service object, to find the address to send requests to. With INFORMER_CACHE enabled
+        this comes from the services informer, which its watch keeps up to date, rather than the API.
 
-            except ApiException as e:
-                error_code, error_dict = self.parse_error(e.body)
-                LOGGER.error("Error reading namespaced service in http service request test. Code: %s msg: %s",
-                             error_code.name.lower(), error_dict['message'])
-                self.add_error(error_dict['message'])
-                self.incr_error_metric(error_code.name.lower())
+        Returns: (V1Service) the service, None if it couldn't be read
+
+        """
+        if e2e_globals.INFORMER_CACHE:
+            svc = informer.get_informer("services", self.namespace).get(self.name)
+            if svc is not None:
+                return svc
+        try:
+            return self.api.read_namespaced_service(self.name, self.namespace, _request_timeout=e2e_globals.TEST_EVENT_TIMEOUTS)
+
+        except ApiException as e:
+            error_code, error_dict = self.parse_error(e.body)
+            LOGGER.error("Error reading namespaced service in http service request test. Code: %s msg: %s",
+                         error_code.name.lower(), error_dict['message'])
+            self.add_error(error_dict['message'])
+            self.incr_error_metric(error_code.name.lower())
+
+    def make_http_request(self, hostname=False, svc=None):
+        """
+        Method to send a get request to the service, timing it. See ApiMixin.http_get.
+
+        Args:
+            hostname: (bool) request the service by its DNS name rather than its cluster IP
+            svc: (V1Service) service object to take the address from, read before the request if not given
+
+        Returns: (Response) requests response, None if the request couldn't be made
+
+        """
+        response = None
+        if svc is None:
+            svc = self._read_service()
+        if svc is not None:
+            if hostname:
+                ip = "{}.{}.svc.cluster.local".format(self.name, self.namespace)
+            else:
+                ip = svc.spec.cluster_ip
+            port = svc.spec.ports[0].port
+            address = "http://{}:{}".format(ip, port)
+            response = self.http_get(address)
+            if response is not None:
+                LOGGER.info("Service %s at address: %s GET request response code: %s",
+                            self.name, address, response.status_code)
+                LOGGER.debug(response)
 
         return response
 
     def request_n_times(self, n, expected_text, report=True, hostname=False):
-        for i in range(n):
-            response = self.make_http_request(hostname=hostname)
+        """
+        Method to send n get requests to the service concurrently, up to MAX_PARALLEL_REQUESTS at a time,
+        checking each response. The service is read once for all of the requests.
+
+        Args:
+            n: (int) number of requests to send
+            expected_text: (str) text each response should contain
+            hostname: (bool) request the service by its DNS name rather than its cluster IP
+
+        Returns: None, updates errors and statsd metrics
+
+        """
+        svc = self._read_service()
+        responses = []
+        if svc is not None:
+            responses = e2e_globals.run_concurrently(lambda i: self.make_http_request(hostname=hostname, svc=svc),
+                                                     range(n))
+        for i, response in enumerate(responses):
             if response is not None:
                 if response.text != expected_text:
                     self.add_error("Response text did not match expected - request %i" % i)
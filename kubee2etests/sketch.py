@@ -0,0 +1,172 @@
+import math
+import threading
+
+from array import array
+
+from statsd.client.timer import Timer
+
+
+# sketches are accurate to within ALPHA of the true value, for values from MIN_VALUE to MAX_VALUE seconds
+ALPHA = 0.01
+MIN_VALUE = 0.0001
+MAX_VALUE = 3600.0
+GAMMA = (1 + ALPHA) / (1 - ALPHA)
+LOG_GAMMA = math.log(GAMMA)
+OFFSET = math.floor(math.log(MIN_VALUE) / LOG_GAMMA)
+BUCKETS = math.ceil(math.log(MAX_VALUE) / LOG_GAMMA) - OFFSET + 1
+
+
+class QuantileSketch(object):
+    """
+    Mergeable sketch of a distribution of latencies, from which quantiles can be read to within a relative
+    error of ALPHA. Values are counted in buckets whose bounds grow geometrically, so recording a value is one
+    log and one increment, and the sketch has a fixed size whatever is recorded. Values outside MIN_VALUE to
+    MAX_VALUE are counted in the first or last bucket. Sketches of the same thing from different processes can
+    be added together with merge.
+    """
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = array('L', [0]) * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @staticmethod
+    def index(value):
+        value = min(max(value, MIN_VALUE), MAX_VALUE)
+        return math.ceil(math.log(value) / LOG_GAMMA) - OFFSET
+
+    @staticmethod
+    def value(index):
+        # the value within ALPHA of everything in the bucket
+        return 2 * GAMMA ** (index + OFFSET) / (GAMMA + 1)
+
+    def record(self, value):
+        self.counts[self.index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Args:
+            q: (float) quantile between 0 and 1, e.g. 0.99
+
+        Returns: (float) the estimated value at that quantile, None if nothing has been recorded
+
+        """
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen > rank:
+                return min(max(self.value(index), self.min), self.max)
+        return self.max
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self):
+        return {"count": self.count, "sum": self.total, "min": self.min, "max": self.max,
+                "buckets": {str(index): count for index, count in enumerate(self.counts) if count}}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a sketch sent as json by to_dict.
+
+        Args:
+            data: (dict) deserialized json of the sketch
+
+        Returns: (QuantileSketch) the sketch, raises KeyError, TypeError or ValueError if data isn't a sketch
+
+        """
+        sketch = cls()
+        largest = 2 ** (8 * sketch.counts.itemsize) - 1
+        for index, count in data["buckets"].items():
+            index, count = int(index), int(count)
+            if not 0 <= index < BUCKETS:
+                raise ValueError("bucket %i out of range" % index)
+            if not 0 <= count <= largest:
+                raise ValueError("bucket count %i out of range" % count)
+            sketch.counts[index] = count
+        sketch.count = int(data["count"])
+        if sketch.count < 0:
+            raise ValueError("count %i is negative" % sketch.count)
+        if sketch.count != sum(sketch.counts):
+            raise ValueError("count %i isn't the total of the buckets" % sketch.count)
+        sketch.total = float(data["sum"])
+        sketch.min = float(data["min"])
+        sketch.max = float(data["max"])
+        return sketch
+
+
+class SketchSet(object):
+    """
+    Latency sketches keyed by (namespace, resource, action), the labels of ACTION_METRIC_NAME. Values are recorded
+    into the current window, and reading merges it with the previous one, so summaries cover the last one to two
+    windows. At most max_keys sketches are kept in each window, values for further keys aren't recorded.
+    """
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.current = {}
+        self.previous = {}
+
+    def record(self, key, seconds):
+        with self.lock:
+            sketch = self.current.get(key)
+            if sketch is None:
+                if len(self.current) >= self.max_keys:
+                    return
+                sketch = self.current[key] = QuantileSketch()
+            sketch.record(seconds)
+
+    def rotate(self):
+        """
+        Start a new window, forgetting the values of the one before the current window.
+
+        Returns: None
+
+        """
+        with self.lock:
+            self.previous, self.current = self.current, {}
+
+    def snapshot(self):
+        """
+        Returns: (dict) key -> sketch of the current and previous windows merged
+        """
+        with self.lock:
+            windows = [dict(self.previous), dict(self.current)]
+        merged = {}
+        for window in windows:
+            for key, sketch in window.items():
+                merged.setdefault(key, QuantileSketch()).merge(sketch)
+        return merged
+
+
+class SketchTimer(Timer):
+    """
+    statsd timer which also records the time taken in a sketch set
+    """
+    def __init__(self, client, stat, sketches, key):
+        super().__init__(client, stat, 1)
+        self.sketches = sketches
+        self.key = key
+
+    def send(self):
+        super().send()
+        self.sketches.record(self.key, self.ms / 1000.0)
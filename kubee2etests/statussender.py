@@ -1,32 +1,227 @@
+import atexit
 import logging
 import requests
 import os
 import copy
-from kubee2etests.helpers_and_globals import TEST_NAMESPACE, FLASK_PORT, StatusEvent
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from kubee2etests import helpers_and_globals as e2e_globals
+from kubee2etests.helpers_and_globals import TEST_NAMESPACE, FLASK_PORT, StatusEvent, \
+    STATUS_UPDATE_METRIC_NAME
 
 LOGGER = logging.getLogger(__name__)
+# one session for every sender in the process, so updates reuse a connection to the frontend
+SESSION = requests.Session()
+
+
+def post_update(event):
+    """
+    Post a status event to the flask frontend. If it isn't running, log it and carry on.
+
+    Args:
+        event: (StatusEvent) event to send
+
+    Returns: (Response) requests response, None if the frontend couldn't be reached
+
+    """
+    try:
+        return SESSION.post("http://localhost:{}/update".format(FLASK_PORT), json=event.event_data,
+                            timeout=e2e_globals.STATUS_POST_TIMEOUT)
+    except Exception as e:
+        LOGGER.error("Flask endpoint not available, continuing")
+        LOGGER.debug("Exception: %s", str(e))
+
+
+def post_updates(events):
+    """
+    Post several status events to the flask frontend in one request. If it isn't running, log it and carry on.
+
+    Args:
+        events: (list) StatusEvents to send
+
+    Returns: (Response) requests response, None if the frontend couldn't be reached
+
+    """
+    try:
+        return SESSION.post("http://localhost:{}/update/batch".format(FLASK_PORT),
+                            json=[event.event_data for event in events], timeout=e2e_globals.STATUS_POST_TIMEOUT)
+    except Exception as e:
+        LOGGER.error("Flask endpoint not available, continuing")
+        LOGGER.debug("Exception: %s", str(e))
+
+
+def post_latency(source, sketches):
+    """
+    Post latency sketches to the flask frontend. If it isn't running, log it and carry on.
+
+    Args:
+        source: (str) name of this test runner, replacing its last report
+        sketches: (dict) (namespace, resource, action) -> QuantileSketch
+
+    Returns: (Response) requests response, None if the frontend couldn't be reached
+
+    """
+    report = {"source": source,
+              "sketches": [{"namespace": namespace, "resource": resource, "action": action,
+                            "sketch": sketch.to_dict()}
+                           for (namespace, resource, action), sketch in sketches.items()]}
+    try:
+        return SESSION.post("http://localhost:{}/latency".format(FLASK_PORT), json=report,
+                            timeout=e2e_globals.STATUS_POST_TIMEOUT)
+    except Exception as e:
+        LOGGER.error("Flask endpoint not available, continuing")
+        LOGGER.debug("Exception: %s", str(e))
+
+
+class LatencyReporter(object):
+    """
+    Sends this process's latency sketches to the frontend every interval seconds from a background thread,
+    starting a new sketch window every window seconds.
+    """
+    def __init__(self, source, sketches, interval, window):
+        self.source = source
+        self.sketches = sketches
+        self.interval = interval
+        self.window = window
+        self.thread = threading.Thread(target=self._run, name="latency-reporter", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def _run(self):
+        rotated = time.monotonic()
+        while True:
+            time.sleep(self.interval)
+            post_latency(self.source, self.sketches.snapshot())
+            if time.monotonic() - rotated >= self.window:
+                self.sketches.rotate()
+                rotated = time.monotonic()
+
+
+class StatusQueue(object):
+    """
+    Sends status events to the frontend from a background thread, so tests never wait on the dashboard.
+    Events waiting to be sent are coalesced by namespace and test name, as the frontend only shows the latest
+    status of each test, and sent together in one request. A result replaced while waiting is never sent, so it
+    is missing from the frontend's history too. The queue holds at most maxsize tests, once it is full events
+    for other tests are dropped and counted.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.pending = OrderedDict()
+        self.dropped = 0
+        self.sending = False
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def put(self, event):
+        """
+        Queue an event to be sent, replacing any event for the same test still waiting. Never blocks.
+
+        Args:
+            event: (StatusEvent) event to send
+
+        Returns: (bool) True if the event was queued, False if it was dropped
+
+        """
+        key = (event.namespace, event.name)
+        with self.condition:
+            if key not in self.pending and len(self.pending) >= self.maxsize:
+                self.dropped += 1
+                e2e_globals.STATSD_CLIENT.incr(STATUS_UPDATE_METRIC_NAME % {"result": "dropped"})
+                return False
+            self.pending.pop(key, None)
+            self.pending[key] = event
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="status-sender", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return True
+
+    def _take(self):
+        with self.condition:
+            while not self.pending:
+                self.condition.wait()
+            batch = list(self.pending.values())
+            self.pending.clear()
+            self.sending = True
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            try:
+                self._send(batch)
+            finally:
+                with self.condition:
+                    self.sending = False
+                    self.condition.notify_all()
+
+    def _send(self, batch):
+        response = post_updates(batch)
+        if response is not None and response.status_code == HTTPStatus.NOT_FOUND:
+            # frontend older than the batch endpoint
+            for event in batch:
+                response = post_update(event)
+                if response is None:
+                    break
+        if response is None:
+            e2e_globals.STATSD_CLIENT.incr(STATUS_UPDATE_METRIC_NAME % {"result": "failed"}, len(batch))
+        elif response.status_code != HTTPStatus.OK:
+            LOGGER.error("Frontend rejected status updates: %s", response.text)
+            e2e_globals.STATSD_CLIENT.incr(STATUS_UPDATE_METRIC_NAME % {"result": "failed"}, len(batch))
+        else:
+            e2e_globals.STATSD_CLIENT.incr(STATUS_UPDATE_METRIC_NAME % {"result": "sent"}, len(batch))
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued event has been sent.
+
+        Args:
+            timeout: (float) most seconds to wait, None to wait forever
+
+        Returns: (bool) False if events were still waiting when the timeout ran out
+
+        """
+        with self.condition:
+            if self.thread is None:
+                return True
+            return self.condition.wait_for(lambda: not self.pending and not self.sending, timeout)
+
+
+STATUS_QUEUE = StatusQueue(e2e_globals.STATUS_QUEUE_SIZE)
+atexit.register(STATUS_QUEUE.flush, e2e_globals.STATUS_FLUSH_TIMEOUT)
+
 
 class StatusSender(object):
-    def __init__(self):
+    def __init__(self, namespace=None):
         self.errors = []
+        # errors can be added from several threads when requests are sent concurrently
+        self.errors_lock = threading.RLock()
+        # namespace shown on the frontend, defaults to the TEST_NAMESPACE environment variable
+        self.status_namespace = namespace
 
     @property
     def results(self):
-        passed = len(self.errors) == 0
-        error_msgs = copy.deepcopy(self.errors)
-        self.errors = []
+        with self.errors_lock:
+            passed = len(self.errors) == 0
+            error_msgs = copy.deepcopy(self.errors)
+            self.errors = []
         return passed, error_msgs
 
     def flush_errors(self):
         self.errors = []
 
     def add_error(self, err):
-        error_list = [error[0] for error in self.errors]
-        try:
-            idx = error_list.index(err)
-            self.errors[idx] = (err, self.errors[idx][1] + 1)
-        except ValueError:
-            self.errors.append((err, 1))
+        with self.errors_lock:
+            error_list = [error[0] for error in self.errors]
+            try:
+                idx = error_list.index(err)
+                self.errors[idx] = (err, self.errors[idx][1] + 1)
+            except ValueError:
+                self.errors.append((err, 1))
 
     def add_errors(self, errors):
         """
@@ -40,30 +235,31 @@ class StatusSender(object):
         Returns: None, as a side effect will update `self.errors`
 
         """
-        error_list = [error[0] for error in self.errors]
-        for err in errors:
-            try:
-                idx = error_list.index(err[0])
-                self.errors[idx] = (err, self.errors[idx][1] + err[1])
-            except ValueError:
-                self.errors.append(err)
+        with self.errors_lock:
+            error_list = [error[0] for error in self.errors]
+            for err in errors:
+                try:
+                    idx = error_list.index(err[0])
+                    self.errors[idx] = (err, self.errors[idx][1] + err[1])
+                except ValueError:
+                    self.errors.append(err)
 
     def send_update(self, name):
         """
-        Method which will send an update on the current test to the flask frontend. If not running, will log it and carry on
+        Method which will send an update on the current test to the flask frontend. If not running, will log it and carry on.
+        With STATUS_ASYNC the update is queued and sent from a background thread.
 
         Args:
             name: (str) name of the test being ran
 
-        Returns: (Response) requests response from the action.
+        Returns: (Response) requests response from the action, None if the update was queued.
 
         """
-        namespace = os.environ.get("TEST_NAMESPACE", TEST_NAMESPACE)
+        e2e_globals.flush_metrics()
+        namespace = self.status_namespace or os.environ.get("TEST_NAMESPACE", TEST_NAMESPACE)
         passing, msgs = self.results
         event = StatusEvent(name, passing, namespace, msgs)
-        try:
-            response = requests.post("http://localhost:{}/update".format(FLASK_PORT), json=event.event_data)
-            return response
-        except Exception as e:
-            LOGGER.error("Flask endpoint not available, continuing")
-            LOGGER.debug("Exception: %s", str(e))
+        if e2e_globals.STATUS_ASYNC:
+            STATUS_QUEUE.put(event)
+            return None
+        return post_update(event)
@@ -0,0 +1,34 @@
+import socket
+from unittest import TestCase
+from unittest.mock import patch
+
+from kubernetes import client
+
+from kubee2etests import helpers_and_globals as e2e_globals
+
+
+class TestSuiteApiClient(TestCase):
+    def setUp(self):
+        # start from no shared client, restoring the real one afterwards
+        patcher = patch.multiple(e2e_globals, _API_CLIENT=None, _APIS={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pool_settings(self):
+        with patch.multiple(e2e_globals, K8S_POOL_MAXSIZE=3, K8S_POOL_BLOCK=True, K8S_TCP_KEEPALIVE=True):
+            api_client = e2e_globals.get_api_client()
+        pool_kw = api_client.rest_client.pool_manager.connection_pool_kw
+        self.assertEqual(pool_kw["maxsize"], 3)
+        self.assertTrue(pool_kw["block"])
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), pool_kw["socket_options"])
+
+    def test_no_keepalive(self):
+        with patch.object(e2e_globals, "K8S_TCP_KEEPALIVE", False):
+            api_client = e2e_globals.get_api_client()
+        self.assertNotIn("socket_options", api_client.rest_client.pool_manager.connection_pool_kw)
+
+    def test_apis_shared(self):
+        core = e2e_globals.get_api(client.CoreV1Api)
+        self.assertIs(e2e_globals.get_api(client.CoreV1Api), core)
+        self.assertIs(core.api_client, e2e_globals.get_api_client())
+        self.assertIs(e2e_globals.get_api(client.VersionApi).api_client, core.api_client)
@@ -0,0 +1,30 @@
+from unittest import TestCase
+
+from kubee2etests.frontend.broadcaster import Broadcaster
+from kubee2etests.helpers_and_globals import StatusEvent
+
+
+class TestSuiteBroadcaster(TestCase):
+    def setUp(self):
+        self.broadcaster = Broadcaster(2)
+
+    def test_every_listener_gets_message(self):
+        listeners = [self.broadcaster.listen(), self.broadcaster.listen()]
+        self.broadcaster.publish("nsa", StatusEvent("a", True, "ns"))
+        for listener in listeners:
+            self.assertIn('"key": "nsa"', listener.get(1))
+            self.assertIsNone(listener.get(0.01))
+
+    def test_slow_listener_closed(self):
+        slow = self.broadcaster.listen()
+        for _ in range(3):
+            self.broadcaster.publish("nsa", StatusEvent("a", True, "ns"))
+        self.assertTrue(slow.closed)
+        self.assertEqual(len(self.broadcaster), 0)
+
+    def test_max_listeners(self):
+        broadcaster = Broadcaster(2, max_listeners=1)
+        listener = broadcaster.listen()
+        self.assertIsNone(broadcaster.listen())
+        broadcaster.remove(listener)
+        self.assertIsNotNone(broadcaster.listen())
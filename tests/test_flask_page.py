@@ -1,7 +1,7 @@
 import datetime
+import json
 import math
 import os
-import queue
 import tempfile
 import unittest
 
@@ -129,10 +129,25 @@ class TestSuitePage(unittest.TestCase):
         expected_str = "ERROR! No test data for %i days %i hours and %i minutes" % (0, 0, math.floor(nowish.minute / 2))
         self.assertNotIn(expected_str, data)
 
+    def test_not_modified_if_etag_matches(self):
+        TEST_STATUS.put(StatusEvent("Test passed", True))
+        response = self.app.get('/')
+        etag = response.headers["ETag"]
+        response_two = self.app.get('/', headers={"If-None-Match": etag})
+        self.assertEqual(response_two.status_code, 304)
+        TEST_STATUS.put(StatusEvent("Test failed", False))
+        response_three = self.app.get('/', headers={"If-None-Match": etag})
+        self.assertEqual(response_three.status_code, 200)
+        self.assertIn("Test failed", str(response_three.data))
+
+    def test_status_json(self):
+        TEST_STATUS.put(StatusEvent("Test passed", True))
+        TEST_STATUS.put(StatusEvent("Test failed", False))
+        result = self.app.get('/status.json')
+        data = json.loads(list(result.response)[0].decode())
+        self.assertEqual(data["errors"], [])
+        self.assertEqual([status["name"] for status in data["statuses"]], ["Test failed", "Test passed"])
+
     def tearDown(self):
         os.close(self.db_fd)
-        while True:
-            try:
-                TEST_STATUS.get(block=False)
-            except queue.Empty:
-                break
+        TEST_STATUS.clear()
@@ -3,8 +3,9 @@ import os
 import tempfile
 from flask import Flask
 import json
-from kubee2etests.frontend.flask_app import healthcheck
+from kubee2etests.frontend.flask_app import healthcheck, TEST_STATUS, LATENCY
 from kubee2etests.helpers_and_globals import StatusEvent
+from kubee2etests.sketch import QuantileSketch
 from http import HTTPStatus
 
 class TestFlaskPagePostSuite(TestCase):
@@ -13,6 +14,7 @@ class TestFlaskPagePostSuite(TestCase):
         self.app.register_blueprint(healthcheck)
         self.db_fd, self.app.config['DATABASE'] = tempfile.mkstemp()
         self.app.config['TESTING'] = True
+        self.flask_app = self.app
         self.app = self.app.test_client()
 
     def test_post_valid_entry(self):
@@ -53,5 +55,96 @@ class TestFlaskPagePostSuite(TestCase):
         self.assertIn("hello world", str(response.data))
         self.assertIn(entry.time.strftime('%Y-%m-%d %H:%M:%S'), str(response.data))
 
+    def test_post_batch(self):
+        entries = [StatusEvent("first", True).event_data, StatusEvent("second", False).event_data]
+        result = self.app.post("/update/batch", data=json.dumps(entries), content_type="application/json")
+        self.assertEqual(result.status_code, HTTPStatus.OK)
+        self.assertEqual(json.loads(list(result.response)[0].decode())["result"], "2 events put onto queue")
+        response = self.app.get("/")
+        self.assertIn("first", str(response.data))
+        self.assertIn("second", str(response.data))
+
+    def test_post_batch_ndjson(self):
+        entries = [StatusEvent("first", True).event_data, StatusEvent("second", False).event_data]
+        body = "\n".join(json.dumps(entry) for entry in entries)
+        result = self.app.post("/update/batch", data=body, content_type="application/x-ndjson")
+        self.assertEqual(result.status_code, HTTPStatus.OK)
+        self.assertEqual(len(TEST_STATUS), 2)
+
+    def test_post_batch_invalid_entry_stores_nothing(self):
+        entries = [StatusEvent("first", True).event_data, {"wibble": "hello"},
+                   dict(StatusEvent("third", True).event_data, time="yesterday")]
+        result = self.app.post("/update/batch", data=json.dumps(entries), content_type="application/json")
+        self.assertEqual(result.status_code, HTTPStatus.UNPROCESSABLE_ENTITY)
+        errors = json.loads(list(result.response)[0].decode())["errors"]
+        self.assertEqual([error["index"] for error in errors], [1, 2])
+        self.assertEqual(errors[0]["error"], "Event object invalid: keys missing - name, passing, info, namespace, time")
+        self.assertEqual(len(TEST_STATUS), 0)
+
+    def test_update_streamed_to_events(self):
+        response = self.app.get("/events")
+        stream = response.response
+        self.assertEqual(next(stream), b": connected\n\n")
+        entry = StatusEvent("Hello world", True)
+        self.app.post("/update", data=json.dumps(entry.event_data), content_type="application/json")
+        message = next(stream).decode()
+        self.assertTrue(message.startswith("data: "))
+        self.assertEqual(json.loads(message[len("data: "):])["key"], entry.namespace + entry.name)
+        response.close()
+
+    def test_no_events_without_concurrent_server(self):
+        self.flask_app.config["STREAM_EVENTS"] = False
+        self.assertEqual(self.app.get("/events").status_code, HTTPStatus.NOT_FOUND)
+        self.assertNotIn("status_events.js", str(self.app.get("/").data))
+
+    def test_history(self):
+        entry = StatusEvent("Flapping", True)
+        self.app.post("/update", data=json.dumps(entry.event_data), content_type="application/json")
+        entry.passing = False
+        self.app.post("/update", data=json.dumps(entry.event_data), content_type="application/json")
+        result = self.app.get("/history?key=%s" % (entry.namespace + entry.name))
+        history = json.loads(list(result.response)[0].decode())
+        self.assertEqual(history[entry.namespace + entry.name]["passing"], [True, False])
+        result = self.app.get("/history?since=yesterday")
+        self.assertEqual(result.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_latency(self):
+        sketch = QuantileSketch()
+        for ms in range(1, 101):
+            sketch.record(ms / 1000.0)
+        report = {"source": "runner", "sketches": [{"namespace": "test", "resource": "Deployment",
+                                                    "action": "create", "sketch": sketch.to_dict()}]}
+        for source in ("runner", "other-runner"):
+            report["source"] = source
+            result = self.app.post("/latency", data=json.dumps(report), content_type="application/json")
+            self.assertEqual(result.status_code, HTTPStatus.OK)
+        result = self.app.get("/latency")
+        latencies = json.loads(list(result.response)[0].decode())
+        self.assertEqual(len(latencies), 1)
+        self.assertEqual(latencies[0]["count"], 200)
+        self.assertAlmostEqual(latencies[0]["p50"], 0.05, delta=0.001)
+        self.assertIn("latency-table", str(self.app.get("/").data))
+
+    def test_latency_invalid(self):
+        sketch = dict(QuantileSketch().to_dict(), buckets={"10": 2 ** 64})
+        for item in ({"namespace": "test", "sketch": {}},
+                     {"namespace": "test", "resource": "Pod", "action": "create", "sketch": sketch}):
+            report = {"source": "runner", "sketches": [item]}
+            result = self.app.post("/latency", data=json.dumps(report), content_type="application/json")
+            self.assertEqual(result.status_code, HTTPStatus.UNPROCESSABLE_ENTITY)
+        result = self.app.get("/latency")
+        self.assertEqual(json.loads(list(result.response)[0].decode()), [])
+
+    def test_empty_latency_sketch(self):
+        report = {"source": "runner", "sketches": [{"namespace": "test", "resource": "Pod", "action": "create",
+                                                    "sketch": {"count": 0, "sum": 0, "min": 0, "max": 0, "buckets": {}}}]}
+        result = self.app.post("/latency", data=json.dumps(report), content_type="application/json")
+        self.assertEqual(result.status_code, HTTPStatus.OK)
+        response = self.app.get("/")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotIn("latency-table", str(response.data))
+
     def tearDown(self):
         os.close(self.db_fd)
+        TEST_STATUS.clear()
+        LATENCY.clear()
@@ -0,0 +1,37 @@
+import datetime
+from unittest import TestCase
+
+from kubee2etests.frontend.history import RingBuffer, StatusHistory
+from kubee2etests.helpers_and_globals import StatusEvent
+
+
+def event(name, passing, second):
+    status = StatusEvent(name, passing, "ns")
+    status.time = datetime.datetime(2018, 1, 1, 12, 0, second)
+    return status
+
+
+class TestSuiteHistory(TestCase):
+    def test_ring_buffer_keeps_latest(self):
+        buffer = RingBuffer(3)
+        for i in range(5):
+            buffer.append(float(i), i % 2 == 0)
+        self.assertEqual(buffer.items(), ([2.0, 3.0, 4.0], [1, 0, 1]))
+
+    def test_query_time_range(self):
+        history = StatusHistory(10, 10)
+        for second, passing in enumerate([True, False, True, True]):
+            history.record("nsa", event("a", passing, second))
+        since = event("a", True, 1).time.timestamp()
+        result = history.query(since=since)["nsa"]
+        self.assertEqual(result["passing"], [False, True, True])
+        self.assertEqual(result["changes"], 1)
+        self.assertEqual(history.query(until=since - 10), {})
+
+    def test_forgets_least_recently_updated_test(self):
+        history = StatusHistory(10, 2)
+        history.record("nsa", event("a", True, 0))
+        history.record("nsb", event("b", True, 1))
+        history.record("nsa", event("a", True, 2))
+        history.record("nsc", event("c", True, 3))
+        self.assertEqual(sorted(history.query()), ["nsa", "nsc"])
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+import requests
+
+from kubee2etests.apimixin import ApiMixin
+from kubee2etests.httpprobe import check_probe_mode
+
+
+class TestSuiteHttpGet(TestCase):
+    def setUp(self):
+        self.mixin = ApiMixin("test")
+        self.mixin.name = "obj"
+        self.sent = []
+
+    def get(self, url, warm):
+        self.sent.append(warm)
+        return SimpleNamespace(status_code=200)
+
+    def test_cold_by_default(self):
+        with patch("kubee2etests.httpprobe.get", self.get):
+            response = self.mixin.http_get("http://test")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.sent, [False])
+
+    def test_unknown_mode(self):
+        check_probe_mode("warm")
+        with self.assertRaises(ValueError):
+            check_probe_mode("hot")
+
+    def test_both_modes(self):
+        with patch("kubee2etests.helpers_and_globals.PROBE_MODE", "both"), \
+                patch("kubee2etests.httpprobe.get", self.get):
+            self.mixin.http_get("http://test")
+        self.assertEqual(self.sent, [False, True])
+
+    def test_timeout_is_an_error(self):
+        def get(url, warm):
+            raise requests.ConnectTimeout("slow")
+        with patch("kubee2etests.httpprobe.get", get):
+            self.assertIsNone(self.mixin.http_get("http://test"))
+        self.assertEqual(self.mixin.errors, [("ApiMixin obj at address: http://test timed out", 1)])
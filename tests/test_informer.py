@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from kubernetes.client.rest import ApiException
+from urllib3.exceptions import ReadTimeoutError
+
+from kubee2etests.informer import Informer, selector_predicate
+
+
+def k8s_object(name, labels=None, resource_version="1"):
+    return SimpleNamespace(metadata=SimpleNamespace(name=name, labels=labels, resource_version=resource_version))
+
+
+class TestSuiteInformer(TestCase):
+    def setUp(self):
+        self.informer = Informer("pods", "test")
+        self.informer.store = {"a": k8s_object("a", {"app": "test"}),
+                               "b": k8s_object("b", {"app": "other"})}
+
+    def test_label_selector(self):
+        predicate = selector_predicate(label_selector="app=test")
+        self.assertTrue(predicate(k8s_object("a", {"app": "test", "x": "y"})))
+        self.assertFalse(predicate(k8s_object("a", {"app": "other"})))
+        self.assertFalse(predicate(k8s_object("a")))
+
+    def test_field_selector(self):
+        predicate = selector_predicate(field_selector="metadata.name=a")
+        self.assertTrue(predicate(k8s_object("a")))
+        self.assertFalse(predicate(k8s_object("b")))
+
+    def test_unsupported_field_selector(self):
+        with self.assertRaises(ValueError):
+            selector_predicate(field_selector="status.phase=Running")
+
+    def test_subscription_replays_store_as_added(self):
+        subscription = self.informer.subscription()
+        stream = subscription.stream(label_selector="app=test", _request_timeout=1)
+        event = next(stream)
+        self.assertEqual(event["type"], "ADDED")
+        self.assertEqual(event["object"].metadata.name, "a")
+        self.assertTrue(subscription.events.empty())
+
+    def test_subscription_receives_new_events(self):
+        subscription = self.informer.subscription()
+        stream = subscription.stream(field_selector="metadata.name=c", _request_timeout=1)
+        with self.informer.lock:
+            self.informer._notify("ADDED", k8s_object("c"))
+            self.informer._notify("ADDED", k8s_object("d"))
+        event = next(stream)
+        self.assertEqual(event["object"].metadata.name, "c")
+        with self.assertRaises(ReadTimeoutError):
+            next(stream)
+
+    def test_stop_unsubscribes(self):
+        subscription = self.informer.subscription()
+        for _ in subscription.stream(_request_timeout=1):
+            subscription.stop()
+        self.assertEqual(self.informer.subscribers, {})
+
+    def test_subscription_from_resource_version_replays_later_events(self):
+        self.informer.history_since = 1
+        with self.informer.lock:
+            for event_type, name, version in (("ADDED", "c", "2"), ("MODIFIED", "c", "3"), ("DELETED", "c", "4")):
+                self.informer._record(event_type, k8s_object(name, resource_version=version))
+        subscription = self.informer.subscription()
+        stream = subscription.stream(field_selector="metadata.name=c", resource_version="2", _request_timeout=1)
+        self.assertEqual([next(stream)["type"], next(stream)["type"]], ["MODIFIED", "DELETED"])
+        with self.informer.lock:
+            self.informer._notify("MODIFIED", k8s_object("c", resource_version="3"))
+            self.informer._notify("ADDED", k8s_object("c", resource_version="5"))
+        self.assertEqual(next(stream)["object"].metadata.resource_version, "5")
+
+    def test_subscription_from_resource_version_before_history_gone(self):
+        self.informer.history_since = 10
+        subscription = self.informer.subscription()
+        for version in ("9", "not a number"):
+            with self.assertRaises(ApiException) as context:
+                subscription.stream(resource_version=version, _request_timeout=1)
+            self.assertEqual(context.exception.status, 410)
+        self.assertEqual(self.informer.subscribers, {})
+
+    def test_subscription_from_resource_version_before_first_list_gone(self):
+        subscription = self.informer.subscription()
+        with self.assertRaises(ApiException):
+            subscription.stream(resource_version="1", _request_timeout=1)
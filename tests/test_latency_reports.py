@@ -0,0 +1,38 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from kubee2etests.frontend.latency_reports import LatencyReports
+from kubee2etests.sketch import QuantileSketch
+
+
+def sketches(*values):
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.record(value)
+    return {("ns", "Pod", "create"): sketch}
+
+
+class TestSuiteLatencyReports(TestCase):
+    def setUp(self):
+        self.reports = LatencyReports(10)
+
+    def test_reports_merged(self):
+        self.reports.put("a", sketches(0.1))
+        self.reports.put("b", sketches(0.2, 0.3))
+        self.assertEqual(self.reports.summaries()[0]["count"], 3)
+
+    def test_expired_reports_forgotten(self):
+        with patch("kubee2etests.frontend.latency_reports.time.time", return_value=100):
+            self.reports.put("gone", sketches(0.1))
+        with patch("kubee2etests.frontend.latency_reports.time.time", return_value=111):
+            self.reports.put("new", sketches(0.2))
+            self.assertEqual(list(self.reports.sources), ["new"])
+
+    def test_expiry_changes_version(self):
+        with patch("kubee2etests.frontend.latency_reports.time.time", return_value=100):
+            self.reports.put("gone", sketches(0.1))
+        version = self.reports.version
+        with patch("kubee2etests.frontend.latency_reports.time.time", return_value=111):
+            self.reports.expire()
+            self.assertEqual(self.reports.summaries(), [])
+        self.assertNotEqual(self.reports.version, version)
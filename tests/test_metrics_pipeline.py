@@ -0,0 +1,52 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from statsd import StatsClient
+
+from kubee2etests import helpers_and_globals as e2e_globals
+from kubee2etests.apimixin import ApiMixin
+
+
+class RecordingClient(StatsClient):
+    def __init__(self, maxudpsize):
+        super().__init__(prefix="e2etest", maxudpsize=maxudpsize)
+        self.datagrams = []
+
+    def _send(self, data):
+        self.datagrams.append(data)
+
+
+class TestSuiteMetricsPipeline(TestCase):
+    def setUp(self):
+        self.client = RecordingClient(100)
+        patcher = patch("kubee2etests.helpers_and_globals.STATSD_CLIENT", self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mixin = ApiMixin("test")
+
+    def test_metric_names_cached(self):
+        name = self.mixin.metric_name(e2e_globals.ACTION_METRIC_NAME, action="create")
+        self.assertEqual(name, "action.test.ApiMixin.create")
+        self.assertIs(self.mixin.metric_name(e2e_globals.ACTION_METRIC_NAME, action="create"), name)
+        self.assertEqual(self.mixin.metric_name(e2e_globals.ACTION_METRIC_NAME, "Pod", action="create"),
+                         "action.test.Pod.create")
+
+    def test_unbatched_outside_pipeline(self):
+        self.mixin.incr_http_count_metric("200")
+        self.mixin.incr_http_count_metric("200")
+        self.assertEqual(len(self.client.datagrams), 2)
+
+    def test_pipeline_packs_datagrams(self):
+        with e2e_globals.metrics_pipeline():
+            for _ in range(6):
+                self.mixin.incr_http_count_metric("200")
+            self.assertEqual(self.client.datagrams, [])
+        # "e2etest.http.test.ApiMixin.200:1|c" is 35 bytes, so 2 fit under the 100 byte limit
+        self.assertEqual(len(self.client.datagrams), 3)
+        self.assertTrue(all(len(datagram) < 100 for datagram in self.client.datagrams))
+
+    def test_pipeline_used_by_concurrent_threads(self):
+        with e2e_globals.metrics_pipeline():
+            e2e_globals.run_concurrently(lambda result: self.mixin.incr_http_count_metric(result), ["200", "500"])
+            self.assertEqual(self.client.datagrams, [])
+        self.assertEqual(len(self.client.datagrams), 1)
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from kubee2etests.helpers_and_globals import ANTI_AFFINITY_KEY
+from kubee2etests.nodecache import NodeCache
+
+
+def node(name, zone=None):
+    labels = {ANTI_AFFINITY_KEY: zone} if zone else {}
+    return SimpleNamespace(metadata=SimpleNamespace(name=name, labels=labels))
+
+
+class FakeApi(object):
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.calls = 0
+
+    def list_node(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(items=self.nodes)
+
+
+class TestSuiteNodeCache(TestCase):
+    def setUp(self):
+        self.api = FakeApi([node("a", "zone-1"), node("b")])
+        patcher = patch("kubee2etests.nodecache.e2e_globals.get_api", lambda api_class: self.api)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lookups_within_ttl_list_once(self):
+        cache = NodeCache(ttl=300)
+        self.assertEqual(cache.zone("a"), "zone-1")
+        self.assertIsNone(cache.zone("b"))
+        self.assertEqual(self.api.calls, 1)
+
+    def test_unknown_node_lists_again(self):
+        cache = NodeCache(ttl=300)
+        cache.zone("a")
+        self.api.nodes.append(node("c", "zone-2"))
+        self.assertEqual(cache.zone("c"), "zone-2")
+        self.assertEqual(self.api.calls, 2)
+
+    def test_missing_node_raises(self):
+        cache = NodeCache(ttl=300)
+        with self.assertRaises(KeyError):
+            cache.zone("missing")
+
+    def test_expired_lists_again(self):
+        cache = NodeCache(ttl=0)
+        cache.zone("a")
+        cache.zone("a")
+        self.assertEqual(self.api.calls, 2)
@@ -0,0 +1,60 @@
+import datetime
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from kubee2etests.frontend.history import StatusHistory
+from kubee2etests.frontend.persistence import StatusLog
+from kubee2etests.frontend.status_store import StatusStore
+from kubee2etests.helpers_and_globals import StatusEvent
+
+
+def event(name, passing, second):
+    status = StatusEvent(name, passing, "ns", [["error", 1]] if not passing else [])
+    status.time = datetime.datetime(2018, 1, 1, 12, 0, second)
+    return status
+
+
+class TestSuiteStatusLog(TestCase):
+    def setUp(self):
+        self.db_fd, self.path = tempfile.mkstemp()
+
+    def test_restore_latest_and_history(self):
+        log = StatusLog(self.path, 3)
+        for second, (name, passing) in enumerate([("a", True), ("b", False), ("a", False), ("b", True)]):
+            log.append("ns" + name, event(name, passing, second))
+        log.flush()
+
+        store = StatusStore()
+        history = StatusHistory(10, 10)
+        self.assertEqual(StatusLog(self.path, 3).load(store, history), 2)
+        latest = store.snapshot()
+        self.assertEqual(list(latest), ["nsb", "nsa"])
+        self.assertFalse(latest["nsa"].passing)
+        self.assertEqual(latest["nsa"].info, [["error", 1]])
+        self.assertEqual(latest["nsa"].time, datetime.datetime(2018, 1, 1, 12, 0, 2))
+        # only the last 3 events are kept
+        self.assertEqual(history.query()["nsa"]["passing"], [False])
+        self.assertEqual(history.query()["nsb"]["passing"], [False, True])
+
+    def test_write_failure_does_not_stop_writer(self):
+        log = StatusLog(self.path, 3)
+        with patch.object(log, "_write", side_effect=[ValueError("bad row"), None]) as write:
+            log.append("nsa", event("a", True, 0))
+            self.assertTrue(log.flush(timeout=5))
+            log.append("nsa", event("a", True, 1))
+            self.assertTrue(log.flush(timeout=5))
+        self.assertEqual(write.call_count, 2)
+
+    def test_flush_timeout(self):
+        log = StatusLog(self.path, 3)
+        log.thread = object()
+        log.pending.put(None)
+        self.assertFalse(log.flush(timeout=0.01))
+
+    def tearDown(self):
+        os.close(self.db_fd)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import TestCase
+
+from kubee2etests.deployment import Deployment
+from kubee2etests.pod import startup_phases
+
+
+CREATED = datetime(2018, 1, 1, tzinfo=timezone.utc)
+
+
+def condition(condition_type, seconds, status="True"):
+    return SimpleNamespace(type=condition_type, status=status, last_transition_time=CREATED + timedelta(seconds=seconds))
+
+
+def container(started=None, restart_count=0):
+    running = SimpleNamespace(started_at=CREATED + timedelta(seconds=started)) if started is not None else None
+    return SimpleNamespace(state=SimpleNamespace(running=running), restart_count=restart_count)
+
+
+def k8s_pod(conditions=(), containers=(), uid="uid"):
+    return SimpleNamespace(metadata=SimpleNamespace(name="pod", uid=uid, creation_timestamp=CREATED),
+                           status=SimpleNamespace(conditions=list(conditions), container_statuses=list(containers)))
+
+
+READY_POD = k8s_pod([condition("PodScheduled", 1), condition("Initialized", 2), condition("ContainersReady", 10),
+                     condition("Ready", 10)], [container(8), container(9)])
+
+
+class TestSuiteStartupPhases(TestCase):
+    def test_ready_pod(self):
+        self.assertEqual(startup_phases(READY_POD), {"phase_scheduled": 1, "phase_initialized": 1, "phase_started": 8,
+                                                     "phase_containers_ready": 1, "phase_ready": 1})
+
+    def test_pending_pod(self):
+        pod = k8s_pod([condition("PodScheduled", 1), condition("Ready", 1, status="False")], [container(), container(9)])
+        self.assertEqual(startup_phases(pod), {"phase_scheduled": 1})
+
+    def test_restarted_pod(self):
+        pod = k8s_pod([condition("PodScheduled", 1), condition("Ready", 60)], [container(50, restart_count=1)])
+        self.assertEqual(startup_phases(pod), {"phase_scheduled": 1})
+
+    def test_recorded_once_per_pod(self):
+        recorded = []
+        # stands in for a deployment, which needs a kubernetes API to construct
+        deployment = SimpleNamespace(pod_phases={}, record_time=lambda action, seconds, resource=None: recorded.append(action))
+        Deployment._record_pod_phases(deployment, k8s_pod([condition("PodScheduled", 1)]))
+        Deployment._record_pod_phases(deployment, READY_POD)
+        Deployment._record_pod_phases(deployment, READY_POD)
+        self.assertEqual(sorted(recorded), sorted(startup_phases(READY_POD)))
+
+    def test_unlisted_pods_forgotten(self):
+        deployment = SimpleNamespace(pod_phases={"uid": {"phase_scheduled"}, "gone": {"phase_scheduled"}},
+                                     namespace="test", label_selector="app=test", field=Deployment.field,
+                                     api=SimpleNamespace(list_namespaced_pod=None),
+                                     read=lambda method, *args, **kwargs: {"items": [{"metadata": {"name": "pod", "uid": "uid"}}]})
+        Deployment.read_pods(deployment, report=False)
+        self.assertEqual(list(deployment.pod_phases), ["uid"])
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+from prometheus_client import CollectorRegistry, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+
+RUNNER = """
+from kubee2etests import helpers_and_globals as e2e_globals
+from kubee2etests.apimixin import ApiMixin
+mixin = ApiMixin("ns")
+with mixin.timer("create"):
+    pass
+mixin.incr_error_metric("bad.thing", area="k8s")
+e2e_globals.STATSD_CLIENT.incr("unknown.metric")
+"""
+
+
+class TestSuitePrometheusMetrics(TestCase):
+    def test_processes_aggregated(self):
+        directory = tempfile.mkdtemp()
+        env = dict(os.environ, METRICS_BACKEND="prometheus", PROMETHEUS_MULTIPROC_DIR=directory,
+                   PYTHONPATH=os.getcwd())
+        # separate containers usually have the same PID, so their files are named after the container too
+        for container in ("first", "second"):
+            subprocess.check_call([sys.executable, "-c", RUNNER], env=dict(env, CONTAINER_NAME=container))
+        files = os.listdir(directory)
+        self.assertTrue(any("-first-" in name for name in files))
+        self.assertTrue(any("-second-" in name for name in files))
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry, path=directory)
+        metrics = generate_latest(registry).decode()
+        self.assertIn('e2etest_action_seconds_count{action="create",resource="ApiMixin",test="ns"} 2.0', metrics)
+        self.assertIn('e2etest_errors_total{error="bad.thing",resource="ApiMixin",test="ns",type="k8s"} 2.0',
+                      metrics)
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from kubee2etests.apimixin import ApiMixin
+
+
+class FakeResponse(object):
+    def __init__(self, data):
+        self.data = data
+        self.released = False
+
+    def release_conn(self):
+        self.released = True
+
+
+class TestSuiteRead(TestCase):
+    def setUp(self):
+        self.mixin = ApiMixin("test")
+        self.calls = []
+
+    def test_model_read(self):
+        model = SimpleNamespace(items=[])
+
+        def method(*args, **kwargs):
+            self.calls.append((args, kwargs))
+            return model
+
+        with patch("kubee2etests.helpers_and_globals.RAW_JSON_READS", False):
+            self.assertIs(self.mixin.read(method, "name", "test", label_selector="app=test"), model)
+        self.assertEqual(self.calls, [(("name", "test"), {"label_selector": "app=test"})])
+
+    def test_raw_json_read(self):
+        response = FakeResponse(b'{"items": [{"spec": {"nodeName": "node-1"}}]}')
+
+        def method(*args, **kwargs):
+            self.calls.append((args, kwargs))
+            return response
+
+        with patch("kubee2etests.helpers_and_globals.RAW_JSON_READS", True):
+            result = self.mixin.read(method, "test")
+        self.assertEqual(result, {"items": [{"spec": {"nodeName": "node-1"}}]})
+        self.assertEqual(self.calls, [(("test",), {"_preload_content": False})])
+        self.assertTrue(response.released)
+
+
+class TestSuiteField(TestCase):
+    def test_model_field(self):
+        pod = SimpleNamespace(spec=SimpleNamespace(node_name="node-1"), status=None)
+        self.assertEqual(ApiMixin.field(pod, "spec", "node_name"), "node-1")
+        self.assertIsNone(ApiMixin.field(pod, "status", "phase"))
+
+    def test_json_field_camel_case(self):
+        pod = {"spec": {"nodeName": "node-1"}, "metadata": {"resourceVersion": "10"}}
+        self.assertEqual(ApiMixin.field(pod, "spec", "node_name"), "node-1")
+        self.assertEqual(ApiMixin.field(pod, "metadata", "resource_version"), "10")
+
+    def test_json_field_missing(self):
+        self.assertIsNone(ApiMixin.field({"spec": {}}, "spec", "node_name"))
+        self.assertIsNone(ApiMixin.field({}, "status", "phase"))
@@ -0,0 +1,46 @@
+import threading
+import time
+from unittest import TestCase
+
+from kubee2etests import helpers_and_globals as e2e_globals
+
+
+class TestSuiteRunConcurrently(TestCase):
+    def test_results_in_order(self):
+        def slow_for_small(item):
+            time.sleep((5 - item) * 0.01)
+            return item * 2
+
+        self.assertEqual(e2e_globals.run_concurrently(slow_for_small, range(5), max_workers=5), [0, 2, 4, 6, 8])
+
+    def test_concurrent(self):
+        threads = set()
+
+        def record(item):
+            threads.add(threading.current_thread())
+            time.sleep(0.05)
+
+        e2e_globals.run_concurrently(record, range(4), max_workers=4)
+        self.assertEqual(len(threads), 4)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_one_worker_runs_in_caller(self):
+        threads = []
+        results = e2e_globals.run_concurrently(lambda item: threads.append(threading.current_thread()) or item,
+                                               [1, 2, 3], max_workers=1)
+        self.assertEqual(results, [1, 2, 3])
+        self.assertEqual(threads, [threading.current_thread()] * 3)
+
+    def test_one_item_runs_in_caller(self):
+        threads = []
+        e2e_globals.run_concurrently(lambda item: threads.append(threading.current_thread()), [1], max_workers=4)
+        self.assertEqual(threads, [threading.current_thread()])
+
+    def test_no_items(self):
+        self.assertEqual(e2e_globals.run_concurrently(lambda item: item, []), [])
+
+    def test_pipeline_shared_with_workers(self):
+        with e2e_globals.metrics_pipeline():
+            pipeline = e2e_globals.stats_client()
+            clients = e2e_globals.run_concurrently(lambda item: e2e_globals.stats_client(), range(3), max_workers=3)
+        self.assertTrue(all(client is pipeline for client in clients))
@@ -0,0 +1,74 @@
+import os
+import threading
+from argparse import ArgumentTypeError
+from unittest import TestCase
+from unittest.mock import patch
+
+from kubee2etests.runners.scheduler import SuiteScheduler
+from kubee2etests.scripts.test_runner import _parse_interval, _suite_namespace
+
+
+class FakeRunner(object):
+    def __init__(self, fail_exec=False, fail_finish=False):
+        self.runs = 0
+        self.ran = threading.Event()
+        self.finished = False
+        self.fail_exec = fail_exec
+        self.fail_finish = fail_finish
+
+    def exec(self):
+        self.runs += 1
+        if self.runs >= 2:
+            self.ran.set()
+        if self.fail_exec:
+            raise RuntimeError("run failed")
+
+    def finish(self):
+        self.finished = True
+        if self.fail_finish:
+            raise AttributeError("no finish")
+
+
+class TestSuiteScheduler(TestCase):
+    def setUp(self):
+        self.scheduler = SuiteScheduler()
+
+    def test_suites_run_again_after_failures(self):
+        runners = [FakeRunner(), FakeRunner(fail_exec=True)]
+        for index, runner in enumerate(runners):
+            self.scheduler.add("suite%i" % index, runner, 0.01)
+        self.scheduler.start()
+        for runner in runners:
+            self.assertTrue(runner.ran.wait(5))
+        self.scheduler.stop()
+        self.assertFalse(any(thread.is_alive() for thread in self.scheduler.threads))
+
+    def test_stop_cleans_up_every_suite(self):
+        runners = [FakeRunner(fail_finish=True), FakeRunner()]
+        for index, runner in enumerate(runners):
+            self.scheduler.add("suite%i" % index, runner, 60)
+        self.scheduler.start()
+        self.scheduler.stop()
+        self.assertTrue(all(runner.finished for runner in runners))
+
+
+class TestSuiteTestRunnerArguments(TestCase):
+    def test_parse_interval(self):
+        self.assertEqual(_parse_interval("dns=2.5"), ("dns", 2.5))
+
+    def test_parse_interval_unknown_suite(self):
+        with self.assertRaises(ArgumentTypeError):
+            _parse_interval("wibble=2")
+
+    def test_parse_interval_not_a_number(self):
+        with self.assertRaises(ArgumentTypeError):
+            _parse_interval("dns=often")
+
+    def test_suite_namespace_from_prefix(self):
+        with patch.dict(os.environ, {"TEST_NAMESPACE_PREFIX": "e2e"}):
+            os.environ.pop("TEST_NAMESPACE_DEPLOYMENT_PVC", None)
+            self.assertEqual(_suite_namespace("deployment_pvc"), "e2e-deployment-pvc")
+
+    def test_suite_namespace_override(self):
+        with patch.dict(os.environ, {"TEST_NAMESPACE_DEPLOYMENT_PVC": "pvc-tests"}):
+            self.assertEqual(_suite_namespace("deployment_pvc"), "pvc-tests")
@@ -0,0 +1,70 @@
+import random
+from unittest import TestCase
+
+from kubee2etests.sketch import ALPHA, QuantileSketch, SketchSet
+
+
+class TestSuiteQuantileSketch(TestCase):
+    def setUp(self):
+        generator = random.Random(42)
+        self.values = sorted(generator.lognormvariate(-3, 1) for _ in range(10000))
+        self.sketch = QuantileSketch()
+        for value in self.values:
+            self.sketch.record(value)
+
+    def test_quantiles_within_alpha(self):
+        for q in (0.5, 0.9, 0.95, 0.99):
+            exact = self.values[int(q * (len(self.values) - 1))]
+            self.assertAlmostEqual(self.sketch.quantile(q), exact, delta=exact * ALPHA)
+
+    def test_empty(self):
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+
+    def test_merge(self):
+        first, second = QuantileSketch(), QuantileSketch()
+        for index, value in enumerate(self.values):
+            (first if index % 2 else second).record(value)
+        first.merge(second)
+        self.assertEqual(first.count, self.sketch.count)
+        self.assertEqual(list(first.counts), list(self.sketch.counts))
+        self.assertEqual(first.quantile(0.99), self.sketch.quantile(0.99))
+
+    def test_dict_round_trip(self):
+        sketch = QuantileSketch.from_dict(self.sketch.to_dict())
+        self.assertEqual(list(sketch.counts), list(self.sketch.counts))
+        self.assertEqual(sketch.max, self.sketch.max)
+
+    def test_bad_dict(self):
+        with self.assertRaises(KeyError):
+            QuantileSketch.from_dict({"count": 1})
+
+    def test_bad_buckets(self):
+        data = self.sketch.to_dict()
+        for buckets in ({"-1": 1}, {"100000": 1}, {"10": -1}, {"10": 2 ** 64}):
+            with self.assertRaises(ValueError):
+                QuantileSketch.from_dict(dict(data, buckets=buckets))
+
+    def test_bad_count(self):
+        data = self.sketch.to_dict()
+        for count in (-5, data["count"] + 1):
+            with self.assertRaises(ValueError):
+                QuantileSketch.from_dict(dict(data, count=count))
+
+
+class TestSuiteSketchSet(TestCase):
+    def test_rotate_keeps_one_window(self):
+        sketches = SketchSet(10)
+        sketches.record("a", 0.1)
+        sketches.rotate()
+        sketches.record("a", 0.2)
+        self.assertEqual(sketches.snapshot()["a"].count, 2)
+        sketches.rotate()
+        self.assertEqual(sketches.snapshot()["a"].count, 1)
+        sketches.rotate()
+        self.assertEqual(sketches.snapshot(), {})
+
+    def test_max_keys(self):
+        sketches = SketchSet(1)
+        sketches.record("a", 0.1)
+        sketches.record("b", 0.1)
+        self.assertEqual(list(sketches.snapshot()), ["a"])
@@ -0,0 +1,27 @@
+import datetime
+from unittest import TestCase
+
+from kubee2etests.helpers_and_globals import StatusEvent
+
+
+class TestSuiteStatusEvent(TestCase):
+    def test_round_trip_keeps_milliseconds(self):
+        event = StatusEvent("test", True, "ns", [["error", 1]], 1514808000.1234)
+        copy = StatusEvent.from_dict(event.event_data)
+        self.assertEqual(copy.timestamp, 1514808000.123)
+        self.assertEqual(copy.time.microsecond, 123000)
+        self.assertEqual(copy.info, [["error", 1]])
+
+    def test_old_time_format_accepted(self):
+        event = StatusEvent("test", True, "ns", None, "2018-01-01 12:00:05")
+        self.assertEqual(event.time, datetime.datetime(2018, 1, 1, 12, 0, 5))
+
+    def test_invalid_time(self):
+        with self.assertRaises(TypeError):
+            StatusEvent("test", True, "ns", None, ["2018"])
+        with self.assertRaises(ValueError):
+            StatusEvent("test", True, "ns", None, "yesterday")
+
+    def test_no_instance_dict(self):
+        with self.assertRaises(AttributeError):
+            StatusEvent("test", True).colour = "red"
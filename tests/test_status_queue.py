@@ -0,0 +1,49 @@
+import threading
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from kubee2etests.helpers_and_globals import StatusEvent, STATUS_POST_TIMEOUT
+from kubee2etests.statussender import StatusQueue, post_update, post_updates
+
+
+class TestSuiteStatusQueue(TestCase):
+    def setUp(self):
+        self.queue = StatusQueue(2)
+        self.sent = []
+        self.release = threading.Event()
+
+    def post(self, events):
+        self.release.wait(5)
+        self.sent.extend((event.namespace, event.name, event.passing) for event in events)
+        return SimpleNamespace(status_code=200)
+
+    def test_coalesces_by_test(self):
+        with patch("kubee2etests.statussender.post_updates", self.post):
+            self.queue.put(StatusEvent("a", False, "ns", []))
+            self.queue.put(StatusEvent("b", True, "ns", []))
+            self.queue.put(StatusEvent("a", True, "ns", []))
+            self.release.set()
+            self.assertTrue(self.queue.flush(5))
+        # the first event may already have been taken by the sender before it was replaced
+        self.assertEqual(self.sent[-2:], [("ns", "b", True), ("ns", "a", True)])
+
+    def test_drops_when_full(self):
+        with patch("kubee2etests.statussender.post_updates", self.post):
+            self.queue.put(StatusEvent("a", True, "ns", []))
+            self.queue.flush(0.1)
+            self.assertTrue(self.queue.put(StatusEvent("b", True, "ns", [])))
+            self.assertTrue(self.queue.put(StatusEvent("c", True, "ns", [])))
+            self.assertFalse(self.queue.put(StatusEvent("d", True, "ns", [])))
+            self.release.set()
+            self.assertTrue(self.queue.flush(5))
+        self.assertEqual(self.queue.dropped, 1)
+        self.assertEqual([name for _, name, _ in self.sent], ["a", "b", "c"])
+
+    def test_posts_time_out(self):
+        with patch("kubee2etests.statussender.SESSION.post") as session_post:
+            post_update(StatusEvent("a", True, "ns", []))
+            post_updates([StatusEvent("a", True, "ns", [])])
+        for call in session_post.call_args_list:
+            self.assertEqual(call[1]["timeout"], STATUS_POST_TIMEOUT)
+        self.assertEqual(session_post.call_count, 2)
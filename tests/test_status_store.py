@@ -0,0 +1,38 @@
+import datetime
+from unittest import TestCase
+
+from kubee2etests.frontend.status_store import StatusStore
+from kubee2etests.helpers_and_globals import StatusEvent
+
+
+def event(name, passing=True, minutes_ago=0):
+    status = StatusEvent(name, passing, "ns")
+    status.time = datetime.datetime(2018, 1, 1, 12) - datetime.timedelta(minutes=minutes_ago)
+    return status
+
+
+class TestSuiteStatusStore(TestCase):
+    def setUp(self):
+        self.store = StatusStore()
+
+    def test_snapshot_newest_first(self):
+        self.store.put(event("old", minutes_ago=10))
+        self.store.put(event("new"))
+        self.store.put(event("middle", minutes_ago=5))
+        self.assertEqual([e.name for e in self.store.snapshot().values()], ["new", "middle", "old"])
+        self.assertEqual(self.store.latest().name, "new")
+
+    def test_put_replaces_test(self):
+        self.store.put(event("a", passing=False))
+        self.store.put(event("b", minutes_ago=1))
+        self.store.put(event("a", passing=True, minutes_ago=2))
+        snapshot = self.store.snapshot()
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(list(snapshot), ["nsb", "nsa"])
+        self.assertTrue(snapshot["nsa"].passing)
+
+    def test_clear(self):
+        self.store.put(event("a"))
+        self.store.clear()
+        self.assertEqual(len(self.store), 0)
+        self.assertIsNone(self.store.latest())
@@ -0,0 +1,143 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from kubernetes.client.rest import ApiException
+
+from kubee2etests.apimixin import ApiMixin
+from kubee2etests.helpers_and_globals import EventType
+
+
+def k8s_object(name, resource_version):
+    return SimpleNamespace(metadata=SimpleNamespace(name=name, resource_version=resource_version))
+
+
+class FakeWatch(object):
+    """
+    Stands in for kubernetes.watch.Watch, recording the arguments of each stream call
+    """
+    def __init__(self, streams, calls):
+        self.streams = streams
+        self.calls = calls
+
+    def stream(self, func, *args, **kwargs):
+        self.calls.append(kwargs)
+        for event in self.streams.pop(0):
+            yield event
+
+    def stop(self):
+        pass
+
+
+class TestSuiteWaitOnEvent(TestCase):
+    def setUp(self):
+        self.mixin = ApiMixin("test")
+        self.mixin.name = "obj"
+        self.streams = []
+        self.calls = []
+        self.mixin.watcher = lambda kind=None: FakeWatch(self.streams, self.calls)
+        self.watch_metrics = []
+        self.mixin.incr_watch_metrics = lambda received, matched: self.watch_metrics.append((received, matched))
+
+    def test_written_object_counts_as_added(self):
+        written = k8s_object("obj", "10")
+        objects = self.mixin.wait_on_event(None, EventType.ADDED, written=written)
+        self.assertEqual(objects, [written])
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.watch_metrics, [(0, 0)])
+
+    def test_watch_starts_from_written_resource_version(self):
+        modified = k8s_object("obj", "11")
+        self.streams.append([{"type": "MODIFIED", "object": k8s_object("other", "11")},
+                             {"type": "MODIFIED", "object": modified}])
+        objects = self.mixin.wait_on_event(None, EventType.MODIFIED, written=k8s_object("obj", "10"))
+        self.assertEqual(objects, [modified])
+        self.assertEqual(self.calls[0]["resource_version"], "10")
+        self.assertEqual(self.watch_metrics, [(2, 1)])
+
+    def test_watch_scoped_to_object(self):
+        self.streams.append([{"type": "MODIFIED", "object": k8s_object("obj", "11")}])
+        self.mixin.wait_on_event(None, EventType.MODIFIED)
+        self.assertEqual(self.calls[0]["field_selector"], "metadata.name=obj")
+
+    def test_expired_resource_version_relists(self):
+        modified = k8s_object("obj", "12")
+        self.streams.append([{"type": "ERROR", "raw_object": {"code": 410, "message": "too old"}}])
+        self.streams.append([{"type": "MODIFIED", "object": modified}])
+        objects = self.mixin.wait_on_event(None, EventType.MODIFIED, written=k8s_object("obj", "10"))
+        self.assertEqual(objects, [modified])
+        self.assertEqual(len(self.calls), 2)
+        self.assertNotIn("resource_version", self.calls[1])
+
+    def test_replayed_write_not_counted_again(self):
+        # the informer replays the written object as ADDED before the later event
+        added = k8s_object("obj", "11")
+        self.streams.append([{"type": "ADDED", "object": k8s_object("obj", "10")},
+                             {"type": "ADDED", "object": added}])
+        objects = self.mixin.wait_on_event(None, EventType.ADDED, count=2, written=k8s_object("obj", "10"))
+        self.assertEqual([obj.metadata.resource_version for obj in objects], ["10", "11"])
+        self.assertEqual(self.calls[0]["resource_version"], "10")
+
+    def test_expired_resource_version_raised_by_stream_relists(self):
+        def expired():
+            raise ApiException(status=410)
+            yield
+
+        modified = k8s_object("obj", "12")
+        self.streams.append(expired())
+        self.streams.append([{"type": "MODIFIED", "object": modified}])
+        objects = self.mixin.wait_on_event(None, EventType.MODIFIED, written=k8s_object("obj", "10"))
+        self.assertEqual(objects, [modified])
+        self.assertNotIn("resource_version", self.calls[1])
+
+    def test_other_errors_raised(self):
+        def forbidden():
+            raise ApiException(status=403)
+            yield
+
+        self.streams.append(forbidden())
+        with self.assertRaises(ApiException):
+            self.mixin.wait_on_event(None, EventType.MODIFIED, written=k8s_object("obj", "10"))
+
+
+class TestSuiteWaitOnDeleted(TestCase):
+    def setUp(self):
+        self.mixin = ApiMixin("test")
+        self.mixin.name = "obj"
+        self.mixin.deleted = lambda report=False: self.fail("should not poll")
+        self.streams = []
+        self.calls = []
+
+    def test_already_deleted(self):
+        def read(name, namespace, **kwargs):
+            raise ApiException(status=404)
+        self.mixin.wait_on_deleted(read_method=read, list_method=object())
+
+    def test_watches_from_read_resource_version(self):
+        self.streams.append([{"type": "MODIFIED", "object": k8s_object("obj", "11")},
+                             {"type": "DELETED", "object": k8s_object("obj", "12")}])
+        with patch("kubee2etests.apimixin.watch.Watch", lambda: FakeWatch(self.streams, self.calls)):
+            self.mixin.wait_on_deleted(read_method=lambda name, namespace, **kwargs: k8s_object("obj", "10"),
+                                       list_method=object())
+        self.assertEqual(self.calls[0]["resource_version"], "10")
+
+    def test_polls_if_watch_fails(self):
+        reads = []
+
+        def read(name, namespace, **kwargs):
+            reads.append(name)
+            if len(reads) > 2:
+                raise ApiException(status=404)
+            return k8s_object("obj", "10")
+
+        updates = []
+        self.mixin.send_update = updates.append
+        self.mixin.add_error = lambda error: self.fail("polls should not record errors")
+        self.streams.append([{"type": "ERROR", "raw_object": {"code": 410, "message": "too old"}}])
+        with patch("kubee2etests.apimixin.watch.Watch", lambda: FakeWatch(self.streams, self.calls)), \
+                patch("kubee2etests.apimixin.time.sleep"):
+            self.mixin.wait_on_deleted(report=True, read_method=read, list_method=object())
+        # one read before watching, then polls until it is not found
+        self.assertEqual(len(reads), 3)
+        self.assertFalse(self.mixin.on_api)
+        self.assertEqual(updates, ["Check ApiMixin deleted"])
@@ -0,0 +1,177 @@
+import queue
+import threading
+import time
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from kubee2etests.runners.watch_runners import WatchLatencyRunner
+from kubee2etests.sketch import QuantileSketch
+from kubee2etests.helpers_and_globals import WATCH_PROBE_ANNOTATION
+
+
+def probe_event(sequence, written, event_type="MODIFIED"):
+    annotations = {WATCH_PROBE_ANNOTATION: "%i %r" % (sequence, written)}
+    return {"type": event_type, "object": SimpleNamespace(metadata=SimpleNamespace(annotations=annotations))}
+
+
+class FakeWatch(object):
+    def __init__(self, events):
+        self.events = events
+        self.stopped = False
+
+    def stream(self, func, *args, **kwargs):
+        for event in self.events:
+            if self.stopped:
+                return
+            yield event
+
+    def stop(self):
+        self.stopped = True
+
+
+class TestSuiteWatchLatency(TestCase):
+    def setUp(self):
+        self.recorded = []
+        cfgmap = SimpleNamespace(name="watch-probe", namespace="test", api=SimpleNamespace(list_namespaced_config_map=None),
+                                 record_time=lambda action, seconds: self.recorded.append((action, seconds)))
+        # stands in for a runner, which needs a kubernetes API to construct
+        self.runner = SimpleNamespace(cfgmap=cfgmap, writes=2, progress=threading.Condition(), closed=False)
+
+    def watch(self, events):
+        ready, delivered, sketch, finished = threading.Event(), set(), QuantileSketch(), threading.Event()
+        watcher = FakeWatch(events)
+        with patch("kubee2etests.runners.watch_runners.time.monotonic", return_value=10.5):
+            WatchLatencyRunner._watch(self.runner, watcher, "1", ready, delivered, sketch, finished)
+        self.assertTrue(finished.is_set())
+        return ready, delivered, sketch, watcher
+
+    def test_delivery_recorded(self):
+        ready, delivered, sketch, watcher = self.watch([probe_event(0, 9.0), probe_event(1, 10.0),
+                                                        probe_event(1, 10.0), probe_event(2, 10.25),
+                                                        probe_event(3, 10.3)])
+        self.assertTrue(ready.is_set())
+        self.assertEqual(delivered, {1, 2})
+        self.assertEqual(self.recorded, [("watch_delivery", 0.5), ("watch_delivery", 0.25)])
+        self.assertEqual(sketch.count, 2)
+        self.assertTrue(watcher.stopped)
+
+    def test_nothing_recorded_once_closed(self):
+        self.runner.closed = True
+        ready, delivered, sketch, watcher = self.watch([probe_event(0, 9.0), probe_event(1, 10.0)])
+        self.assertTrue(ready.is_set())
+        self.assertEqual(delivered, set())
+        self.assertEqual(self.recorded, [])
+
+    def test_other_events_ignored(self):
+        unannotated = {"type": "MODIFIED", "object": SimpleNamespace(metadata=SimpleNamespace(annotations=None))}
+        ready, delivered, sketch, watcher = self.watch([unannotated, probe_event(1, 10.0, "ADDED")])
+        self.assertFalse(ready.is_set())
+        self.assertEqual(delivered, set())
+        self.assertEqual(self.recorded, [])
+
+
+class BroadcastWatch(object):
+    """
+    Stands in for kubernetes.watch.Watch, streaming every annotation written to the fake config map
+    """
+    watches = []
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self.stopped = False
+        self.watches.append(self)
+
+    def stream(self, func, *args, **kwargs):
+        while not self.stopped:
+            try:
+                yield self.events.get(timeout=0.01)
+            except queue.Empty:
+                pass
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeConfigMap(object):
+    def __init__(self, dropped=(), failed=()):
+        self.name = "watch-probe"
+        self.namespace = "test"
+        self.api = SimpleNamespace(list_namespaced_config_map=None,
+                                   read_namespaced_config_map=lambda name, namespace: SimpleNamespace(
+                                       metadata=SimpleNamespace(resource_version="1")))
+        self.errors = []
+        self.error_metrics = []
+        self.recorded = []
+        self.updates = []
+        # sequence numbers of writes the first watch doesn't receive
+        self.dropped = dropped
+        # sequence numbers of writes which fail
+        self.failed = failed
+
+    def annotate(self, annotations):
+        sequence, written = annotations[WATCH_PROBE_ANNOTATION].split()
+        if int(sequence) in self.failed:
+            return None
+        for index, watcher in enumerate(BroadcastWatch.watches):
+            if index != 0 or int(sequence) not in self.dropped:
+                watcher.events.put(probe_event(int(sequence), float(written)))
+        return object()
+
+    def record_time(self, action, seconds):
+        self.recorded.append(action)
+
+    def flush_errors(self):
+        self.errors = []
+
+    def add_error(self, error):
+        self.errors.append(error)
+
+    def incr_error_metric(self, error, area="api"):
+        self.error_metrics.append(error)
+
+    def send_update(self, name):
+        self.updates.append(name)
+
+
+class TestSuiteWatchLatencyRun(TestCase):
+    def setUp(self):
+        BroadcastWatch.watches = []
+        # constructing a runner needs a kubernetes API, so its attributes are set directly
+        self.runner = WatchLatencyRunner.__new__(WatchLatencyRunner)
+        self.runner.rate = 200
+        self.runner.writes = 5
+        self.runner.watchers = 3
+
+    def run_runner(self, cfgmap):
+        self.runner.cfgmap = cfgmap
+        with patch("kubee2etests.runners.watch_runners.watch.Watch", BroadcastWatch):
+            self.runner.run()
+
+    def test_every_write_timed_on_every_watch(self):
+        cfgmap = FakeConfigMap()
+        self.run_runner(cfgmap)
+        self.assertEqual(len(cfgmap.recorded), 15)
+        self.assertEqual(cfgmap.errors, [])
+        self.assertEqual(cfgmap.updates, ["Watch delivery latency"])
+        self.assertTrue(all(watcher.stopped for watcher in BroadcastWatch.watches))
+
+    def test_missed_writes_counted(self):
+        cfgmap = FakeConfigMap(dropped=(2, 3))
+        self.run_runner(cfgmap)
+        self.assertEqual(len(cfgmap.recorded), 13)
+        self.assertEqual(cfgmap.errors, ["2 of 5 writes not delivered to a watch"])
+        self.assertEqual(cfgmap.error_metrics, ["watch_event_missed"])
+
+    def test_failed_last_write_does_not_wait_for_timeout(self):
+        cfgmap = FakeConfigMap(failed=(5,))
+        begin = time.monotonic()
+        self.run_runner(cfgmap)
+        self.assertLess(time.monotonic() - begin, 5)
+        self.assertEqual(len(cfgmap.recorded), 12)
+        self.assertEqual(cfgmap.errors, [])
+        self.assertTrue(all(watcher.stopped for watcher in BroadcastWatch.watches))
+
+    def test_rate_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            WatchLatencyRunner(namespace="test", rate=0)